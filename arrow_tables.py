@@ -0,0 +1,121 @@
+"""
+Arrow tables of the CSV-derived data.js sections, shared by the CSV import
+and the lakehouse export.
+
+When pyarrow is installed, import_from_csv builds publishers, spendData,
+riskData and managedTitles as typed Arrow columns anyway; it saves them next
+to data.js (.data.js.arrow/, one Feather file per section) together with
+DataJsFile.fingerprint() of the sections they were written to.
+load_data_to_lakehouse then writes its CSVs straight from those tables
+instead of parsing data.js again, as long as the fingerprint still matches,
+i.e. nothing has rewritten those sections since the import (KPI syncs only
+touch externalKpis and do not invalidate the cache).
+
+Without pyarrow the cache functions here are no-ops and callers use the records.
+
+Both CSV writers of the lakehouse export live here: write_csv (from a cached
+table) and write_records_csv (from records) go through the same csv.writer,
+so the export writes the same bytes whichever path it takes.
+"""
+
+from __future__ import annotations
+
+import csv
+import json
+import os
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Sequence
+
+from data_js import DataJsFile
+from records import SECTION_RECORD_TYPES, Record
+
+try:
+    import pyarrow as pa
+    import pyarrow.feather as feather
+except ImportError:
+    pa = feather = None
+
+HAVE_ARROW = pa is not None
+
+# Sections import_from_csv derives from the CSV
+TABLE_SECTIONS = ["publishers", "spendData", "riskData", "managedTitles"]
+
+MANIFEST = "manifest.json"
+
+
+def cache_dir(data_js_path: Path) -> Path:
+    return Path(data_js_path).with_name(f".{Path(data_js_path).name}.arrow")
+
+
+def records_table(section: str, records: Sequence[Record]) -> "pa.Table":
+    """Arrow table of a record section, one column per field in FIELDS order."""
+    fields = SECTION_RECORD_TYPES[section].FIELDS
+    columns = list(zip(*(r.values() for r in records))) if records else [()] * len(fields)
+    return pa.table({name: list(column) for name, column in zip(fields, columns)})
+
+
+def save_cached_tables(data_file: DataJsFile, tables: Dict[str, "pa.Table"]) -> bool:
+    """Cache `tables` for data_file, keyed by the current fingerprint of TABLE_SECTIONS."""
+    if not HAVE_ARROW:
+        return False
+    directory = cache_dir(data_file.path)
+    try:
+        directory.mkdir(exist_ok=True)
+        (directory / MANIFEST).unlink(missing_ok=True)
+        for section, table in tables.items():
+            feather.write_feather(table, str(directory / f"{section}.feather"))
+        manifest = {"fingerprint": data_file.fingerprint(TABLE_SECTIONS), "sections": sorted(tables)}
+        # Manifest removed first and written last (temp file + rename), so a
+        # half-written cache never has a matching fingerprint
+        tmp_path = directory / f"{MANIFEST}.{os.getpid()}.tmp"
+        tmp_path.write_text(json.dumps(manifest), encoding="utf-8")
+        os.replace(tmp_path, directory / MANIFEST)
+        return True
+    except OSError:
+        return False  # the cache is an optimisation
+
+
+def load_cached_tables(data_file: DataJsFile) -> Optional[Dict[str, "pa.Table"]]:
+    """Cached tables for data_file, or None if absent, incomplete or stale."""
+    if not HAVE_ARROW:
+        return None
+    directory = cache_dir(data_file.path)
+    try:
+        manifest = json.loads((directory / MANIFEST).read_text(encoding="utf-8"))
+        if set(manifest.get("sections", [])) != set(TABLE_SECTIONS):
+            return None
+        if manifest.get("fingerprint") != data_file.fingerprint(TABLE_SECTIONS):
+            return None
+        return {section: feather.read_table(str(directory / f"{section}.feather")) for section in TABLE_SECTIONS}
+    except (OSError, ValueError, pa.ArrowException):
+        return None
+
+
+def write_csv(table: "pa.Table", path: Path, header: List[str]) -> None:
+    """Write `table` as CSV with `header` as column names, as write_records_csv
+    writes the same rows read back from data.js.
+
+    pyarrow's own CSV writer quotes every string and writes doubles such as
+    26000.0 in full, so the rows go through csv.writer instead.
+    """
+    _write_rows(path, header, zip(*(_csv_values(column) for column in table.columns)))
+
+
+def write_records_csv(records: Sequence[Record], path: Path, header: List[str]) -> None:
+    """Write a record section as CSV with `header` as column names (None as an empty field)."""
+    _write_rows(path, header, (r.values() for r in records))
+
+
+def _csv_values(column: "pa.ChunkedArray") -> List[Any]:
+    values = column.to_pylist()
+    if pa.types.is_floating(column.type):
+        # data.js stores integral numbers without a fraction (see data_js.js_value)
+        values = [int(v) if v is not None and v.is_integer() and abs(v) < 1e15 else v for v in values]
+    return values
+
+
+def _write_rows(path: Path, header: List[str], rows: Iterable[Sequence[Any]]) -> None:
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(header)
+        writer.writerows(rows)
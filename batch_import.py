@@ -0,0 +1,195 @@
+"""
+Batch (--dir) imports: a folder of monthly exports into one fiscal-year history.
+
+import_from_csv.py and import_from_excel.py accept --dir instead of --file.
+Every export in the folder is parsed and the snapshots are merged oldest
+first (files are taken in name order, so name them by month, e.g.
+2025-07.csv): a publisher, spend/risk row, managed title or KPI from a later
+month replaces the same key from an earlier one, and anything that has
+dropped out of later exports stays in the history. Keys are the ones --merge
+uses (publisher name, title + publisher, KPI name).
+
+Parsed records are cached per file in .data.js.imports/ next to data.js,
+keyed by the SHA-256 of the file's content. Re-running after a new month
+arrives parses only that month; a renamed or touched file is still a hit,
+an edited one is parsed again. Entries are also keyed by the importer's
+options and its parser sources, so changing either never serves stale
+records. import_from_excel.py --file goes through the same cache, so the
+real run after a --dry-run does not parse the workbook again.
+
+The directory is bounded to PARSE_CACHE_MAX_BYTES: a hit refreshes an
+entry's mtime, and after each write the least recently used entries are
+evicted until the directory fits. The cache is an optimisation: unreadable
+entries are re-parsed and a failed write or eviction is ignored.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import os
+import pickle
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+# Block size for hashing input files
+HASH_BLOCK_SIZE = 1024 * 1024
+
+# Size bound of a parse cache directory; least recently used entries are evicted past it
+PARSE_CACHE_MAX_BYTES = 256 * 1024 * 1024
+
+# Parser modules shared by both importers; part of every cache key
+_SHARED_SOURCES = [Path(__file__).with_name("records.py"), Path(__file__).with_name("value_parsers.py")]
+
+
+def list_import_files(directory: Path, suffixes: Iterable[str]) -> List[Path]:
+    """Files in `directory` with one of `suffixes`, in name order (Excel's ~$ lock files skipped)."""
+    suffixes = {s.lower() for s in suffixes}
+    return sorted(p for p in Path(directory).iterdir()
+                  if p.is_file() and p.suffix.lower() in suffixes and not p.name.startswith(("~$", ".")))
+
+
+def file_digest(path: Path) -> str:
+    """SHA-256 of a file's content."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(HASH_BLOCK_SIZE), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def parser_key(kind: str, sources: Iterable[Path], options: str = "") -> str:
+    """Identifies an importer, its parse-affecting options and the source of its parsers."""
+    key = hashlib.sha256(f"{kind}\0{options}\0".encode("utf-8"))
+    for source in [*sources, *_SHARED_SOURCES]:
+        key.update(Path(source).read_bytes())
+    return f"{kind}-{key.hexdigest()[:16]}"
+
+
+def parse_cache_dir(data_js_path: Path) -> Path:
+    return Path(data_js_path).with_name(f".{Path(data_js_path).name}.imports")
+
+
+class ParseCache:
+    """
+    Parsed records per input file, keyed by content hash.
+
+    `sources` are the importer's own source files and `options` its
+    parse-affecting options; both, with records.py and value_parsers.py, are
+    hashed into the entry names (see parser_key). The directory is kept
+    under `max_bytes` by evicting the least recently used entries.
+    """
+
+    def __init__(self, directory: Path, kind: str, sources: Iterable[Path], options: str = "",
+                 max_bytes: int = PARSE_CACHE_MAX_BYTES):
+        self.directory = Path(directory)
+        # Entries of one importer, option set and parser version share a prefix
+        self.prefix = parser_key(kind, sources, options)
+        self.max_bytes = max_bytes
+
+    def _entry(self, digest: str) -> Path:
+        return self.directory / f"{self.prefix}-{digest}.pickle"
+
+    def get(self, digest: str) -> Optional[Any]:
+        entry = self._entry(digest)
+        try:
+            with open(entry, "rb") as f:
+                value = pickle.load(f)
+        except Exception:
+            return None  # missing, truncated or written by an incompatible version: parse again
+        try:
+            os.utime(entry)  # mtime is the entry's last use
+        except OSError:
+            pass
+        return value
+
+    def put(self, digest: str, value: Any) -> None:
+        entry = self._entry(digest)
+        tmp_path = entry.with_name(f"{entry.name}.{os.getpid()}.tmp")
+        try:
+            self.directory.mkdir(exist_ok=True)
+            with open(tmp_path, "wb") as f:
+                pickle.dump(value, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, entry)
+        except OSError:
+            tmp_path.unlink(missing_ok=True)
+            return
+        self.evict(keep=entry)
+
+    def evict(self, keep: Optional[Path] = None) -> None:
+        """Delete the least recently used entries (of any importer) until the directory fits in max_bytes."""
+        entries = []
+        for path in self.directory.glob("*.pickle"):
+            try:
+                st = path.stat()
+            except OSError:
+                continue  # removed by a concurrent import
+            entries.append((st.st_mtime_ns, st.st_size, path))
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            if path == keep:
+                continue
+            try:
+                path.unlink()
+            except OSError:
+                continue
+            total -= size
+
+    def load_or_parse(self, path: Path, parse: Callable[[Path], Any]) -> Tuple[Any, bool]:
+        """(parsed value, whether it came from the cache) for the file at `path`."""
+        digest = file_digest(path)
+        value = self.get(digest)
+        if value is not None:
+            return value, True
+        value = parse(path)
+        self.put(digest, value)
+        return value, False
+
+
+def merge_sections(existing: Dict, imported: Dict) -> Dict:
+    """Merge imported data with existing, updating matches and adding new records."""
+    merged = dict(existing)
+
+    if "publishers" in imported:
+        existing_pubs = {p.name: p for p in existing.get("publishers", [])}
+        for pub in imported["publishers"]:
+            existing_pubs[pub.name] = pub
+        merged["publishers"] = list(existing_pubs.values())
+        # Re-assign IDs
+        for i, pub in enumerate(merged["publishers"]):
+            pub.id = i + 1
+
+    if "spendData" in imported:
+        existing_spend = {s.publisher: s for s in existing.get("spendData", [])}
+        for spend in imported["spendData"]:
+            existing_spend[spend.publisher] = spend
+        merged["spendData"] = list(existing_spend.values())
+
+    if "riskData" in imported:
+        existing_risks = {r.publisher: r for r in existing.get("riskData", [])}
+        for risk in imported["riskData"]:
+            existing_risks[risk.publisher] = risk
+        merged["riskData"] = list(existing_risks.values())
+
+    if "managedTitles" in imported:
+        existing_titles = {(t.title, t.publisher): t for t in existing.get("managedTitles", [])}
+        for title in imported["managedTitles"]:
+            existing_titles[(title.title, title.publisher)] = title
+        merged["managedTitles"] = list(existing_titles.values())
+
+    if "externalKpis" in imported:
+        existing_kpis = {k.name: k for k in existing.get("externalKpis", [])}
+        for kpi in imported["externalKpis"]:
+            existing_kpis[kpi.name] = kpi
+        merged["externalKpis"] = list(existing_kpis.values())
+
+    return merged
+
+
+def build_history(snapshots: Iterable[Dict[str, list]]) -> Dict[str, list]:
+    """Merge monthly snapshots (oldest first) into one set of sections."""
+    history: Dict[str, list] = {}
+    for snapshot in snapshots:
+        history = merge_sections(history, snapshot)
+    return history
@@ -0,0 +1,176 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark for value_parsers against the per-cell parsers it replaced.
+
+Builds a synthetic 1M-cell column shaped like the FY26 export (placeholders
+such as "$-" and "TBD", a few dozen distinct renewal dates, mostly unique
+amounts) and times each parser over it.
+
+Usage:
+  python benchmarks/bench_value_parsers.py
+  python benchmarks/bench_value_parsers.py --cells 200000 --repeat 5
+"""
+
+from __future__ import annotations
+
+import argparse
+import random
+import re
+import sys
+import time
+from datetime import date, datetime
+from pathlib import Path
+from typing import Any, Callable, List
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from value_parsers import cell_parser, parse_currency, parse_date  # noqa: E402
+
+
+# ─── Previous implementations (import_from_csv / import_from_excel) ──────────
+
+def legacy_parse_currency(val: str) -> float:
+    if not val or not val.strip():
+        return 0
+    s = val.strip().replace("$", "").replace(",", "").replace(" ", "")
+    if s == "-" or s == "$-":
+        return 0
+    try:
+        return float(s)
+    except ValueError:
+        return 0
+
+
+def legacy_parse_date(val: str) -> str:
+    if not val or not val.strip():
+        return ""
+    s = val.strip()
+    date_match = re.match(r"(\d{1,2}/\d{1,2}/\d{4})", s)
+    if date_match:
+        s = date_match.group(1)
+    else:
+        date_match2 = re.match(r"(\d{4}-\d{2}-\d{2})", s)
+        if date_match2:
+            return date_match2.group(1)
+        return ""
+    try:
+        return datetime.strptime(s, "%m/%d/%Y").strftime("%Y-%m-%d")
+    except ValueError:
+        pass
+    return ""
+
+
+def legacy_convert_value(val: Any, field_name: str) -> Any:
+    if val is None:
+        if field_name in ("savingsAmount", "companySpend", "msdSpend", "tiamSpend", "licenseCount", "value"):
+            return 0
+        if field_name == "id":
+            return 0
+        return ""
+    if isinstance(val, datetime):
+        return val.strftime("%Y-%m-%d")
+    if isinstance(val, date):
+        return val.strftime("%Y-%m-%d")
+    if field_name in ("savingsAmount", "companySpend", "msdSpend", "tiamSpend", "value"):
+        try:
+            return float(val) if val else 0
+        except (ValueError, TypeError):
+            return 0
+    if field_name in ("id", "licenseCount"):
+        try:
+            return int(float(val)) if val else 0
+        except (ValueError, TypeError):
+            return 0
+    return str(val).strip() if val else ""
+
+
+# ─── Synthetic columns ───────────────────────────────────────────────────────
+
+def currency_column(cells: int, rng: random.Random) -> List[str]:
+    placeholders = ["$-", "", " $-   ", "-", "TBD", "$0.00"]
+    column = []
+    for _ in range(cells):
+        roll = rng.random()
+        if roll < 0.4:
+            column.append(rng.choice(placeholders))
+        elif roll < 0.55:
+            column.append(str(rng.randint(0, 10_000_000)))
+        else:
+            column.append(f"${rng.uniform(0, 20_000_000):,.2f}")
+    return column
+
+
+def date_column(cells: int, rng: random.Random) -> List[str]:
+    common = [f"{m}/{d}/{y}" for y in (2025, 2026, 2027) for m, d in ((3, 31), (6, 30), (9, 30), (12, 31))]
+    column = []
+    for _ in range(cells):
+        roll = rng.random()
+        if roll < 0.2:
+            column.append(rng.choice(["TBD", "", "N/A"]))
+        elif roll < 0.9:
+            column.append(rng.choice(common))
+        else:
+            column.append(f"{rng.randint(1, 12)}/{rng.randint(1, 28)}/{rng.randint(2025, 2028)}")
+    return column
+
+
+def excel_column(cells: int, rng: random.Random) -> List[Any]:
+    values: List[Any] = [None, 0, "", datetime(2026, 6, 30), "TBD"]
+    column: List[Any] = []
+    for _ in range(cells):
+        if rng.random() < 0.3:
+            column.append(rng.choice(values))
+        else:
+            column.append(round(rng.uniform(0, 20_000_000), 2))
+    return column
+
+
+# ─── Timing ──────────────────────────────────────────────────────────────────
+
+def best_of(repeat: int, func: Callable[[], Any]) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the shared value parsers on a synthetic column")
+    parser.add_argument("--cells", type=int, default=1_000_000, help="Cells per column (default: 1,000,000)")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per parser; the best is reported (default: 3)")
+    parser.add_argument("--seed", type=int, default=2026)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    currency = currency_column(args.cells, rng)
+    dates = date_column(args.cells, rng)
+    excel = excel_column(args.cells, rng)
+    amount_cell = cell_parser("companySpend")
+
+    cases = [
+        ("parse_currency", currency,
+         lambda: [legacy_parse_currency(v) for v in currency],
+         lambda: [parse_currency(v) for v in currency]),
+        ("parse_date", dates,
+         lambda: [legacy_parse_date(v) for v in dates],
+         lambda: [parse_date(v) for v in dates]),
+        ("excel amount cell", excel,
+         lambda: [legacy_convert_value(v, "companySpend") for v in excel],
+         lambda: [amount_cell(v) for v in excel]),
+    ]
+
+    print(f"{args.cells:,} cells per column, best of {args.repeat}\n")
+    print(f"{'parser':<20} {'before':>10} {'after':>10} {'speedup':>9}")
+    for name, column, before, after in cases:
+        if before() != after():
+            print(f"ERROR: {name} results differ from the previous implementation", file=sys.stderr)
+            sys.exit(1)
+        t_before = best_of(args.repeat, before)
+        t_after = best_of(args.repeat, after)
+        print(f"{name:<20} {t_before:>9.3f}s {t_after:>9.3f}s {t_before / t_after:>8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
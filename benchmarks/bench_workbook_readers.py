@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+"""
+Benchmark the workbook reader backends (workbook_readers.py) against each other.
+
+Takes the sheets of a source workbook (base_data.xlsx by default), repeats
+every data row --scale times (1000 by default) into a temporary .xlsx, and
+times each installed backend twice: streaming all rows, and a full
+read_workbook() into records. Every backend must produce the same records
+as openpyxl.
+
+base_data.xlsx is published with protection, which none of the readers can
+open; when the source cannot be read the rows of the --template workbook
+are used instead, and the output says so.
+
+Usage:
+  python benchmarks/bench_workbook_readers.py
+  python benchmarks/bench_workbook_readers.py --source export.xlsx --scale 200 --repeat 5
+"""
+
+from __future__ import annotations
+
+import argparse
+import contextlib
+import io
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, List
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import openpyxl  # noqa: E402
+
+from import_from_excel import create_template, read_workbook  # noqa: E402
+from workbook_readers import BACKENDS, WorkbookReaderError, open_openpyxl, workbook_format  # noqa: E402
+
+ROOT = Path(__file__).resolve().parent.parent
+
+
+# ─── Source workbook ─────────────────────────────────────────────────────────
+
+def read_sheets(path: Path) -> Dict[str, List[tuple]]:
+    with open_openpyxl(path) as (sheet_names, sheet_rows):
+        return {name: [row for row in sheet_rows(name) if any(cell is not None for cell in row)]
+                for name in sheet_names}
+
+
+def source_sheets(source: Path, workdir: Path) -> Dict[str, List[tuple]]:
+    """Rows per sheet of `source`, or of the import template when `source` cannot be read."""
+    try:
+        workbook_format(source)
+        return read_sheets(source)
+    except (WorkbookReaderError, OSError, ValueError, KeyError) as e:
+        print(f"Cannot read {source} ({e}); using the --template workbook's rows instead\n")
+    template = workdir / "template.xlsx"
+    with contextlib.redirect_stdout(io.StringIO()):
+        create_template(str(template))
+    return read_sheets(template)
+
+
+def write_scaled(sheets: Dict[str, List[tuple]], scale: int, path: Path) -> int:
+    """Write each sheet's header and its data rows repeated `scale` times; returns the data row count."""
+    wb = openpyxl.Workbook(write_only=True)
+    total = 0
+    for name, rows in sheets.items():
+        ws = wb.create_sheet(name)
+        if not rows:
+            continue
+        ws.append(rows[0])
+        for copy in range(scale):
+            for row in rows[1:]:
+                # Keep keys distinct across copies: suffix the first text cell
+                row = list(row)
+                first_text = next((i for i, cell in enumerate(row) if isinstance(cell, str) and cell), None)
+                if first_text is not None:
+                    row[first_text] = f"{row[first_text]} {copy}"
+                ws.append(row)
+                total += 1
+    wb.save(path)
+    return total
+
+
+# ─── Timing ──────────────────────────────────────────────────────────────────
+
+def best_of(repeat: int, func: Callable[[], Any]) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def stream_rows(backend, path: Path) -> int:
+    count = 0
+    with backend.open(path) as (sheet_names, sheet_rows):
+        for name in sheet_names:
+            for _ in sheet_rows(name):
+                count += 1
+    return count
+
+
+def import_records(backend, path: Path) -> Dict[str, List[tuple]]:
+    with contextlib.redirect_stdout(io.StringIO()):
+        imported = read_workbook(path, {}, backend.name)
+    return {key: [record.values() for record in records] for key, records in imported.items()}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the workbook reader backends on a scaled-up workbook")
+    parser.add_argument("--source", type=Path, default=ROOT / "base_data.xlsx",
+                        help="Workbook whose rows are scaled up (default: base_data.xlsx)")
+    parser.add_argument("--scale", type=int, default=1000, help="Copies of every data row (default: 1000)")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per backend; the best is reported (default: 3)")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        workdir = Path(tmp)
+        path = workdir / "scaled.xlsx"
+        rows = write_scaled(source_sheets(args.source, workdir), args.scale, path)
+        backends = [b for b in BACKENDS if b.available and "xlsx" in b.formats]
+        skipped = [b.name for b in BACKENDS if not b.available and "xlsx" in b.formats]
+
+        print(f"{rows:,} data rows ({args.scale}x), {path.stat().st_size / 1e6:.1f} MB, best of {args.repeat}\n")
+        expected = import_records(next(b for b in backends if b.name == "openpyxl"), path)
+        timings = {}
+        for backend in backends:
+            if import_records(backend, path) != expected:
+                print(f"ERROR: {backend.name} records differ from openpyxl", file=sys.stderr)
+                sys.exit(1)
+            timings[backend.name] = (best_of(args.repeat, lambda: stream_rows(backend, path)),
+                                     best_of(args.repeat, lambda: import_records(backend, path)))
+
+        baseline = timings["openpyxl"][1]
+        print(f"{'backend':<10} {'rows':>10} {'import':>10} {'speedup':>9}")
+        for name, (t_rows, t_import) in timings.items():
+            print(f"{name:<10} {t_rows:>9.3f}s {t_import:>9.3f}s {baseline / t_import:>8.1f}x")
+        if skipped:
+            print(f"\nNot installed: {', '.join(skipped)}")
+
+
+if __name__ == "__main__":
+    main()
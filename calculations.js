@@ -2,7 +2,7 @@
 const Calculations = (function() {
     
     // Compute potential savings from publishers data - grouped by savings type
-    function computePotentialSavings(rawData) {
+    function computePotentialSavings(rawData, summary) {
         const publishers = rawData.publishers || [];
         
         // Define savings type colors
@@ -17,17 +17,26 @@ const Calculations = (function() {
         
         // Group savings by type
         const savingsByType = {};
-        publishers.forEach(p => {
-            const amount = p.savingsAmount || p.savings || 0;
-            const type = p.savingsType || 'Other';
-            
+        const addSavings = (amount, type) => {
             if (amount > 0) {
                 if (!savingsByType[type]) {
                     savingsByType[type] = 0;
                 }
                 savingsByType[type] += amount;
             }
-        });
+        };
+        const columns = rawData.columns && rawData.columns.publishers;
+        if (summary && summary.savingsByType) {
+            // Precomputed at import time (defaultRawData.summary)
+            Object.entries(summary.savingsByType).forEach(([type, amount]) => addSavings(amount, type));
+        } else if (columns) {
+            // Columnar layout: walk the two field arrays instead of every publisher object
+            for (let i = 0; i < columns.savingsAmount.length; i++) {
+                addSavings(columns.savingsAmount[i] || 0, columns.savingsType[i] || 'Other');
+            }
+        } else {
+            publishers.forEach(p => addSavings(p.savingsAmount || p.savings || 0, p.savingsType || 'Other'));
+        }
         
         // Calculate total for percentages
         const total = Object.values(savingsByType).reduce((sum, val) => sum + val, 0);
@@ -68,7 +77,7 @@ const Calculations = (function() {
     }
     
     // Compute risks tracking from risk heatmap
-    function computeRisksTracking(rawData) {
+    function computeRisksTracking(rawData, summary) {
         const heatmap = rawData.riskHeatmap || [];
         const categories = ['SSPA', 'PO', 'Finance', 'Legal', 'Inventory'];
         const categoryKeys = ['sspa', 'po', 'finance', 'legal', 'inventory'];
@@ -76,7 +85,9 @@ const Calculations = (function() {
         
         // Count publishers with non-empty risk value for each category
         // Supports both numeric (legacy) and text (new) values
+        const riskCounts = summary && summary.riskCounts;
         const values = categoryKeys.map(key => {
+            if (riskCounts) return riskCounts[key] || 0;
             return heatmap.filter(p => {
                 const val = p[key];
                 // Count as 1 if: number > 0, or non-empty string
@@ -93,7 +104,7 @@ const Calculations = (function() {
         };
     }
     
-    // Compute upcoming renewals from publishers
+    // Compute upcoming renewals from publishers (not precomputed: they depend on today's date)
     function computeUpcomingRenewals(rawData) {
         const publishers = rawData.publishers || [];
         const today = new Date();
@@ -192,19 +203,34 @@ const Calculations = (function() {
     }
     
     // Compute KPI totals from raw data
-    function computeKpis(rawData) {
+    function computeKpis(rawData, summary) {
         const annualSpend = rawData.annualSpend || [];
         const managedTitles = rawData.managedTitles || [];
         const publishers = rawData.publishers || [];
         const kpis = rawData.kpis || {};
         
-        // Sum up spend values
-        const companySpend = annualSpend.reduce((sum, p) => sum + (p.spend || 0), 0);
-        const msdSpend = annualSpend.reduce((sum, p) => sum + (p.msdSpend || 0), 0);
-        const tiamSpend = annualSpend.reduce((sum, p) => sum + (p.tiamSpend || 0), 0);
+        if (summary && summary.spend) {
+            // Precomputed at import time; SNOW/ICM still come from the (synced) external KPIs
+            return {
+                companySpend: summary.spend.company / 1000000,
+                msdSpend: summary.spend.msd / 1000000,
+                tiamSpend: summary.spend.tiam / 1000,
+                snowTickets: kpis.snowTickets || 0,
+                icmTickets: kpis.icmTickets || 0,
+                managedTitles: summary.managedTitleCount,
+                managedPublishers: summary.publisherCount
+            };
+        }
+        
+        // Sum up spend values (straight from the number arrays in the columnar layout)
+        const spendColumns = rawData.columns && rawData.columns.spendData;
+        const companySpend = spendColumns ? sumColumn(spendColumns.companySpend) : annualSpend.reduce((sum, p) => sum + (p.spend || 0), 0);
+        const msdSpend = spendColumns ? sumColumn(spendColumns.msdSpend) : annualSpend.reduce((sum, p) => sum + (p.msdSpend || 0), 0);
+        const tiamSpend = spendColumns ? sumColumn(spendColumns.tiamSpend) : annualSpend.reduce((sum, p) => sum + (p.tiamSpend || 0), 0);
         
         // Count unique publishers
-        const uniquePublishers = new Set(publishers.map(p => p.name)).size;
+        const publisherColumns = rawData.columns && rawData.columns.publishers;
+        const uniquePublishers = new Set(publisherColumns ? publisherColumns.name : publishers.map(p => p.name)).size;
         
         return {
             companySpend: companySpend / 1000000, // In millions
@@ -217,6 +243,15 @@ const Calculations = (function() {
         };
     }
     
+    // Sum a numeric column, treating missing values as 0
+    function sumColumn(values) {
+        let total = 0;
+        for (let i = 0; i < values.length; i++) {
+            total += values[i] || 0;
+        }
+        return total;
+    }
+    
     // Format KPI value for display
     function formatKpiValue(value, type) {
         switch(type) {
@@ -230,14 +265,14 @@ const Calculations = (function() {
         }
     }
     
-    // Compute all derived data from raw
-    function computeAll(rawData) {
+    // Compute all derived data from raw, using the import-time aggregates when given
+    function computeAll(rawData, summary) {
         return {
-            potentialSavings: computePotentialSavings(rawData),
-            risksTracking: computeRisksTracking(rawData),
+            potentialSavings: computePotentialSavings(rawData, summary),
+            risksTracking: computeRisksTracking(rawData, summary),
             upcomingRenewals: computeUpcomingRenewals(rawData),
             complianceHealth: computeComplianceHealth(rawData),
-            kpis: computeKpis(rawData)
+            kpis: computeKpis(rawData, summary)
         };
     }
     
@@ -0,0 +1,203 @@
+"""
+Column mapping for import_from_excel: sheet headers → record fields.
+
+Each sheet type lists aliases per field (import_from_excel.*_COLUMNS). A
+header maps to the first field not yet taken that has an alias inside the
+header, or an alias the header is part of (an exact match is both). A
+ColumnIndex compiles a sheet type's aliases once: every substring of every
+alias goes into one dict, so a header found there is part of those fields'
+aliases, and the aliases themselves into an Aho-Corasick automaton that
+finds every alias inside a header in one pass. Both give a bitmask of
+candidate fields, and the lowest one not taken wins, in the order the
+aliases are listed. The masks of the aliases themselves are precomputed
+(an exact header is one dict lookup) and other headers are memoized.
+
+Resolved mappings are cached by header signature (the sheet's headers and
+overrides), so workbooks sharing a layout, such as every month of a --dir
+import, run the matching once per layout.
+
+Overrides pin headers to fields, or to no field with null. They come from a
+JSON file passed with --column-map:
+
+  {"publishers": {"Vendor Name": "name", "Notes": null}, "spend": {...}}
+
+--print-mappings writes the resolved mappings in the same format, so a
+reviewed month's mapping can be saved and replayed for the next ones.
+Headers are matched case-insensitively, ignoring surrounding whitespace.
+"""
+
+from __future__ import annotations
+
+import json
+from collections import deque
+from pathlib import Path
+from typing import Dict, List, Mapping, Optional, Sequence, Tuple
+
+# Sheet type → normalized header → field (None: leave the column unmapped)
+ColumnOverrides = Dict[str, Dict[str, Optional[str]]]
+
+
+def normalize_header(header: str) -> str:
+    return header.strip().lower()
+
+
+class _AliasAutomaton:
+    """Aho-Corasick automaton: the OR of the masks of every pattern occurring in a text.
+
+    Failure links are folded into each state's transition dict, so a search
+    is one dict lookup per character.
+    """
+    __slots__ = ("_delta", "_out")
+
+    def __init__(self, patterns: Mapping[str, int]):
+        goto: List[Dict[str, int]] = [{}]
+        out = [0]
+        for pattern, mask in patterns.items():
+            state = 0
+            for ch in pattern:
+                nxt = goto[state].get(ch)
+                if nxt is None:
+                    nxt = goto[state][ch] = len(goto)
+                    goto.append({})
+                    out.append(0)
+                state = nxt
+            out[state] |= mask
+
+        # Breadth first, so a state's failure target is complete before the state itself
+        fail = [0] * len(goto)
+        delta: List[Dict[str, int]] = [dict(goto[0])] + [{} for _ in goto[1:]]
+        queue = deque(goto[0].values())
+        while queue:
+            state = queue.popleft()
+            delta[state] = {**delta[fail[state]], **goto[state]}
+            out[state] |= out[fail[state]]
+            for ch, nxt in goto[state].items():
+                fail[nxt] = delta[fail[state]].get(ch, 0) if state else 0
+                queue.append(nxt)
+
+        self._delta = delta
+        self._out = out
+
+    def search(self, text: str) -> int:
+        delta, out = self._delta, self._out
+        state = found = 0
+        for ch in text:
+            state = delta[state].get(ch, 0)
+            found |= out[state]
+        return found
+
+
+class ColumnIndex:
+    """A sheet type's column aliases, compiled for header lookups."""
+
+    def __init__(self, column_defs: Sequence[Tuple[List[str], str]]):
+        self.fields = [field_name for _, field_name in column_defs]
+        # Substring of an alias → fields having such an alias ("" is part of every alias)
+        self._within: Dict[str, int] = {"": (1 << len(self.fields)) - 1}
+        aliases: Dict[str, int] = {}
+        for bit, (names, _) in enumerate(column_defs):
+            mask = 1 << bit
+            for alias in names:
+                alias = alias.lower()
+                aliases[alias] = aliases.get(alias, 0) | mask
+                for start in range(len(alias)):
+                    for end in range(start + 1, len(alias) + 1):
+                        part = alias[start:end]
+                        self._within[part] = self._within.get(part, 0) | mask
+        self._automaton = _AliasAutomaton(aliases)
+        # Normalized header → candidate fields; seeded with the aliases, so an exact match is one lookup
+        self._exact: Dict[str, int] = {}
+        for alias in aliases:
+            self.candidates(alias)
+        self._resolved: Dict[tuple, Dict[int, str]] = {}
+
+    def candidates(self, header: str) -> int:
+        """Bitmask of the fields a normalized header matches."""
+        mask = self._exact.get(header)
+        if mask is None:
+            mask = self._exact[header] = self._within.get(header, 0) | self._automaton.search(header)
+        return mask
+
+    def map(self, headers: Sequence[str], overrides: Optional[Mapping[str, Optional[str]]] = None) -> Dict[int, str]:
+        """Column index → field for a header row; cached by header signature."""
+        signature = (tuple(headers), tuple(sorted(overrides.items())) if overrides else ())
+        mapping = self._resolved.get(signature)
+        if mapping is None:
+            mapping = self._resolved[signature] = self._resolve(headers, overrides or {})
+        return dict(mapping)
+
+    def _resolve(self, headers: Sequence[str], overrides: Mapping[str, Optional[str]]) -> Dict[int, str]:
+        mapping: Dict[int, str] = {}
+        used = 0
+        pending = []
+        # Pinned headers first, so fuzzy matching never takes their fields
+        for col_idx, header in enumerate(headers):
+            if not header:
+                continue
+            h = normalize_header(header)
+            if h not in overrides:
+                pending.append((col_idx, h))
+                continue
+            field_name = overrides[h]
+            if field_name is not None:
+                bit = 1 << self.fields.index(field_name)
+                if not used & bit:
+                    mapping[col_idx] = field_name
+                    used |= bit
+        for col_idx, h in pending:
+            free = self.candidates(h) & ~used
+            if free:
+                bit = free & -free  # first field in alias-list order
+                mapping[col_idx] = self.fields[bit.bit_length() - 1]
+                used |= bit
+        return mapping
+
+
+# id(column_defs) → (column_defs, index); the alias lists are module constants
+_INDEXES: Dict[int, Tuple[Sequence, ColumnIndex]] = {}
+
+
+def column_index(column_defs: Sequence[Tuple[List[str], str]]) -> ColumnIndex:
+    """The compiled index of an alias list, built on first use."""
+    entry = _INDEXES.get(id(column_defs))
+    if entry is None or entry[0] is not column_defs:
+        entry = _INDEXES[id(column_defs)] = (column_defs, ColumnIndex(column_defs))
+    return entry[1]
+
+
+def load_column_overrides(path: Path, fields_by_type: Mapping[str, Sequence[str]]) -> ColumnOverrides:
+    """Read a --column-map file; raises ValueError for unknown sheet types or fields."""
+    try:
+        obj = json.loads(Path(path).read_text(encoding="utf-8"))
+    except (OSError, ValueError) as e:
+        raise ValueError(f"Cannot read column map {path}: {e}") from e
+    if not isinstance(obj, dict):
+        raise ValueError(f"Column map {path} must be an object of sheet type → {{header: field}}")
+    overrides: ColumnOverrides = {}
+    for sheet_type, columns in obj.items():
+        if sheet_type not in fields_by_type:
+            raise ValueError(f"Unknown sheet type '{sheet_type}' in {path}. Valid: {', '.join(fields_by_type)}")
+        if not isinstance(columns, dict):
+            raise ValueError(f"Column map {path}: '{sheet_type}' must map headers to fields")
+        for header, field_name in columns.items():
+            if field_name is not None and field_name not in fields_by_type[sheet_type]:
+                raise ValueError(f"Unknown field '{field_name}' for {sheet_type} in {path}. "
+                                 f"Valid: {', '.join(fields_by_type[sheet_type])}")
+        overrides[sheet_type] = {normalize_header(header): field_name for header, field_name in columns.items()}
+    return overrides
+
+
+def resolved_columns(headers: Sequence[str], mapping: Mapping[int, str]) -> Dict[str, Optional[str]]:
+    """A sheet's mapping in --column-map form: every non-empty header → its field or None.
+
+    A repeated header (compared as overrides are, see normalize_header) keeps
+    the mapping of its first column: replayed, the pin gives that column the
+    field and the later ones stay unmapped, as here.
+    """
+    columns: Dict[str, Optional[str]] = {}
+    seen = set()
+    for col_idx, header in enumerate(headers):
+        if header and normalize_header(header) not in seen:
+            seen.add(normalize_header(header))
+            columns[header] = mapping.get(col_idx)
+    return columns
@@ -0,0 +1,116 @@
+"""
+Dashboard aggregates precomputed when data.js is written.
+
+The dashboard's KPI cards and overview charts (spend totals, savings by type,
+risk counts) used to be recomputed from the raw arrays on every page load.
+compute_summary() derives them once in Python; DataJsFile writes the result
+as defaultRawData.summary, so it always matches the rows next to it.
+
+Each aggregate comes from one record section (SUMMARY_SECTIONS). A write
+recomputes only the aggregates of the sections it changes and keeps the
+others from the stored summary, so a KPI sync or a version bump never reads
+the publishers, spend or risk rows.
+
+The block records the datasetVersion it was computed for. The browser only
+uses it while that still matches defaultRawData.datasetVersion and the rows
+have not been edited locally; otherwise calculations.js works from the rows.
+Renewal countdowns depend on the day the page is opened, so calculations.js
+always computes them from the publishers.
+"""
+
+from __future__ import annotations
+
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from records import to_records
+
+# Risk fields counted per category, in the order the Risks Tracking chart shows them
+RISK_CATEGORIES = ["sspa", "po", "finance", "legal", "inventory"]
+
+
+def _has_risk(val: Any) -> bool:
+    # Same rule as calculations.js: a positive number or a non-blank string
+    if isinstance(val, bool):
+        return False
+    if isinstance(val, (int, float)):
+        return val > 0
+    if isinstance(val, str):
+        return val.strip() != ""
+    return False
+
+
+def _publisher_aggregates(publishers: List[Any]) -> Dict[str, Any]:
+    publishers = to_records("publishers", publishers)
+    savings_by_type: Dict[str, float] = {}
+    for pub in publishers:
+        amount = pub.savingsAmount or 0
+        if amount > 0:
+            savings_type = pub.savingsType or "Other"
+            savings_by_type[savings_type] = savings_by_type.get(savings_type, 0) + amount
+    return {
+        "savingsByType": {key: round(val, 2) for key, val in savings_by_type.items()},
+        "publisherCount": len({pub.name for pub in publishers}),
+    }
+
+
+def _spend_aggregates(spend_data: List[Any]) -> Dict[str, Any]:
+    spend_data = to_records("spendData", spend_data)
+    return {"spend": {
+        "company": round(sum(s.companySpend or 0 for s in spend_data), 2),
+        "msd": round(sum(s.msdSpend or 0 for s in spend_data), 2),
+        "tiam": round(sum(s.tiamSpend or 0 for s in spend_data), 2),
+    }}
+
+
+def _risk_aggregates(risk_data: List[Any]) -> Dict[str, Any]:
+    risk_data = to_records("riskData", risk_data)
+    return {"riskCounts": {key: sum(1 for r in risk_data if _has_risk(getattr(r, key))) for key in RISK_CATEGORIES}}
+
+
+def _title_aggregates(managed_titles: List[Any]) -> Dict[str, Any]:
+    return {"managedTitleCount": len(managed_titles)}
+
+
+# Section → (the summary keys derived from it, how)
+SUMMARY_SECTIONS: Dict[str, Tuple[Tuple[str, ...], Callable[[List[Any]], Dict[str, Any]]]] = {
+    "publishers": (("savingsByType", "publisherCount"), _publisher_aggregates),
+    "spendData": (("spend",), _spend_aggregates),
+    "riskData": (("riskCounts",), _risk_aggregates),
+    "managedTitles": (("managedTitleCount",), _title_aggregates),
+}
+
+# Property order of the summary block
+SUMMARY_KEYS = ["datasetVersion", "spend", "savingsByType", "riskCounts", "publisherCount", "managedTitleCount"]
+
+
+def stale_sections(previous: Optional[Dict[str, Any]], dirty: Optional[Iterable[str]] = None) -> List[str]:
+    """Sections whose aggregates compute_summary(data, previous, dirty) recomputes."""
+    dirty = None if dirty is None else set(dirty)
+    if not isinstance(previous, dict) or dirty is None:
+        return list(SUMMARY_SECTIONS)
+    return [section for section, (keys, _) in SUMMARY_SECTIONS.items()
+            if section in dirty or not all(key in previous for key in keys)]
+
+
+def compute_summary(data: Dict[str, Any], previous: Optional[Dict[str, Any]] = None,
+                    dirty: Optional[Iterable[str]] = None) -> Dict[str, Any]:
+    """Aggregate the record sections of `data` for the dashboard.
+
+    With `previous` (the stored summary) and `dirty`, only the sections listed
+    by stale_sections() are read from `data`; the other aggregates are copied.
+    """
+    parts: Dict[str, Any] = {"datasetVersion": data.get("datasetVersion") or ""}
+    stale = stale_sections(previous, dirty)
+    for section, (keys, aggregate) in SUMMARY_SECTIONS.items():
+        if section in stale:
+            parts.update(aggregate(data.get(section) or []))
+        else:
+            parts.update((key, previous[key]) for key in keys)
+    return {key: parts[key] for key in SUMMARY_KEYS}
+
+
+def same_aggregates(a: Any, b: Any) -> bool:
+    """True if two summaries hold the same aggregates, whatever datasetVersion they are keyed to."""
+    if not isinstance(a, dict) or not isinstance(b, dict):
+        return False
+    return {k: v for k, v in a.items() if k != "datasetVersion"} == {k: v for k, v in b.items() if k != "datasetVersion"}
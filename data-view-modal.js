@@ -1581,6 +1581,8 @@ class DataViewModal {
         });
         localStorage.setItem('slsmbrui_custom_field_data', JSON.stringify(customFieldData));
         
+        // The import-time aggregates no longer match the edited rows
+        delete rawData.summary;
         Storage.saveData(rawData);
         
         // Trigger refresh
@@ -1663,7 +1665,8 @@ class DataViewModal {
                     // Bump version
                     rawData.datasetVersion = `FY26_EXCEL_IMPORT_${new Date().toISOString().split('T')[0]}`;
 
-                    // Save
+                    // Save (without the import-time aggregates of the replaced data)
+                    delete rawData.summary;
                     Storage.saveData(rawData);
                     Object.assign(window.rawData, rawData);
 
@@ -112,6 +112,15 @@ const defaultRawData = {
         { title: 'LINQPad', publisher: 'LINQPad Pty Ltd', category: 'Other', licenseCount: 0, notes: 'active' },
     ],
     datasetVersion: 'FY26_NEFAYPGRAFF_2026-02-24',
+    datasetHash: 'f70fe921b387f388',
+    summary: {
+        datasetVersion: 'FY26_NEFAYPGRAFF_2026-02-24',
+        spend: { company: 134185276.46, msd: 6644553.02, tiam: 767314.84 },
+        savingsByType: { 'Cost Avoidance': 6487740, 'Cost Reduction': 3723770.88, 'Enterprise License Volume Discount': 102212 },
+        riskCounts: { sspa: 7, po: 3, finance: 4, legal: 3, inventory: 8 },
+        publisherCount: 20,
+        managedTitleCount: 43,
+    },
     externalKpis: [
         { name: 'SNOW Tickets MTD', value: 450, unit: 'tickets', source: 'ServiceNow', lastUpdated: '2026-02-24', notes: '' },
         { name: 'ICM Tickets MTD', value: 450, unit: 'tickets', source: 'ICM System', lastUpdated: '2026-02-24', notes: '' },
@@ -160,19 +169,56 @@ function mapToLegacyFormat(data) {
         kpis: {
             snowTickets: (data.externalKpis || []).find(k => k.name.includes('SNOW'))?.value || 0,
             icmTickets: (data.externalKpis || []).find(k => k.name.includes('ICM'))?.value || 0
+        },
+
+        // Parallel field arrays from the columnar data.js layout (null for other layouts
+        // or once a section has been replaced by an edit/import)
+        columns: {
+            spendData: sectionColumns(data.spendData, ['companySpend', 'msdSpend', 'tiamSpend']),
+            publishers: sectionColumns(data.publishers, ['name', 'savingsAmount', 'savingsType'])
         }
     };
 }
 
+// Column arrays of a columnar-layout section, if it has every field the calculations need
+function sectionColumns(rows, fields) {
+    const columns = rows && rows.columns;
+    return columns && fields.every(f => Array.isArray(columns[f])) ? columns : null;
+}
+
+// Aggregates precomputed by the importers, if they were computed for this dataset version
+// (edits in the browser drop them, see data-view-modal.js)
+function currentSummary(data) {
+    const summary = data && data.summary;
+    return summary && summary.datasetVersion === data.datasetVersion ? summary : null;
+}
+
+// Stored KPIs, each replaced by the data.js entry of the same name when that was updated later
+function newerKpis(stored, synced) {
+    if (!Array.isArray(stored)) return synced;
+    const byName = new Map((synced || []).map(k => [k.name, k]));
+    const merged = stored.map(k => {
+        const s = byName.get(k.name);
+        byName.delete(k.name);
+        return s && String(s.lastUpdated || '') > String(k.lastUpdated || '') ? s : k;
+    });
+    return merged.concat([...byName.values()]);
+}
+
 // Load data from storage or use defaults (with fallback if Storage not ready)
 let rawData;
 try {
     if (typeof Storage !== 'undefined' && Storage.hasStoredData()) {
         const storedData = Storage.loadData(defaultRawData);
-        const isCurrentDataset = storedData && storedData.datasetVersion === defaultRawData.datasetVersion;
+        // datasetHash is a content hash written by the importers; older files only carry datasetVersion
+        const isCurrentDataset = storedData && (defaultRawData.datasetHash
+            ? storedData.datasetHash === defaultRawData.datasetHash
+            : storedData.datasetVersion === defaultRawData.datasetVersion);
 
         if (isCurrentDataset) {
             rawData = storedData;
+            // KPI syncs leave datasetHash alone; pick up KPIs synced since the copy was stored
+            rawData.externalKpis = newerKpis(storedData.externalKpis, defaultRawData.externalKpis);
         } else {
             rawData = defaultRawData;
             Storage.saveData(defaultRawData);
@@ -192,7 +238,7 @@ const legacyData = mapToLegacyFormat(rawData);
 let computedData;
 try {
     computedData = (typeof Calculations !== 'undefined') 
-        ? Calculations.computeAll(legacyData)
+        ? Calculations.computeAll(legacyData, currentSummary(rawData))
         : computeFallback(legacyData);
 } catch (e) {
     console.warn('Calculations not available, using fallback');
@@ -241,7 +287,7 @@ window.defaultRawData = defaultRawData;
 function refreshDashboardData() {
     const currentRawData = Storage.loadData(defaultRawData);
     const currentLegacyData = mapToLegacyFormat(currentRawData);
-    const newComputedData = Calculations.computeAll(currentLegacyData);
+    const newComputedData = Calculations.computeAll(currentLegacyData, currentSummary(currentRawData));
     
     // Update dashboardData in place
     dashboardData.kpis = newComputedData.kpis;
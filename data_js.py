@@ -0,0 +1,1408 @@
+"""
+Shared reader for the defaultRawData literal in data.js.
+
+data.js is written by generate_js_data as a JavaScript object literal with
+unquoted keys, single-quoted strings and trailing commas. This module parses
+that subset directly in Python in one left-to-right scan, so the importers and
+the lakehouse export neither start Node.js nor rewrite JavaScript into JSON
+with regexes.
+
+Supported grammar:
+  value   := object | array | string | number | true | false | null | undefined
+  object  := '{' (key ':' value ','?)* '}'
+  key     := identifier | string | number
+  array   := '[' (value ','?)* ']'
+
+Line (//) and block (/* */) comments are treated as whitespace.
+
+generate_js_data can also write a minified, dictionary-encoded layout
+(layout="dict": one string table, index tuples per section) or a columnar one
+(layout="columns": parallel arrays per field), each with a decode shim, see
+below. Readers decode them transparently and writes keep a file's layout
+unless another one is requested.
+
+Top-level sections are located through a byte-offset index that is cached next
+to data.js (.data.js.index.json) and keyed by file size, mtime and inode, so
+reading or replacing one section only touches that section.
+
+Writes go through the same index: write() re-serializes only the sections
+marked dirty and copies every other section's bytes unchanged, which keeps
+Git diffs of data.js minimal. Output is streamed record by record through a
+buffered handle on a temp file that is atomically renamed over data.js, so
+peak memory does not grow with the dataset and a crash never leaves a torn file.
+
+Every write also refreshes data.json, a canonical JSON copy of defaultRawData
+that records the SHA-256 of the data.js it matches. load_data_js() returns the
+sidecar content when the hash matches and parses data.js otherwise. The index
+keeps the byte span of each section in data.json too, so the sidecar is
+refreshed like data.js: dirty sections are serialized, the rest are copied.
+When there is no current data.json to copy the imported sections from (e.g.
+data.js came from a checkout), a KPI sync leaves it alone rather than parsing
+them; the next import writes it, and readers parse data.js until then. Reads
+never write it. data.json is a local cache (see .gitignore), not committed.
+
+defaultRawData.datasetHash is a content hash of the imported record sections
+(not externalKpis, which the KPI syncs patch between imports), stored next to
+the human-readable datasetVersion. It combines one digest per section, kept in
+the section index, so a write only hashes the sections it changes. write()
+leaves data.js alone when nothing it writes has changed, so re-importing the
+same data is a no-op, and the dashboard cache and the lakehouse export key on
+datasetHash.
+
+defaultRawData.summary holds the dashboard aggregates (dashboard_summary.py),
+tagged with the datasetVersion they belong to. A write recomputes the
+aggregates of the sections it changes and copies the others.
+
+Concurrent writers (the importers and the KPI syncs) serialize on an advisory
+lock on .data.js.lock, held only while a write is planned and streamed.
+Read-modify-write callers use transact(), which re-reads and retries when a
+compare-and-swap on the SHA-256 of the whole file shows another writer got in
+first (datasetHash would miss KPI syncs, which leave it unchanged).
+
+Usage:
+  from data_js import DataJsFile
+  data_file = DataJsFile(Path("data.js"))
+  kpis = data_file.read_section("externalKpis", [])
+  data_file.write(new_data, dirty={"publishers", "datasetVersion"})
+"""
+
+from __future__ import annotations
+
+import hashlib
+import io
+import json
+import os
+import re
+import shutil
+import sys
+import tempfile
+import time
+from contextlib import contextmanager
+from datetime import date
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, BinaryIO, Callable, Dict, Iterable, Iterator, List, Optional, Set, Tuple, Union
+
+from dashboard_summary import compute_summary, same_aggregates, stale_sections
+from records import SECTION_RECORD_TYPES, Record, to_records
+from symbols import SymbolTable
+
+
+class DataJsError(RuntimeError):
+    """Raised when data.js does not contain a parseable defaultRawData literal."""
+
+
+class DataJsConflict(DataJsError):
+    """Raised by a compare-and-swap write when data.js changed since it was read."""
+
+
+class DataJsLockTimeout(DataJsError):
+    """Raised when the data.js lock could not be acquired in time."""
+
+
+# ─── Tokenizer ───────────────────────────────────────────────────────────────
+
+_SKIP_RE = re.compile(r"(?:\s+|//[^\n]*|/\*.*?\*/)*", re.S)
+_IDENT_RE = re.compile(r"[A-Za-z_$][\w$]*")
+_NUMBER_RE = re.compile(r"[-+]?(?:\d+\.?\d*|\.\d+)(?:[eE][-+]?\d+)?")
+_STRING_RES = {
+    "'": re.compile(r"'((?:[^'\\\n]|\\.)*)'", re.S),
+    '"': re.compile(r'"((?:[^"\\\n]|\\.)*)"', re.S),
+}
+_ESCAPE_RE = re.compile(r"\\(u\{[0-9a-fA-F]+\}|u[0-9a-fA-F]{4}|x[0-9a-fA-F]{2}|\r\n|.)", re.S)
+_SIMPLE_ESCAPES = {
+    "n": "\n", "t": "\t", "r": "\r", "b": "\b", "f": "\f", "v": "\v", "0": "\0",
+    "\n": "", "\r": "", "\r\n": "",
+}
+_KEYWORDS = {"true": True, "false": False, "null": None, "undefined": None}
+
+_STRUCTURE_RE = re.compile(r"""'(?:[^'\\\n]|\\.)*'|"(?:[^"\\\n]|\\.)*"|//[^\n]*|/\*.*?\*/|[\[\]{}]""", re.S)
+_DECLARATION_RE = re.compile(r"\b(?:const|let|var)\s+defaultRawData\s*=\s*")
+_TERMINATOR_RE = re.compile(r"[ \t]*;")
+_DECODER_CALL_RE = re.compile(r"(\w+)\s*\(\s*")
+_CALL_END_RE = re.compile(r"\s*\)")
+
+
+def _unescape_match(match: re.Match) -> str:
+    esc = match.group(1)
+    if len(esc) > 1 and esc[0] in "ux":
+        return chr(int(esc[1:].strip("{}"), 16))
+    return _SIMPLE_ESCAPES.get(esc, esc)
+
+
+def _unescape(body: str) -> str:
+    if "\\" not in body:
+        return body
+    return _ESCAPE_RE.sub(_unescape_match, body)
+
+
+class _Parser:
+    """Recursive-descent parser over a single string; every character is visited once."""
+
+    def __init__(self, text: str, pos: int = 0):
+        self.text = text
+        self.pos = pos
+
+    def error(self, message: str) -> DataJsError:
+        line = self.text.count("\n", 0, self.pos) + 1
+        column = self.pos - (self.text.rfind("\n", 0, self.pos) + 1) + 1
+        return DataJsError(f"{message} at line {line}, column {column}")
+
+    def skip(self) -> None:
+        self.pos = _SKIP_RE.match(self.text, self.pos).end()
+
+    def peek(self) -> str:
+        self.skip()
+        return self.text[self.pos] if self.pos < len(self.text) else ""
+
+    def value(self) -> Any:
+        c = self.peek()
+        if c == "{":
+            return self.object()
+        if c == "[":
+            return self.array()
+        if c in _STRING_RES:
+            return self.string()
+        match = _NUMBER_RE.match(self.text, self.pos)
+        if match:
+            self.pos = match.end()
+            token = match.group()
+            if "." in token or "e" in token or "E" in token:
+                return float(token)
+            return int(token)
+        match = _IDENT_RE.match(self.text, self.pos)
+        if match and match.group() in _KEYWORDS:
+            self.pos = match.end()
+            return _KEYWORDS[match.group()]
+        raise self.error("Unexpected token" if c else "Unexpected end of input")
+
+    def string(self) -> str:
+        match = _STRING_RES[self.text[self.pos]].match(self.text, self.pos)
+        if not match:
+            raise self.error("Unterminated string")
+        self.pos = match.end()
+        return _unescape(match.group(1))
+
+    def key(self) -> str:
+        c = self.peek()
+        if c in _STRING_RES:
+            return self.string()
+        match = _IDENT_RE.match(self.text, self.pos) or _NUMBER_RE.match(self.text, self.pos)
+        if not match:
+            raise self.error("Expected property name")
+        self.pos = match.end()
+        return match.group()
+
+    def object(self) -> Dict[str, Any]:
+        self.pos += 1
+        obj: Dict[str, Any] = {}
+        while True:
+            if self.peek() == "}":
+                self.pos += 1
+                return obj
+            key = self.key()
+            if self.peek() != ":":
+                raise self.error(f"Expected ':' after '{key}'")
+            self.pos += 1
+            obj[key] = self.value()
+            c = self.peek()
+            if c == ",":
+                self.pos += 1
+            elif c != "}":
+                raise self.error("Expected ',' or '}'")
+
+    def skip_value(self) -> None:
+        """Advance past one value without building it (used for indexing)."""
+        if self.peek() not in ("{", "["):
+            self.value()
+            return
+        depth = 0
+        for match in _STRUCTURE_RE.finditer(self.text, self.pos):
+            token = match.group()
+            if token == "{" or token == "[":
+                depth += 1
+            elif token == "}" or token == "]":
+                depth -= 1
+                if depth == 0:
+                    self.pos = match.end()
+                    return
+        raise self.error("Unterminated object or array")
+
+    def array(self) -> List[Any]:
+        self.pos += 1
+        items: List[Any] = []
+        while True:
+            if self.peek() == "]":
+                self.pos += 1
+                return items
+            items.append(self.value())
+            c = self.peek()
+            if c == ",":
+                self.pos += 1
+            elif c != "]":
+                raise self.error("Expected ',' or ']'")
+
+
+def parse_js_value(text: str, pos: int = 0) -> Tuple[Any, int]:
+    """Parse one JS literal starting at pos. Returns (value, end offset)."""
+    parser = _Parser(text, pos)
+    value = parser.value()
+    return value, parser.pos
+
+
+# ─── JavaScript Generation ───────────────────────────────────────────────────
+
+WRITE_BUFFER_SIZE = 1 << 20
+COPY_CHUNK_SIZE = 1 << 20
+NEW_FILE_MODE = 0o644
+
+# Top-level sections in the order generate_js_data writes them
+SECTION_ORDER = ["publishers", "spendData", "riskData", "managedTitles", "datasetVersion", "datasetHash", "summary",
+                 "externalKpis"]
+
+# Declaration layouts write_declaration can produce (see the Dictionary-Encoded
+# and Columnar Layout sections)
+LAYOUTS = ("rows", "dict", "columns")
+
+# Sections that make up the dataset; datasetVersion and datasetHash label it and
+# summary is derived from it (see dashboard_summary.py). externalKpis is left
+# out: the KPI syncs update it between imports and must not change datasetHash
+CONTENT_SECTIONS = ["publishers", "spendData", "riskData", "managedTitles"]
+
+# Property order of the records in each array section (the record field order)
+SECTION_KEY_ORDER = {key: list(record_type.FIELDS) for key, record_type in SECTION_RECORD_TYPES.items()}
+
+
+def js_value(val: Any) -> str:
+    """Serialize a Python value to JavaScript literal syntax."""
+    if val is None:
+        return "null"
+    if isinstance(val, bool):
+        return "true" if val else "false"
+    if isinstance(val, (int, float)):
+        if isinstance(val, float) and val == int(val) and abs(val) < 1e15:
+            return str(int(val))
+        return str(val)
+    if isinstance(val, dict):
+        if not val:
+            return "{}"
+        return "{ " + ", ".join(f"{_js_key(k)}: {js_value(v)}" for k, v in val.items()) + " }"
+    if isinstance(val, (list, tuple)):
+        return "[" + ", ".join(js_value(v) for v in val) + "]"
+    # String — single-quote with escaping
+    s = str(val).replace("\\", "\\\\").replace("'", "\\'").replace("\n", "\\n").replace("\r", "\\r")
+    return f"'{s}'"
+
+
+def _js_key(key: str) -> str:
+    return key if _IDENT_RE.fullmatch(key) else js_value(key)
+
+
+def js_object_oneline(obj: Union[Record, Dict[str, Any]], key_order: List[str]) -> str:
+    """Serialize a record or dict as a one-line JS object literal with unquoted keys."""
+    if isinstance(obj, Record):
+        parts = [f"{key}: {js_value(val)}" for key, val in zip(obj.FIELDS, obj.values())]
+        parts.extend(f"{_js_key(key)}: {js_value(val)}" for key, val in obj.extra.items())
+        return "{ " + ", ".join(parts) + " }"
+    parts = []
+    for key in key_order:
+        if key in obj:
+            parts.append(f"{key}: {js_value(obj[key])}")
+    # Include any extra keys not in the order
+    for key in obj:
+        if key not in key_order:
+            parts.append(f"{_js_key(key)}: {js_value(obj[key])}")
+    return "{ " + ", ".join(parts) + " }"
+
+
+def default_dataset_version() -> str:
+    return f"FY26_IMPORT_{date.today().isoformat()}"
+
+
+def write_section(out: BinaryIO, key: str, value: Any, layout: str = "rows") -> None:
+    """Stream the value of one top-level defaultRawData key, one record per write
+    (one column per write in the columnar layout)."""
+    if layout == "columns" and _is_record_section(value):
+        _write_columns_section(out, key, value)
+    elif layout == "dict" and _is_record_section(value):
+        # On its own, without the shared string table: no dictionary-encoded columns
+        _write_packed_section(out, value, _section_columns(key, value), [], None)
+    elif layout == "rows" and isinstance(value, dict):
+        _write_block(out, value)
+    elif isinstance(value, list):
+        key_order = SECTION_KEY_ORDER.get(key, [])
+        out.write(b"[\n")
+        for item in value:
+            out.write(f"        {js_object_oneline(item, key_order)},\n".encode("utf-8"))
+        out.write(b"    ]")
+    else:
+        out.write(js_value(value).encode("utf-8"))
+
+
+def _write_block(out: BinaryIO, value: Dict[str, Any]) -> None:
+    """An object section (summary): one property per line, list properties one item per line."""
+    out.write(b"{\n")
+    for key, item in value.items():
+        if isinstance(item, list) and item:
+            out.write(f"        {_js_key(key)}: [\n".encode("utf-8"))
+            for element in item:
+                out.write(f"            {js_value(element)},\n".encode("utf-8"))
+            out.write(b"        ],\n")
+        else:
+            out.write(f"        {_js_key(key)}: {js_value(item)},\n".encode("utf-8"))
+    out.write(b"    }")
+
+
+def js_section(key: str, value: Any) -> str:
+    """Serialize the value of one top-level defaultRawData key as a string."""
+    buf = io.BytesIO()
+    write_section(buf, key, value)
+    return buf.getvalue().decode("utf-8")
+
+
+def write_declaration(out: BinaryIO, data: Dict[str, Any], layout: str = "rows") -> Dict[str, Tuple[int, int]]:
+    """Stream the full defaultRawData declaration in the given layout (see LAYOUTS).
+    Returns the byte span of each section."""
+    if layout == "dict":
+        return _write_dict_declaration(out, data)
+    if layout == "columns":
+        return _write_columns_declaration(out, data)
+    if layout != "rows":
+        raise ValueError(f"Unknown data.js layout '{layout}'. Valid: {', '.join(LAYOUTS)}")
+    spans: Dict[str, Tuple[int, int]] = {}
+    out.write(b"const defaultRawData = {\n")
+    for key, value in _declaration_items(data):
+        out.write(f"    {key}: ".encode("utf-8"))
+        start = out.tell()
+        write_section(out, key, value)
+        spans[key] = (start, out.tell())
+        out.write(b"\n" if key == "externalKpis" else b",\n")
+    out.write(b"};")
+    return spans
+
+
+def _declaration_items(data: Dict[str, Any]) -> Iterator[Tuple[str, Any]]:
+    """(key, value) pairs of the declaration in SECTION_ORDER, with the version labels filled in."""
+    for key in SECTION_ORDER:
+        if key == "datasetVersion":
+            yield key, data.get(key) or default_dataset_version()
+        elif key == "datasetHash":
+            yield key, data.get(key) or dataset_hash(data)
+        elif key == "summary":
+            yield key, data.get(key) or compute_summary(data)
+        elif key in data:
+            yield key, data[key]
+
+
+def generate_js_data(data: Dict[str, Any], layout: str = "rows") -> str:
+    """Generate the full defaultRawData JavaScript declaration as a string."""
+    buf = io.BytesIO()
+    write_declaration(buf, data, layout)
+    return buf.getvalue().decode("utf-8")
+
+
+# ─── Dictionary-Encoded Layout ───────────────────────────────────────────────
+# layout="dict" writes every distinct string once, in a shared `strings` table,
+# and each record section as a column header plus index tuples:
+#
+#   const defaultRawData = decodePackedRawData({
+#   strings:['Adobe','Creative Cloud',...],
+#   publishers:{columns:['id','name',...],dict:[1,2,...],rows:[[1,0,1,...],...]},
+#   datasetVersion:'FY26_...',
+#   ...
+#   });
+#   function decodePackedRawData(packed) { ... }
+#
+# `dict` lists the columns whose values are indexes into `strings` (columns
+# holding only strings or null); other columns keep their literal values. The
+# decode shim after the declaration is hoisted by the browser and rebuilds the
+# same defaultRawData object the rows layout would have produced. Minified, no
+# key names repeated per record and no publisher name repeated across sections.
+#
+# A write that leaves the imported sections (CONTENT_SECTIONS) alone, such as a
+# KPI sync, replaces the other sections in place with `dict:[]`, so the string
+# table does not have to be rebuilt.
+
+DICT_DECODER = "decodePackedRawData"
+DICT_STRINGS_KEY = "strings"
+
+DICT_SHIM = (
+    "function decodePackedRawData(packed) {\n"
+    "    const strings = packed.strings, out = {};\n"
+    "    for (const key of Object.keys(packed)) {\n"
+    "        const section = packed[key];\n"
+    "        if (key === 'strings') continue;\n"
+    "        if (!section || !Array.isArray(section.rows)) { out[key] = section; continue; }\n"
+    "        const columns = section.columns, isDict = columns.map((_, i) => section.dict.includes(i));\n"
+    "        out[key] = section.rows.map(row => {\n"
+    "            const obj = {};\n"
+    "            for (let i = 0; i < columns.length; i++) {\n"
+    "                const v = row[i];\n"
+    "                obj[columns[i]] = isDict[i] && v !== null ? strings[v] : v;\n"
+    "            }\n"
+    "            return obj;\n"
+    "        });\n"
+    "    }\n"
+    "    return out;\n"
+    "}"
+)
+
+
+def _section_columns(key: str, value: List[Any]) -> List[str]:
+    """Column header for a record section: record FIELDS and the union of their
+    extra keys, or the union of dict keys."""
+    if value and all(isinstance(item, Record) for item in value):
+        return list(type(value[0]).FIELDS) + list(dict.fromkeys(key for item in value for key in item.extra))
+    columns = list(SECTION_KEY_ORDER.get(key, []))
+    seen = set(columns)
+    for item in value:
+        for name in item:
+            if name not in seen:
+                seen.add(name)
+                columns.append(name)
+    return [name for name in columns if any(_field(item, name) is not _MISSING for item in value)]
+
+
+_MISSING = object()
+
+
+def _field(item: Any, name: str) -> Any:
+    if isinstance(item, Record):
+        return getattr(item, name) if name in item.FIELDS else item.extra.get(name, _MISSING)
+    return item.get(name, _MISSING)
+
+
+def _row_values(item: Any, columns: List[str]) -> List[Any]:
+    if isinstance(item, Record) and list(item.FIELDS) == columns:
+        return list(item.values())
+    return [None if v is _MISSING else v for v in (_field(item, name) for name in columns)]
+
+
+def _is_record_section(value: Any) -> bool:
+    return isinstance(value, list) and all(isinstance(item, (Record, dict)) for item in value)
+
+
+def _write_dict_declaration(out: BinaryIO, data: Dict[str, Any]) -> Dict[str, Tuple[int, int]]:
+    items = list(_declaration_items(data))
+
+    # Pass 1: column headers, which columns are dictionary-encoded, string table
+    strings = SymbolTable()
+    headers: Dict[str, Tuple[List[str], List[int]]] = {}
+    for key, value in items:
+        if not _is_record_section(value):
+            continue
+        columns = _section_columns(key, value)
+        is_dict = [True] * len(columns)
+        for item in value:
+            for i, v in enumerate(_row_values(item, columns)):
+                if v is not None and not isinstance(v, str):
+                    is_dict[i] = False
+        dict_columns = [i for i, flag in enumerate(is_dict) if flag]
+        headers[key] = (columns, dict_columns)
+        for item in value:
+            row = _row_values(item, columns)
+            for i in dict_columns:
+                if row[i] is not None:
+                    strings.index(row[i])
+
+    # Pass 2: stream the literal, one section per line
+    spans: Dict[str, Tuple[int, int]] = {}
+    out.write(f"const defaultRawData = {DICT_DECODER}({{\n".encode("utf-8"))
+    out.write(f"{DICT_STRINGS_KEY}:".encode("utf-8"))
+    start = out.tell()
+    out.write(("[" + ",".join(js_value(s) for s in strings.strings) + "]").encode("utf-8"))
+    spans[DICT_STRINGS_KEY] = (start, out.tell())
+    for key, value in items:
+        out.write(f",\n{key}:".encode("utf-8"))
+        start = out.tell()
+        if key in headers:
+            _write_packed_section(out, value, *headers[key], strings)
+        else:
+            out.write(js_value(value).encode("utf-8"))
+        spans[key] = (start, out.tell())
+    out.write(f"\n}});\n{DICT_SHIM}".encode("utf-8"))
+    return spans
+
+
+def _write_packed_section(out: BinaryIO, value: List[Any], columns: List[str], dict_columns: List[int],
+                          strings: Optional[SymbolTable]) -> None:
+    out.write(("{columns:[" + ",".join(js_value(c) for c in columns) + "],dict:["
+               + ",".join(map(str, dict_columns)) + "],rows:[").encode("utf-8"))
+    dict_set = set(dict_columns)
+    for n, item in enumerate(value):
+        row = _row_values(item, columns)
+        cells = (str(strings.index(v)) if i in dict_set and v is not None else js_value(v)
+                 for i, v in enumerate(row))
+        out.write(((",[" if n else "[") + ",".join(cells) + "]").encode("utf-8"))
+    out.write(b"]}")
+
+
+# ─── Columnar Layout ─────────────────────────────────────────────────────────
+# layout="columns" writes each record section as parallel arrays, one per field,
+# so numeric fields are flat number arrays:
+#
+#   const defaultRawData = decodeColumnarRawData({
+#   spendData:{publisher:['Adobe',...],companySpend:[13644684.7,...],...},
+#   ...
+#   });
+#   function decodeColumnarRawData(packed) { ... }
+#
+# The shim rebuilds the row objects the rest of the dashboard expects and keeps
+# each section's column arrays on its rows array as a non-enumerable `columns`
+# property, so aggregations (calculations.js) can sum a column directly. Code
+# that replaces a section array drops the columns with it, and Storage/JSON
+# never see them. Sections are independent, so they are still replaced one at
+# a time like the rows layout.
+
+COLUMNS_DECODER = "decodeColumnarRawData"
+
+COLUMNS_SHIM = (
+    "function decodeColumnarRawData(packed) {\n"
+    "    const out = {};\n"
+    "    for (const key of Object.keys(packed)) {\n"
+    "        const section = packed[key];\n"
+    "        if (!section || typeof section !== 'object' || Array.isArray(section)\n"
+    "                || !Object.values(section).every(Array.isArray)) { out[key] = section; continue; }\n"
+    "        const names = Object.keys(section), count = names.length ? section[names[0]].length : 0;\n"
+    "        const rows = new Array(count);\n"
+    "        for (let i = 0; i < count; i++) {\n"
+    "            const obj = {};\n"
+    "            for (const name of names) obj[name] = section[name][i];\n"
+    "            rows[i] = obj;\n"
+    "        }\n"
+    "        Object.defineProperty(rows, 'columns', { value: section });\n"
+    "        out[key] = rows;\n"
+    "    }\n"
+    "    return out;\n"
+    "}"
+)
+
+
+def _write_columns_section(out: BinaryIO, key: str, value: List[Any]) -> None:
+    columns = _section_columns(key, value)
+    out.write(b"{")
+    for n, name in enumerate(columns):
+        cells = ",".join(js_value(None if v is _MISSING else v) for v in (_field(item, name) for item in value))
+        out.write(f"{',' if n else ''}{_js_key(name)}:[{cells}]".encode("utf-8"))
+    out.write(b"}")
+
+
+def _write_columns_declaration(out: BinaryIO, data: Dict[str, Any]) -> Dict[str, Tuple[int, int]]:
+    spans: Dict[str, Tuple[int, int]] = {}
+    out.write(f"const defaultRawData = {COLUMNS_DECODER}({{".encode("utf-8"))
+    for n, (key, value) in enumerate(_declaration_items(data)):
+        out.write(f"{',' if n else ''}\n{key}:".encode("utf-8"))
+        start = out.tell()
+        write_section(out, key, value, "columns")
+        spans[key] = (start, out.tell())
+    out.write(f"\n}});\n{COLUMNS_SHIM}".encode("utf-8"))
+    return spans
+
+
+def decode_columns_section(value: Any) -> Any:
+    """Rebuild a list of record dicts from one columnar section."""
+    if not (isinstance(value, dict) and all(isinstance(v, list) for v in value.values())):
+        return value
+    names = list(value)
+    return [dict(zip(names, row)) for row in zip(*value.values())]
+
+
+def decode_dict_section(value: Any, strings: List[str]) -> Any:
+    """Rebuild a list of record dicts from one dictionary-encoded section."""
+    if not (isinstance(value, dict) and isinstance(value.get("rows"), list)):
+        return value
+    columns = value["columns"]
+    dict_columns = set(value.get("dict", []))
+    decoded = []
+    for row in value["rows"]:
+        decoded.append({name: strings[v] if i in dict_columns and v is not None else v
+                        for i, (name, v) in enumerate(zip(columns, row))})
+    return decoded
+
+
+@contextmanager
+def atomic_output(path: Path) -> Iterator[BinaryIO]:
+    """Yield a buffered handle on a temp file that atomically replaces `path` on success.
+
+    A crash mid-write leaves the original file untouched. The file keeps the
+    mode of the one it replaces; a new file gets 0o644 less the umask (mkstemp
+    would leave it readable by the owner only).
+    """
+    path = Path(path)
+    fd, tmp_name = tempfile.mkstemp(prefix=f".{path.name}.", suffix=".tmp", dir=path.parent)
+    try:
+        with os.fdopen(fd, "wb", buffering=WRITE_BUFFER_SIZE) as out:
+            yield out
+            out.flush()
+            os.fsync(out.fileno())
+        if path.exists():
+            shutil.copymode(path, tmp_name)
+        else:
+            os.chmod(tmp_name, NEW_FILE_MODE & ~_umask())
+        _replace(tmp_name, path)
+    except BaseException:
+        try:
+            os.unlink(tmp_name)
+        except OSError:
+            pass
+        raise
+
+
+def _umask() -> int:
+    # os.umask can only be read by setting it
+    mask = os.umask(0o022)
+    os.umask(mask)
+    return mask
+
+
+def _replace(src: str, dst: Path, attempts: int = 20) -> None:
+    # On Windows a reader holding data.js open makes os.replace fail with
+    # PermissionError; readers only keep it open briefly, so retry
+    for attempt in range(attempts):
+        try:
+            os.replace(src, dst)
+            return
+        except PermissionError:
+            if attempt == attempts - 1:
+                raise
+            time.sleep(0.05)
+
+
+# ─── Locking ─────────────────────────────────────────────────────────────────
+# Writers serialize on an advisory lock on a sibling lock file (data.js itself
+# is replaced on every write, so it cannot carry the lock). Readers never lock:
+# they see either the old or the new file, never a partial one.
+
+LOCK_TIMEOUT = 60.0
+LOCK_POLL_INTERVAL = 0.05
+
+if sys.platform == "win32":
+    import msvcrt
+
+    def _try_lock(fd: int) -> bool:
+        try:
+            msvcrt.locking(fd, msvcrt.LK_NBLCK, 1)
+            return True
+        except OSError:
+            return False
+
+    def _unlock(fd: int) -> None:
+        os.lseek(fd, 0, os.SEEK_SET)
+        msvcrt.locking(fd, msvcrt.LK_UNLCK, 1)
+else:
+    import fcntl
+
+    def _try_lock(fd: int) -> bool:
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            return True
+        except OSError:
+            return False
+
+    def _unlock(fd: int) -> None:
+        fcntl.flock(fd, fcntl.LOCK_UN)
+
+
+@contextmanager
+def file_lock(lock_path: Path, timeout: float = LOCK_TIMEOUT) -> Iterator[None]:
+    """Hold an exclusive advisory lock on `lock_path` (created if missing).
+
+    Raises DataJsLockTimeout if another process holds it for longer than `timeout` seconds.
+    """
+    fd = os.open(lock_path, os.O_RDWR | os.O_CREAT, 0o644)
+    try:
+        deadline = time.monotonic() + timeout
+        while not _try_lock(fd):
+            if time.monotonic() >= deadline:
+                raise DataJsLockTimeout(f"Timed out after {timeout:.0f}s waiting for {lock_path}")
+            time.sleep(LOCK_POLL_INTERVAL)
+        try:
+            yield
+        finally:
+            _unlock(fd)
+    finally:
+        os.close(fd)
+
+
+# ─── Section Index ───────────────────────────────────────────────────────────
+# Byte offsets of every top-level value in defaultRawData, built in one pass and
+# cached next to data.js keyed by file size, mtime and inode (every write renames
+# a new file into place, so a rewrite of the same size within one mtime tick is
+# still noticed). Reading or replacing a
+# section then touches only that section's bytes. The index also keeps the
+# content digest of each record section (see section_digest), filled in by
+# write() and on first use after data.js changed behind its back, and the spans
+# of the sections in the data.json sidecar written with it.
+
+INDEX_VERSION = 5
+
+
+@dataclass
+class SectionIndex:
+    """Byte spans of the defaultRawData declaration and its top-level values."""
+    size: int
+    mtime_ns: int
+    declaration: Tuple[int, int]  # 'const defaultRawData' .. past the closing '};'
+    sections: Dict[str, Tuple[int, int]] = field(default_factory=dict)
+    sha256: str = ""  # of the whole data.js file; matched against the data.json sidecar
+    layout: str = "rows"  # see LAYOUTS
+    digests: Dict[str, str] = field(default_factory=dict)  # record section → section_digest
+    sidecar: Dict[str, Tuple[int, int]] = field(default_factory=dict)  # section spans in data.json
+    sidecar_size: int = 0
+    inode: int = 0
+
+    def to_json(self) -> Dict[str, Any]:
+        return {
+            "version": INDEX_VERSION,
+            "size": self.size,
+            "mtime_ns": self.mtime_ns,
+            "declaration": list(self.declaration),
+            "sections": {k: list(v) for k, v in self.sections.items()},
+            "sha256": self.sha256,
+            "layout": self.layout,
+            "digests": self.digests,
+            "sidecar": {k: list(v) for k, v in self.sidecar.items()},
+            "sidecar_size": self.sidecar_size,
+            "inode": self.inode,
+        }
+
+    @classmethod
+    def from_json(cls, obj: Dict[str, Any]) -> "SectionIndex":
+        return cls(
+            size=obj["size"],
+            mtime_ns=obj["mtime_ns"],
+            declaration=tuple(obj["declaration"]),
+            sections={k: tuple(v) for k, v in obj["sections"].items()},
+            sha256=obj["sha256"],
+            layout=obj["layout"],
+            digests=dict(obj["digests"]),
+            sidecar={k: tuple(v) for k, v in obj["sidecar"].items()},
+            sidecar_size=obj["sidecar_size"],
+            inode=obj["inode"],
+        )
+
+    def data_keys(self) -> List[str]:
+        """defaultRawData keys, in file order (without layout bookkeeping such as the string table)."""
+        keys = sorted(self.sections, key=lambda k: self.sections[k][0])
+        if self.layout == "dict":
+            keys.remove(DICT_STRINGS_KEY)
+        return keys
+
+
+_DECODER_LAYOUTS = {DICT_DECODER: "dict", COLUMNS_DECODER: "columns"}
+_LAYOUT_SHIMS = {"dict": DICT_SHIM, "columns": COLUMNS_SHIM}
+
+
+def build_section_index(raw: bytes, size: int = 0, mtime_ns: int = 0) -> SectionIndex:
+    """Scan data.js bytes once and record the span of each top-level value."""
+    # latin-1 maps bytes 1:1 to code points, so string offsets are byte offsets
+    text = raw.decode("latin-1")
+    match = _DECLARATION_RE.search(text)
+    if not match:
+        raise DataJsError("Could not find 'const defaultRawData = {' in data.js")
+    parser = _Parser(text, match.end())
+    layout = "rows"
+    parser.skip()
+    call = _DECODER_CALL_RE.match(text, parser.pos)
+    if call and call.group(1) in _DECODER_LAYOUTS:
+        layout = _DECODER_LAYOUTS[call.group(1)]
+        parser.pos = call.end()
+    if parser.peek() != "{":
+        raise parser.error("defaultRawData is not an object literal")
+    parser.pos += 1
+    sections: Dict[str, Tuple[int, int]] = {}
+    while True:
+        if parser.peek() == "}":
+            parser.pos += 1
+            break
+        key = parser.key()
+        if parser.peek() != ":":
+            raise parser.error(f"Expected ':' after '{key}'")
+        parser.pos += 1
+        parser.skip()
+        start = parser.pos
+        parser.skip_value()
+        sections[key] = (start, parser.pos)
+        c = parser.peek()
+        if c == ",":
+            parser.pos += 1
+        elif c != "}":
+            raise parser.error("Expected ',' or '}'")
+    end = parser.pos
+    if layout == "dict" and DICT_STRINGS_KEY not in sections:
+        raise parser.error(f"{DICT_DECODER}() argument has no '{DICT_STRINGS_KEY}' table")
+    if layout != "rows":
+        call_end = _CALL_END_RE.match(text, end)
+        if not call_end:
+            raise parser.error(f"Expected ')' closing {call.group(1)}(")
+        end = call_end.end()
+    terminator = _TERMINATOR_RE.match(text, end)
+    if terminator:
+        end = terminator.end()
+    # The decode shim written after the declaration belongs to it
+    shim = _LAYOUT_SHIMS.get(layout)
+    if shim and text.startswith("\n" + shim, end):
+        end += 1 + len(shim)
+    return SectionIndex(size=size, mtime_ns=mtime_ns, declaration=(match.start(), end),
+                        sections=sections, sha256=hashlib.sha256(raw).hexdigest(), layout=layout)
+
+
+def _decode_texts(index: SectionIndex, texts: Dict[str, str]) -> Dict[str, Any]:
+    """Parse section sources read through `index`, decoding the dict and columns layouts."""
+    if index.layout == "columns":
+        return {key: decode_columns_section(parse_js_value(text)[0]) for key, text in texts.items()}
+    if index.layout != "dict":
+        return {key: parse_js_value(text)[0] for key, text in texts.items()}
+    texts = dict(texts)
+    strings_text = texts.pop(DICT_STRINGS_KEY, None)
+    values = {key: parse_js_value(text)[0] for key, text in texts.items()}
+    # The string table is only parsed when a requested section indexes into it
+    packed = any(isinstance(value, dict) and value.get("dict") for value in values.values())
+    strings = parse_js_value(strings_text)[0] if strings_text and packed else []
+    return {key: decode_dict_section(value, strings) for key, value in values.items()}
+
+
+class DataJsFile:
+    """data.js on disk with a cached section index for per-section reads and writes."""
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self.index_path = self.path.with_name(f".{self.path.name}.index.json")
+        self.json_path = self.path.with_suffix(".json")
+        self.lock_path = self.path.with_name(f".{self.path.name}.lock")
+        self._index: Optional[SectionIndex] = None
+        self._lock_depth = 0
+
+    # Index ------------------------------------------------------------------
+
+    @property
+    def index(self) -> SectionIndex:
+        with open(self.path, "rb") as f:
+            return self._index_for(f)
+
+    def _index_for(self, f: BinaryIO) -> SectionIndex:
+        """Index of the file behind the open handle `f`.
+
+        Readers take the index and the section bytes from the same handle, so a
+        writer replacing data.js in between cannot make them read the wrong span.
+        """
+        st = os.fstat(f.fileno())
+        cached = self._index or self._load_cached_index()
+        if cached and (cached.size, cached.mtime_ns, cached.inode) == (st.st_size, st.st_mtime_ns, st.st_ino):
+            self._index = cached
+            return cached
+        f.seek(0)
+        self._index = build_section_index(f.read(), st.st_size, st.st_mtime_ns)
+        self._index.inode = st.st_ino
+        self._save_index()
+        return self._index
+
+    def _load_cached_index(self) -> Optional[SectionIndex]:
+        try:
+            obj = json.loads(self.index_path.read_text(encoding="utf-8"))
+            if obj.get("version") != INDEX_VERSION:
+                return None
+            return SectionIndex.from_json(obj)
+        except (OSError, ValueError, KeyError, TypeError):
+            return None
+
+    def _save_index(self) -> None:
+        # Written to a temp file and renamed so concurrent readers never see a partial cache
+        tmp_path = self.index_path.with_name(f"{self.index_path.name}.{os.getpid()}.tmp")
+        try:
+            tmp_path.write_text(json.dumps(self._index.to_json()), encoding="utf-8")
+            os.replace(tmp_path, self.index_path)
+        except OSError:
+            pass  # the cache is an optimisation; a read-only checkout still works
+
+    # Reads ------------------------------------------------------------------
+
+    def section_keys(self) -> List[str]:
+        return self.index.data_keys()
+
+    @property
+    def layout(self) -> str:
+        return self.index.layout
+
+    def section_text(self, key: str) -> Optional[str]:
+        """Return the literal source of one top-level value, or None if absent.
+
+        For a dictionary-encoded file this is the encoded value."""
+        return self._read_texts([key])[1].get(key)
+
+    def fingerprint(self, keys: Iterable[str]) -> str:
+        """SHA-256 of the literal source of some sections (plus the string table in the dict layout).
+
+        Lets derived data (e.g. the Arrow tables cached by import_from_csv) be
+        checked against just the sections it came from, without parsing them.
+        """
+        keys = list(keys)
+        with open(self.path, "rb") as f:
+            index = self._index_for(f)
+            if index.layout == "dict":
+                keys.append(DICT_STRINGS_KEY)
+            digest = hashlib.sha256()
+            for key in keys:
+                start, end = index.sections.get(key, (0, 0))
+                f.seek(start)
+                digest.update(f"{key}:{end - start}\n".encode("utf-8"))
+                digest.update(f.read(end - start))
+        return digest.hexdigest()
+
+    def _read_texts(self, keys: Optional[Iterable[str]]) -> Tuple[SectionIndex, Dict[str, str]]:
+        """Literal source of the requested sections, read through one handle."""
+        with open(self.path, "rb") as f:
+            index = self._index_for(f)
+            wanted = index.data_keys() if keys is None else [k for k in keys if k in index.sections]
+            texts = {}
+            for key in wanted:
+                start, end = index.sections[key]
+                f.seek(start)
+                texts[key] = f.read(end - start).decode("utf-8")
+            if index.layout == "dict" and any(k != DICT_STRINGS_KEY for k in texts):
+                start, end = index.sections[DICT_STRINGS_KEY]
+                f.seek(start)
+                texts.setdefault(DICT_STRINGS_KEY, f.read(end - start).decode("utf-8"))
+        return index, texts
+
+    def read_section(self, key: str, default: Any = None) -> Any:
+        """Parse and return one top-level value of defaultRawData."""
+        return self.read_sections([key]).get(key, default)
+
+    def read_sections(self, keys: Optional[Iterable[str]] = None) -> Dict[str, Any]:
+        """Parse the requested top-level values (all of them by default).
+
+        Dictionary-encoded sections are decoded, so callers see the same values
+        whatever layout data.js was written in."""
+        keys = None if keys is None else list(keys)
+        index, texts = self._read_texts(keys)
+        return _decode_texts(index, texts)
+
+    def read_records(self, keys: Optional[Iterable[str]] = None) -> Dict[str, Any]:
+        """Like read_sections, with array sections converted to record types."""
+        return {key: to_records(key, value) for key, value in self.read_sections(keys).items()}
+
+    def digest(self, key: str) -> Optional[str]:
+        """section_digest of a record section of data.js (None if absent).
+
+        Taken from the section index; computed from the parsed section only
+        when the index was rebuilt since the last write."""
+        index = self.index
+        if key not in index.sections:
+            return None
+        digest = index.digests.get(key)
+        if digest is None:
+            index, texts = self._read_texts([key])
+            if key not in texts:
+                return None
+            digest = index.digests[key] = section_digest(key, _decode_texts(index, texts)[key])
+            if index is self._index:
+                self._save_index()
+        return digest
+
+    def read_sidecar(self) -> Optional[Dict[str, Any]]:
+        """Return defaultRawData from the data.json sidecar, or None if it is
+        missing or its hash does not match the current data.js."""
+        try:
+            with open(self.json_path, encoding="utf-8") as f:
+                sidecar = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if not isinstance(sidecar, dict) or sidecar.get("dataJsSha256") != self.index.sha256:
+            return None
+        return sidecar.get("data")
+
+    def _sidecar_spans(self, index: SectionIndex) -> Dict[str, Tuple[int, int]]:
+        """Section spans of data.json when it is the sidecar written with the
+        data.js behind `index`, else {}. Only the file header is read."""
+        if not index.sidecar:
+            return {}
+        try:
+            with open(self.json_path, "rb") as f:
+                if os.fstat(f.fileno()).st_size != index.sidecar_size:
+                    return {}
+                match = _SIDECAR_HASH_RE.match(f.read(SIDECAR_HEADER_SIZE))
+        except OSError:
+            return {}
+        return index.sidecar if match and match.group(1).decode("ascii") == index.sha256 else {}
+
+    def _current_values(self, keys: Iterable[str]) -> Dict[str, Any]:
+        """Current values of some sections: from their data.json spans when the
+        sidecar is current, parsed from data.js otherwise."""
+        index = self.index
+        keys = [key for key in keys if key in index.sections]
+        spans = self._sidecar_spans(index)
+        if not keys or not all(key in spans for key in keys):
+            return self.read_sections(keys)
+        values = {}
+        with open(self.json_path, "rb") as f:
+            for key in keys:
+                start, end = spans[key]
+                f.seek(start)
+                values[key] = json.loads(f.read(end - start))
+        return values
+
+    def read_all(self) -> Dict[str, Any]:
+        """Return every section, from the sidecar when it is current, else by parsing data.js."""
+        data = self.read_sidecar()
+        if data is None:
+            data = self.read_sections()
+        return data
+
+    # Writes -----------------------------------------------------------------
+
+    def _plan(self, data: Dict[str, Any], dirty: Optional[Iterable[str]],
+              layout: str) -> Tuple[Set[str], Dict[str, Any], Dict[str, str], bool]:
+        """Resolve the sections the new file will hold.
+
+        Sections listed in `dirty` (all of `data` by default) take their value
+        from `data`; every other section keeps its current value and is only
+        loaded (from data.json when current, else parsed from data.js) when it
+        has to be: when the whole declaration is regenerated. Only the dirty
+        record sections are hashed: datasetHash combines their digests with the
+        stored ones of the others, and is kept as is when no CONTENT_SECTIONS
+        section is dirty. summary is recomputed from the dirty sections'
+        aggregates and the stored ones of the others.
+
+        Returns (dirty keys, values, digests, regenerate). regenerate is True
+        when the whole declaration has to be written again: the set of sections
+        or the layout changes, or an imported section changes in the "dict"
+        layout (its shared string table is rebuilt); values then holds every
+        section.
+        """
+        index = self.index
+        present = set(index.data_keys())
+        dirty_keys = (set(data) if dirty is None else set(dirty)) & set(data)
+        dirty_keys.update(key for key in data if key in SECTION_ORDER and key not in present)
+        values = {key: data[key] for key in SECTION_ORDER if key in dirty_keys}
+        if "datasetVersion" not in present and "datasetVersion" not in values:
+            values["datasetVersion"] = default_dataset_version()
+            dirty_keys.add("datasetVersion")
+        digests = {key: digest for key, digest in index.digests.items() if key not in dirty_keys}
+        digests.update((key, section_digest(key, values[key])) for key in SECTION_RECORD_TYPES if key in values)
+        current_hash = self.read_section("datasetHash") if "datasetHash" in present else None
+        if current_hash and not any(key in dirty_keys for key in CONTENT_SECTIONS):
+            values["datasetHash"] = current_hash
+        else:
+            digests.update((key, self.digest(key)) for key in CONTENT_SECTIONS if key in present and key not in digests)
+            values["datasetHash"] = combine_digests(digests)
+        # Only the aggregates of dirty sections are recomputed; the rest come from the stored summary
+        stored_summary = self.read_section("summary") if "summary" in present else None
+        needed = stale_sections(stored_summary, dirty_keys) + ["datasetVersion"]
+        values.update(self._current_values(key for key in needed if key not in values))
+        values["summary"] = compute_summary(values, stored_summary, dirty_keys)
+        dirty_keys.update(("datasetHash", "summary"))
+        keys = present | set(values)
+        regenerate = (index.layout != layout or keys != present
+                      or (layout == "dict" and any(key in dirty_keys for key in CONTENT_SECTIONS)))
+        if regenerate:
+            values.update(self._current_values(key for key in keys if key not in values))
+        return dirty_keys, values, digests, regenerate
+
+    def _emit(self, out: BinaryIO, values: Dict[str, Any], dirty_keys: Optional[Set[str]],
+              layout: str) -> Tuple[Tuple[int, int], Dict[str, Tuple[int, int]]]:
+        """Stream the new file to `out`. Returns the new declaration and section spans.
+
+        Sections not in `dirty_keys` are copied byte-for-byte from the current
+        file; with dirty_keys None the whole declaration is regenerated.
+        """
+        with open(self.path, "rb") as src:
+            index = self._index_for(src)
+            if dirty_keys is not None:
+                sections: Dict[str, Tuple[int, int]] = {}
+                pos = 0
+                for key, (start, end) in sorted(index.sections.items(), key=lambda item: item[1][0]):
+                    _copy_range(src, out, pos, start)
+                    new_start = out.tell()
+                    if key in dirty_keys:
+                        write_section(out, key, values[key], layout)
+                    else:
+                        _copy_range(src, out, start, end)
+                    sections[key] = (new_start, out.tell())
+                    pos = end
+                _copy_range(src, out, pos, index.declaration[1])
+                declaration = (index.declaration[0], out.tell())
+            else:
+                _copy_range(src, out, 0, index.declaration[0])
+                decl_start = out.tell()
+                sections = write_declaration(out, values, layout)
+                declaration = (decl_start, out.tell())
+            _copy_range(src, out, index.declaration[1], None)
+        return declaration, sections
+
+    @contextmanager
+    def locked(self, timeout: float = LOCK_TIMEOUT) -> Iterator[None]:
+        """Hold the writer lock for data.js. Re-entrant within this object."""
+        if self._lock_depth:
+            self._lock_depth += 1
+            try:
+                yield
+            finally:
+                self._lock_depth -= 1
+            return
+        with file_lock(self.lock_path, timeout):
+            self._lock_depth = 1
+            try:
+                yield
+            finally:
+                self._lock_depth = 0
+
+    def current_hash(self) -> str:
+        """Version token for compare-and-swap: the SHA-256 of the whole file.
+
+        Not datasetHash, which leaves out externalKpis and the labels, so two
+        KPI syncs (or a KPI sync and a merge import) would not see each other."""
+        return self.index.sha256
+
+    def write(self, data: Dict[str, Any], dirty: Optional[Iterable[str]] = None,
+              expected_hash: Optional[str] = None, layout: Optional[str] = None) -> bool:
+        """Stream the updated data.js to a temp file and atomically rename it into
+        place, then write the matching data.json sidecar.
+
+        Runs under the writer lock. With `expected_hash` (a current_hash() taken
+        when the caller read its inputs) the write is a compare-and-swap: it
+        raises DataJsConflict if another writer got in first.
+
+        `layout` selects the declaration layout (see LAYOUTS); by default the
+        file keeps the layout it has.
+
+        Returns False without touching either file when the content hash of the
+        result equals the datasetHash already in data.js, externalKpis is
+        unchanged too, the layout is unchanged and the stored summary already
+        matches.
+        """
+        with self.locked():
+            if expected_hash is not None and self.current_hash() != expected_hash:
+                raise DataJsConflict(f"{self.path} changed since it was read "
+                                     f"(expected {expected_hash}, found {self.current_hash()})")
+            current = self.index
+            current_layout = current.layout
+            layout = layout or current_layout
+            dirty_keys, values, digests, regenerate = self._plan(data, dirty, layout)
+            # The stored summary is only parsed when the rest already matches (it grows with the publishers)
+            if (values["datasetHash"] == self.read_section("datasetHash") and layout == current_layout
+                    and all(digest == self.digest(key) for key, digest in digests.items()
+                            if key not in CONTENT_SECTIONS)
+                    and same_aggregates(values["summary"], self.read_section("summary"))):
+                return False
+            # Clean sections are copied from the old data.json. Without a current one, the small ones
+            # are loaded now, while the index still describes the old data.js; if that would mean
+            # parsing imported sections, data.json is left stale until the next import
+            reuse = {key: span for key, span in self._sidecar_spans(current).items() if key not in dirty_keys}
+            missing = [key for key in current.data_keys() if key not in values and key not in reuse]
+            write_json = not any(key in CONTENT_SECTIONS for key in missing)
+            if write_json:
+                values.update(self._current_values(missing))
+            with atomic_output(self.path) as handle:
+                out = _HashingWriter(handle)
+                declaration, sections = self._emit(out, values, None if regenerate else dirty_keys, layout)
+            st = os.stat(self.path)
+            index = SectionIndex(st.st_size, st.st_mtime_ns, declaration, sections, out.hexdigest(), layout, digests,
+                                 inode=st.st_ino)
+            if write_json:
+                index.sidecar, index.sidecar_size = write_sidecar(self.json_path, index.data_keys(), values,
+                                                                  index.sha256, reuse)
+            self._index = index
+            self._save_index()
+            return True
+
+    def transact(self, update: Callable[[Dict[str, Any]], Tuple[Dict[str, Any], Set[str]]],
+                 keys: Optional[Iterable[str]] = None, retries: int = 5,
+                 layout: Optional[str] = None) -> bool:
+        """Optimistic read-modify-write.
+
+        Reads the sections in `keys` (all by default) as records, passes them
+        to `update`, which returns (data, dirty), and writes the result with a
+        compare-and-swap. On conflict the read and `update` are repeated, so a
+        concurrent writer's changes are never overwritten with stale values.
+        The lock is held only for the write itself.
+        """
+        keys = None if keys is None else list(keys)
+        for attempt in range(retries):
+            base = self.current_hash()
+            data, dirty = update(self.read_records(keys))
+            try:
+                return self.write(data, dirty, expected_hash=base, layout=layout)
+            except DataJsConflict:
+                if attempt == retries - 1:
+                    raise
+                time.sleep(LOCK_POLL_INTERVAL * (attempt + 1))
+        return False
+
+    def preview(self, data: Dict[str, Any], dirty: Optional[Iterable[str]] = None,
+                limit: int = 2000, layout: Optional[str] = None) -> Tuple[str, int]:
+        """Render to a scratch file and return the first `limit` characters of the
+        new declaration plus the number of bytes that follow it. data.js is untouched."""
+        with self.locked(), tempfile.TemporaryFile() as out:
+            layout = layout or self.index.layout
+            dirty_keys, values, _, regenerate = self._plan(data, dirty, layout)
+            declaration, _ = self._emit(out, values, None if regenerate else dirty_keys, layout)
+            out.seek(declaration[0])
+            head = out.read(limit * 4).decode("utf-8", errors="ignore")[:limit]
+            remaining = out.seek(0, os.SEEK_END) - declaration[0] - len(head.encode("utf-8"))
+        return head, max(remaining, 0)
+
+    def update_external_kpis(self, updates: Dict[str, Tuple[Any, str]]) -> bool:
+        """Set (value, lastUpdated) for several externalKpis entries by name.
+
+        Only the externalKpis section is read and parsed; every matching entry
+        is patched whatever its unit and source. The write re-serializes just
+        that section and copies every other byte of data.js and data.json:
+        externalKpis is not part of datasetHash or the summary, so neither is
+        recomputed, and in the dict layout the section is replaced without
+        rebuilding the string table. The write is a compare-and-swap that is
+        retried if another writer got in first. Raises DataJsError naming any
+        KPI that is not present. Returns False when the patched values were
+        already current (see write).
+        """
+        def patch(current: Dict[str, Any]) -> Tuple[Dict[str, Any], Set[str]]:
+            kpis = current.get("externalKpis")
+            if kpis is None:
+                raise DataJsError("defaultRawData has no 'externalKpis' section")
+            pending = dict(updates)
+            for kpi in kpis:
+                if kpi.name in pending:
+                    kpi.value, kpi.lastUpdated = pending.pop(kpi.name)
+            if pending:
+                raise DataJsError(f"Could not find KPI(s) in data.js: {', '.join(pending)}")
+            return {"externalKpis": kpis}, {"externalKpis"}
+
+        return self.transact(patch, ["externalKpis"])
+
+
+class _HashingWriter:
+    """Binary writer wrapper that hashes everything written through it."""
+
+    def __init__(self, raw: BinaryIO):
+        self.raw = raw
+        self._digest = hashlib.sha256()
+
+    def write(self, chunk: bytes) -> int:
+        self._digest.update(chunk)
+        return self.raw.write(chunk)
+
+    def tell(self) -> int:
+        return self.raw.tell()
+
+    def hexdigest(self) -> str:
+        return self._digest.hexdigest()
+
+
+def _copy_range(src: BinaryIO, out: BinaryIO, start: int, end: Optional[int]) -> None:
+    """Copy src[start:end] (to EOF when end is None) to out in fixed-size chunks."""
+    src.seek(start)
+    remaining = None if end is None else end - start
+    while remaining is None or remaining > 0:
+        size = COPY_CHUNK_SIZE if remaining is None else min(COPY_CHUNK_SIZE, remaining)
+        chunk = src.read(size)
+        if not chunk:
+            break
+        out.write(chunk)
+        if remaining is not None:
+            remaining -= len(chunk)
+
+
+# ─── JSON Sidecar ────────────────────────────────────────────────────────────
+# data.json holds the same content as defaultRawData in canonical JSON, plus the
+# SHA-256 of the data.js it was written with. Readers use it directly and fall
+# back to parsing data.js only when the hash no longer matches. Writers copy the
+# clean sections' bytes from the old data.json (their spans are in the section
+# index) and load clean values from it when they need them.
+
+DATASET_HASH_LENGTH = 16
+
+# write_sidecar puts the data.js hash first, so checking it reads only this much
+SIDECAR_HEADER_SIZE = 128
+_SIDECAR_HASH_RE = re.compile(rb'\{\s*"dataJsSha256":\s*"([0-9a-f]{64})"')
+
+
+def _canonical_value(val: Any) -> Any:
+    # Same number normalisation as js_value, so 0.0 and 0 hash and diff alike
+    if isinstance(val, float) and val == int(val) and abs(val) < 1e15:
+        return int(val)
+    return val
+
+
+def _canonical_record(obj: Any, key_order: List[str]) -> Any:
+    if isinstance(obj, Record):
+        canonical = {key: _canonical_value(val) for key, val in zip(obj.FIELDS, obj.values())}
+        canonical.update((key, _canonical_value(val)) for key, val in obj.extra.items())
+        return canonical
+    if not isinstance(obj, dict):
+        return _canonical_value(obj)
+    ordered = {key: _canonical_value(obj[key]) for key in key_order if key in obj}
+    ordered.update((key, _canonical_value(value)) for key, value in obj.items() if key not in ordered)
+    return ordered
+
+
+def section_digest(key: str, value: Any) -> str:
+    """SHA-256 of one record section (a missing section counts as empty).
+
+    Records are normalised to their record type (field order, defaults for
+    missing fields, 0.0 == 0) and hashed as canonical JSON, so the same rows
+    give the same digest whether they come from an importer, data.js or data.json.
+    """
+    value = to_records(key, value or [])
+    key_order = SECTION_KEY_ORDER.get(key, [])
+    digest = hashlib.sha256(f"{key}:{len(value)}\n".encode("utf-8"))
+    for item in value:
+        digest.update(json.dumps(_canonical_record(item, key_order), ensure_ascii=False,
+                                 separators=(",", ":")).encode("utf-8"))
+        digest.update(b"\n")
+    return digest.hexdigest()
+
+
+def combine_digests(digests: Dict[str, str]) -> str:
+    """datasetHash from the section digests of CONTENT_SECTIONS (others are ignored)."""
+    combined = hashlib.sha256()
+    for key in CONTENT_SECTIONS:
+        combined.update(f"{key}:{digests.get(key) or section_digest(key, None)}\n".encode("utf-8"))
+    return combined.hexdigest()[:DATASET_HASH_LENGTH]
+
+
+def dataset_hash(data: Dict[str, Any]) -> str:
+    """Content hash of the record sections of `data` (CONTENT_SECTIONS).
+
+    datasetVersion is not part of the hash: importing identical data twice on
+    different days yields the same datasetHash.
+    """
+    return combine_digests({key: section_digest(key, data.get(key)) for key in CONTENT_SECTIONS})
+
+
+def write_sidecar(json_path: Path, keys: Iterable[str], data: Dict[str, Any], data_js_sha256: str,
+                  reuse: Optional[Dict[str, Tuple[int, int]]] = None) -> Tuple[Dict[str, Tuple[int, int]], int]:
+    """Atomically write data.json, one record per line so diffs stay readable.
+
+    Sections with a span in `reuse` are copied byte for byte from the current
+    data.json; the others are serialized from `data`. Returns the span of
+    each section in the new file and its size.
+    """
+    def dumps(value: Any) -> bytes:
+        return json.dumps(value, ensure_ascii=False).encode("utf-8")
+
+    reuse = reuse or {}
+    spans: Dict[str, Tuple[int, int]] = {}
+    with atomic_output(json_path) as out, (open(json_path, "rb") if reuse else io.BytesIO()) as old:
+        out.write(b'{\n  "dataJsSha256": ' + dumps(data_js_sha256) + b',\n  "data": {')
+        for n, key in enumerate(keys):
+            out.write((b",\n" if n else b"\n") + b"    " + dumps(key) + b": ")
+            start = out.tell()
+            if key in reuse:
+                _copy_range(old, out, *reuse[key])
+            elif isinstance(data[key], list):
+                key_order = SECTION_KEY_ORDER.get(key, [])
+                out.write(b"[")
+                for i, item in enumerate(data[key]):
+                    out.write((b",\n" if i else b"\n") + b"      " + dumps(_canonical_record(item, key_order)))
+                out.write(b"\n    ]" if data[key] else b"]")
+            else:
+                out.write(dumps(_canonical_value(data[key])))
+            spans[key] = (start, out.tell())
+        out.write(b"\n  }\n}\n")
+        size = out.tell()
+    return spans, size
+
+
+def load_data_js(data_js_path: Path) -> Dict[str, Any]:
+    """Return every section of defaultRawData, preferring a current data.json sidecar."""
+    return DataJsFile(data_js_path).read_all()
@@ -14,11 +14,14 @@ Usage:
   python deploy_monthly.py --workspace scm-dev      # Specify workspace (default: scm-dev)
   python deploy_monthly.py --skip-refresh           # Deploy without refresh
   python deploy_monthly.py --dry-run                # Write report files locally only
+  python deploy_monthly.py --force-data             # Reload data even if data.js is unchanged
 """
 
 import argparse, json, logging, os, subprocess, sys, time
 from pathlib import Path
 
+from data_js import DataJsError, DataJsFile
+
 LOG_FILE = Path(__file__).parent / "deploy_monthly.log"
 logging.basicConfig(
     level=logging.INFO,
@@ -31,6 +34,8 @@ logging.basicConfig(
 log = logging.getLogger(__name__)
 
 MODEL_NAME = "SLS MBR"
+DATA_JS = Path(__file__).parent / "data.js"
+LAKEHOUSE_STATE = Path(__file__).parent / "lakehouse_data" / "state.json"
 AZ_CMD = r"C:\Program Files\Microsoft SDKs\Azure\CLI2\wbin\az.cmd"
 if not os.path.exists(AZ_CMD):
     AZ_CMD = "az"
@@ -105,6 +110,18 @@ def trigger_refresh(pbi_token, ws_id, ds_id):
     return False
 
 
+def data_already_loaded(workspace):
+    """True if data.js has the same datasetHash and externalKpis as the last successful lakehouse load."""
+    try:
+        data_file = DataJsFile(DATA_JS)
+        loaded = {"datasetHash": data_file.read_section("datasetHash"),
+                  "externalKpis": data_file.digest("externalKpis")}
+        state = json.loads(LAKEHOUSE_STATE.read_text(encoding="utf-8"))
+    except (OSError, ValueError, DataJsError):
+        return False
+    return bool(loaded["datasetHash"]) and state.get("loaded", {}).get(workspace.lower()) == loaded
+
+
 def run_script(script_name, extra_args=None):
     """Run a Python script as a subprocess."""
     cmd = [sys.executable, str(Path(__file__).parent / script_name)]
@@ -125,6 +142,7 @@ def main():
     parser.add_argument("--report-only", action="store_true", help="Only redeploy report + refresh")
     parser.add_argument("--skip-refresh", action="store_true", help="Skip the final refresh")
     parser.add_argument("--dry-run", action="store_true", help="Write report files locally only")
+    parser.add_argument("--force-data", action="store_true", help="Reload data even if data.js is unchanged")
     args = parser.parse_args()
 
     log.info("=" * 60)
@@ -147,11 +165,16 @@ def main():
         sys.exit(1)
 
     # Step 1: Load data to lakehouse
-    if not args.report_only and not args.dry_run:
+    if not args.report_only and not args.dry_run and not args.force_data and data_already_loaded(args.workspace):
+        log.info("STEP 1: Skipped (data.js unchanged since last lakehouse load, use --force-data to reload)")
+    elif not args.report_only and not args.dry_run:
         log.info("")
         log.info("STEP 1: Export data and load to Lakehouse")
         log.info("-" * 40)
-        run_script("load_data_to_lakehouse.py", ["--workspace", args.workspace])
+        load_args = ["--workspace", args.workspace]
+        if args.force_data:
+            load_args.append("--force")
+        run_script("load_data_to_lakehouse.py", load_args)
     else:
         log.info("STEP 1: Skipped (--report-only or --dry-run)")
 
@@ -4,55 +4,100 @@ Import SLS MBR data from the flat CSV into data.js.
 
 The CSV has one row per publisher with all data (publisher info, spend, risks)
 in a single flat table. This script parses it and maps to the data.js structure.
+
+The file is read once and streamed row by row; the encoding (UTF-8 with or
+without BOM, UTF-16, or cp1252 from Windows Excel) is detected from the BOM or
+a leading byte sample. With --jobs N the file is split into record-aligned
+byte ranges that are parsed in N worker processes. When pyarrow is installed
+(and --jobs is not given) the CSV is read with pyarrow.csv and cleaned with
+column kernels instead; the resulting tables are cached for
+load_data_to_lakehouse (see arrow_tables.py).
+
+With --dir DIR every CSV in DIR (one export per month) is imported into one
+history, re-parsing only files not seen before (see batch_import.py). With
+--incremental only the rows added or changed since the previous incremental
+import are parsed; unchanged rows reuse their records from data.js (see
+row_manifest.py).
 """
 
+import codecs
 import csv
+import io
+import mmap
+import os
 import re
 import sys
-from datetime import date, datetime
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from datetime import date
 from pathlib import Path
-from typing import Any, Dict, List, Optional
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
 
+from arrow_tables import TABLE_SECTIONS, records_table, save_cached_tables
+from batch_import import ParseCache, build_history, list_import_files, parse_cache_dir, parser_key
+from data_js import LAYOUTS, DataJsError, DataJsFile
+from records import ExternalKpi, ManagedTitle, Publisher, RiskRecord, SpendRecord, to_records
+from row_manifest import RowManifest, manifest_path, row_fingerprint
+from symbols import INTERNED_FIELDS, SymbolTable
+from value_parsers import parse_currency, parse_currency_array, parse_date, parse_date_array, strip_array
 
-def parse_currency(val: str) -> float:
-    """Parse a currency string like '$13,644,684.70' to float."""
-    if not val or not val.strip():
-        return 0
-    s = val.strip().replace('$', '').replace(',', '').replace(' ', '')
-    if s == '-' or s == '$-':
-        return 0
-    try:
-        return float(s)
-    except ValueError:
-        return 0
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    import pyarrow.csv as pa_csv
+except ImportError:
+    pa = pc = pa_csv = None
 
 
-def parse_date(val: str) -> str:
-    """Parse various date formats to YYYY-MM-DD. Return '' if not a valid date."""
-    if not val or not val.strip():
-        return ''
-    s = val.strip()
-    
-    # Handle dates with extra text (e.g., "10/24/2026 but it is up for debate...")
-    # Take just the date part
-    date_match = re.match(r'(\d{1,2}/\d{1,2}/\d{4})', s)
-    if date_match:
-        s = date_match.group(1)
-    else:
-        # Try YYYY-MM-DD format
-        date_match2 = re.match(r'(\d{4}-\d{2}-\d{2})', s)
-        if date_match2:
-            return date_match2.group(1)
-        return ''
-    
-    # Parse M/D/YYYY
+# Bytes sampled to detect the encoding when the file has no BOM
+ENCODING_SAMPLE_SIZE = 64 * 1024
+
+_BOMS = [
+    (codecs.BOM_UTF8, 'utf-8-sig'),
+    (codecs.BOM_UTF16_LE, 'utf-16'),
+    (codecs.BOM_UTF16_BE, 'utf-16'),
+]
+
+
+def _cp1252_fallback(err: UnicodeDecodeError) -> Tuple[str, int]:
+    """Decode bytes that are invalid in the detected encoding as cp1252 (latin-1 for its 5 unused bytes)."""
+    chunk = err.object[err.start:err.end]
+    return ''.join(bytes([b]).decode('cp1252', errors='ignore') or chr(b) for b in chunk), err.end
+
+
+codecs.register_error('cp1252fallback', _cp1252_fallback)
+
+
+def detect_encoding(sample: bytes) -> str:
+    """Pick the CSV encoding from the BOM, else from whether the sample is valid UTF-8."""
+    for bom, encoding in _BOMS:
+        if sample.startswith(bom):
+            return encoding
     try:
-        dt = datetime.strptime(s, '%m/%d/%Y')
-        return dt.strftime('%Y-%m-%d')
-    except ValueError:
-        pass
-    
-    return ''
+        # Incremental so a multi-byte character cut off at the end of the sample is not an error
+        codecs.getincrementaldecoder('utf-8')().decode(sample, final=False)
+        return 'utf-8'
+    except UnicodeDecodeError:
+        return 'cp1252'
+
+
+@contextmanager
+def open_csv(csv_path: Path) -> Iterator[Tuple[str, csv.DictReader]]:
+    """
+    Open a CSV export and yield (encoding, DictReader) for streaming its rows.
+
+    The file is read once: the encoding sample is peeked from the read buffer,
+    and rows are decoded as the reader advances, so memory does not grow with
+    the file. Bytes past the sample that do not fit the detected encoding (a
+    cp1252 character in an otherwise UTF-8 export) are decoded as cp1252
+    instead of failing the import.
+    """
+    with open(csv_path, 'rb', buffering=ENCODING_SAMPLE_SIZE) as f:
+        encoding = detect_encoding(f.peek(ENCODING_SAMPLE_SIZE)[:ENCODING_SAMPLE_SIZE])
+        text = io.TextIOWrapper(f, encoding=encoding, errors='cp1252fallback', newline='')
+        yield encoding, csv.DictReader(text)
 
 
 def map_status(invoice_status: str) -> str:
@@ -79,7 +124,7 @@ def clean_title(title: str) -> str:
     return s.strip()
 
 
-def split_titles(title: str, publisher: str) -> List[Dict]:
+def split_titles(title: str, publisher: str) -> List[ManagedTitle]:
     """Split a compound title into individual managed title entries."""
     if not title:
         return []
@@ -91,14 +136,14 @@ def split_titles(title: str, publisher: str) -> List[Dict]:
         for p in parts:
             p = p.strip().strip('–').strip()
             if p:
-                titles.append({'title': p, 'publisher': publisher, 'category': 'Other', 'licenseCount': 0, 'notes': 'active'})
+                titles.append(ManagedTitle(p, publisher, 'Other', 0, 'active'))
     elif '\n' in title:
         # Multi-line titles
         parts = title.split('\n')
         for p in parts:
             p = p.strip().strip('–').strip()
             if p:
-                titles.append({'title': p, 'publisher': publisher, 'category': 'Other', 'licenseCount': 0, 'notes': 'active'})
+                titles.append(ManagedTitle(p, publisher, 'Other', 0, 'active'))
     else:
         # Check for known multi-title patterns like "Camtasia & Snagit"
         if ' & ' in title:
@@ -106,225 +151,75 @@ def split_titles(title: str, publisher: str) -> List[Dict]:
             for p in parts:
                 p = p.strip()
                 if p:
-                    titles.append({'title': p, 'publisher': publisher, 'category': 'Other', 'licenseCount': 0, 'notes': 'active'})
+                    titles.append(ManagedTitle(p, publisher, 'Other', 0, 'active'))
         else:
-            titles.append({'title': title.strip(), 'publisher': publisher, 'category': 'Other', 'licenseCount': 0, 'notes': 'active'})
+            titles.append(ManagedTitle(title.strip(), publisher, 'Other', 0, 'active'))
     
     return titles
 
 
-def js_value(val: Any) -> str:
-    """Serialize a Python value to JavaScript literal syntax."""
-    if val is None:
-        return 'null'
-    if isinstance(val, bool):
-        return 'true' if val else 'false'
-    if isinstance(val, (int, float)):
-        if isinstance(val, float) and val == int(val) and abs(val) < 1e15:
-            return str(int(val))
-        return str(val)
-    s = str(val).replace('\\', '\\\\').replace("'", "\\'").replace('\n', '\\n')
-    return f"'{s}'"
-
-
-def js_object_oneline(obj: Dict[str, Any], key_order: List[str]) -> str:
-    """Serialize a dict as a one-line JS object literal."""
-    parts = []
-    for key in key_order:
-        if key in obj:
-            parts.append(f'{key}: {js_value(obj[key])}')
-    for key in obj:
-        if key not in key_order:
-            parts.append(f'{key}: {js_value(obj[key])}')
-    return '{ ' + ', '.join(parts) + ' }'
-
-
-def generate_js_data(data: Dict[str, Any]) -> str:
-    """Generate the full defaultRawData JavaScript declaration."""
-    lines = ['const defaultRawData = {']
-
-    if 'publishers' in data:
-        key_order = ['id', 'name', 'title', 'type', 'contact', 'renewalDate', 'status', 'savingsAmount', 'savingsType']
-        lines.append('    publishers: [')
-        for pub in data['publishers']:
-            lines.append(f'        {js_object_oneline(pub, key_order)},')
-        lines.append('    ],')
-
-    if 'spendData' in data:
-        key_order = ['publisher', 'companySpend', 'msdSpend', 'tiamSpend', 'fiscalYear', 'notes']
-        lines.append('    spendData: [')
-        for s in data['spendData']:
-            lines.append(f'        {js_object_oneline(s, key_order)},')
-        lines.append('    ],')
-
-    if 'riskData' in data:
-        key_order = ['publisher', 'sspa', 'po', 'finance', 'legal', 'inventory', 'details']
-        lines.append('    riskData: [')
-        for r in data['riskData']:
-            lines.append(f'        {js_object_oneline(r, key_order)},')
-        lines.append('    ],')
-
-    if 'managedTitles' in data:
-        key_order = ['title', 'publisher', 'category', 'licenseCount', 'notes']
-        lines.append('    managedTitles: [')
-        for t in data['managedTitles']:
-            lines.append(f'        {js_object_oneline(t, key_order)},')
-        lines.append('    ],')
-
-    version = data.get('datasetVersion', f"FY26_CSV_IMPORT_{date.today().isoformat()}")
-    lines.append(f"    datasetVersion: {js_value(version)},")
-
-    if 'externalKpis' in data:
-        key_order = ['name', 'value', 'unit', 'source', 'lastUpdated', 'notes']
-        lines.append('    externalKpis: [')
-        for k in data['externalKpis']:
-            lines.append(f'        {js_object_oneline(k, key_order)},')
-        lines.append('    ]')
-
-    lines.append('};')
-    return '\n'.join(lines)
-
-
-def update_data_js(data_js_path: Path, new_data: Dict[str, Any]) -> str:
-    """Replace the defaultRawData object in data.js."""
-    content = data_js_path.read_text(encoding='utf-8')
-
-    pattern = re.compile(r'(//[^\n]*\n)*\s*const\s+defaultRawData\s*=\s*\{', re.MULTILINE)
-    match = pattern.search(content)
-    if not match:
-        raise RuntimeError("Could not find 'const defaultRawData = {' in data.js")
-
-    start = match.start()
-
-    # Find matching closing };
-    brace_count = 0
-    end = -1
-    in_string = False
-    string_char = None
-    i = match.end() - 1
-
-    for idx in range(i, len(content)):
-        c = content[idx]
-        if in_string:
-            if c == '\\' and idx + 1 < len(content):
-                continue
-            if c == string_char and (idx == 0 or content[idx - 1] != '\\'):
-                in_string = False
-            continue
-        if c in ("'", '"', '`'):
-            in_string = True
-            string_char = c
-            continue
-        if c == '{':
-            brace_count += 1
-        elif c == '}':
-            brace_count -= 1
-            if brace_count == 0:
-                rest = content[idx + 1:idx + 5]
-                semi = rest.find(';')
-                end = idx + 1 + semi + 1 if semi >= 0 else idx + 2
-                break
-
-    if end == -1:
-        raise RuntimeError("Could not find end of defaultRawData")
-
-    # Preserve leading comments
-    leading = content[:start]
-    comment_lines = []
-    pre_lines = leading.rstrip().split('\n')
-    for line in reversed(pre_lines):
-        stripped = line.strip()
-        if stripped.startswith('//'):
-            comment_lines.insert(0, line)
-        elif stripped == '':
-            comment_lines.insert(0, line)
-        else:
-            break
-
-    comment_block = '\n'.join(comment_lines).rstrip()
-    pre_content = '\n'.join(pre_lines[:len(pre_lines) - len(comment_lines)]) if comment_lines else leading.rstrip()
-
-    new_declaration = generate_js_data(new_data)
-
-    if comment_block.strip():
-        new_content = pre_content + '\n' + comment_block + '\n' + new_declaration + content[end:]
-    else:
-        new_content = content[:start] + new_declaration + content[end:]
-
-    return new_content
-
-
-def main():
-    import argparse
-    parser = argparse.ArgumentParser(description='Import SLS MBR data from CSV into data.js')
-    parser.add_argument('--file', '-f', required=True, help='Path to CSV file')
-    parser.add_argument('--data-js', default='data.js', help='Path to data.js')
-    parser.add_argument('--dry-run', action='store_true', help='Preview without modifying')
-    args = parser.parse_args()
-
-    csv_path = Path(args.file)
-    if not csv_path.exists():
-        print(f'ERROR: File not found: {csv_path}', file=sys.stderr)
-        sys.exit(1)
-
-    data_js_path = Path(args.data_js)
-    if not data_js_path.exists():
-        print(f'ERROR: data.js not found: {data_js_path}', file=sys.stderr)
-        sys.exit(1)
-
-    print(f'Reading: {csv_path}')
-
-    # Read CSV (try utf-8-sig first, fall back to cp1252 for Windows Excel exports)
-    for encoding in ('utf-8-sig', 'utf-8', 'cp1252', 'latin-1'):
-        try:
-            with open(csv_path, 'r', encoding=encoding) as f:
-                reader = csv.DictReader(f)
-                rows = list(reader)
-            print(f'  Encoding: {encoding}')
-            break
-        except UnicodeDecodeError:
-            continue
-    else:
-        print('ERROR: Could not decode CSV with any known encoding', file=sys.stderr)
-        sys.exit(1)
-
-    print(f'  Found {len(rows)} rows')
-    print(f'  Columns: {", ".join(rows[0].keys()) if rows else "none"}')
-
-    publishers = []
-    spend_data = []
-    risk_data = []
-    managed_titles = []
-
+@dataclass
+class CsvRecords:
+    """Records built from CSV rows; row_count includes rows skipped for a blank publisher."""
+    row_count: int = 0
+    publishers: List[Publisher] = field(default_factory=list)
+    spend_data: List[SpendRecord] = field(default_factory=list)
+    risk_data: List[RiskRecord] = field(default_factory=list)
+    managed_titles: List[ManagedTitle] = field(default_factory=list)
+
+    def extend(self, other: 'CsvRecords') -> None:
+        """Append the records of the rows that follow this batch in the file, renumbering their ids."""
+        for publisher in other.publishers:
+            publisher.id += self.row_count
+        self.row_count += other.row_count
+        self.publishers.extend(other.publishers)
+        self.spend_data.extend(other.spend_data)
+        self.risk_data.extend(other.risk_data)
+        self.managed_titles.extend(other.managed_titles)
+
+
+def publisher_key(row: Dict[str, str]) -> str:
+    """The row's publisher name, which keys its records ('' for rows that are skipped)."""
+    publisher_name = (row.get('Publisher') or '').strip()
+    # Normalize newlines in publisher names (CSV multi-line cells)
+    return re.sub(r'\s*\n\s*', ' ', publisher_name).strip()
+
+
+def build_records(rows: Iterable[Dict[str, str]], symbols: Optional[SymbolTable] = None) -> CsvRecords:
+    """Map CSV rows to publisher, spend, risk and managed title records (publisher id = row number).
+
+    Publisher names, types, contacts and savings types are interned through `symbols`.
+    """
+    records = CsvRecords()
+    intern = (SymbolTable() if symbols is None else symbols).intern
     for i, row in enumerate(rows):
-        publisher_name = (row.get('Publisher') or '').strip()
-        # Normalize newlines in publisher names (CSV multi-line cells)
-        publisher_name = re.sub(r'\s*\n\s*', ' ', publisher_name).strip()
+        records.row_count += 1
+        publisher_name = intern(publisher_key(row))
         if not publisher_name:
             continue
 
         title_raw = (row.get('Title') or '').strip()
         title_clean = clean_title(title_raw)
-        license_type = (row.get('On Prem vs. SaaS') or '').strip()
-        contact = (row.get('SLS FTE Point of Contact') or '').strip()
+        license_type = intern((row.get('On Prem vs. SaaS') or '').strip())
+        contact = intern((row.get('SLS FTE Point of Contact') or '').strip())
         renewal_date = parse_date(row.get('License / Renewal / Subscription End Date', ''))
         invoice_status = (row.get('FY26 Invoice Status') or '').strip()
         status = map_status(invoice_status)
         savings = parse_currency(row.get('FY26 Savings', ''))
-        savings_type = (row.get('Savings Type') or '').strip() or None
+        savings_type = intern((row.get('Savings Type') or '').strip() or None)
 
         # Publisher record
-        publishers.append({
-            'id': i + 1,
-            'name': publisher_name,
-            'title': title_clean,
-            'type': license_type,
-            'contact': contact,
-            'renewalDate': renewal_date,
-            'status': status,
-            'savingsAmount': savings,
-            'savingsType': savings_type,
-        })
+        records.publishers.append(Publisher(
+            id=i + 1,
+            name=publisher_name,
+            title=title_clean,
+            type=license_type,
+            contact=contact,
+            renewalDate=renewal_date,
+            status=status,
+            savingsAmount=savings,
+            savingsType=savings_type,
+        ))
 
         # Spend record
         company_spend = parse_currency(row.get('FY26 Company Annual Spend', ''))
@@ -332,38 +227,460 @@ def main():
         tiam_spend = parse_currency(row.get('FY26 TI&M Annual Spend', ''))
         spend_notes = (row.get('FY26 Company Annual Spend Notes') or '').strip()
 
-        spend_data.append({
-            'publisher': publisher_name,
-            'companySpend': company_spend,
-            'msdSpend': msd_spend,
-            'tiamSpend': tiam_spend,
-            'fiscalYear': 'FY26',
-            'notes': spend_notes,
-        })
+        records.spend_data.append(SpendRecord(
+            publisher=publisher_name,
+            companySpend=company_spend,
+            msdSpend=msd_spend,
+            tiamSpend=tiam_spend,
+            fiscalYear='FY26',
+            notes=spend_notes,
+        ))
 
         # Risk record
-        risk_data.append({
-            'publisher': publisher_name,
-            'sspa': (row.get('Risks : SSPA') or '').strip(),
-            'po': (row.get('Risks : PO') or '').strip(),
-            'finance': (row.get('Risks : Finance') or '').strip(),
-            'legal': (row.get('Risks : Legal') or '').strip(),
-            'inventory': (row.get('Risks : Inventory') or '').strip(),
-            'details': (row.get('Comments (Does not require publishing on Power BI)') or '').strip(),
-        })
+        records.risk_data.append(RiskRecord(
+            publisher=publisher_name,
+            sspa=(row.get('Risks : SSPA') or '').strip(),
+            po=(row.get('Risks : PO') or '').strip(),
+            finance=(row.get('Risks : Finance') or '').strip(),
+            legal=(row.get('Risks : Legal') or '').strip(),
+            inventory=(row.get('Risks : Inventory') or '').strip(),
+            details=(row.get('Comments (Does not require publishing on Power BI)') or '').strip(),
+        ))
 
         # Managed titles - split compound titles
         title_entries = split_titles(title_raw, publisher_name)
-        managed_titles.extend(title_entries)
+        records.managed_titles.extend(title_entries)
+
+    return records
+
+
+def read_csv_records(csv_path: Path) -> Tuple[str, List[str], CsvRecords]:
+    """Parse a CSV export serially; returns (encoding, column names, records)."""
+    # Rows are streamed straight into the record builders; the CSV is never held in memory
+    with open_csv(csv_path) as (encoding, reader):
+        records = build_records(reader)
+        return encoding, reader.fieldnames or [], records
+
+
+# Files smaller than this are parsed serially; process start-up would cost more than it saves
+PARALLEL_MIN_CHUNK = 1024 * 1024
+
+# A quote with ordinary characters on both sides sits inside an unquoted field
+# (27" Monitor); quote counting cannot find record boundaries in such files
+_STRAY_QUOTE_RE = re.compile(rb'[^,\r\n"]"[^,\r\n"]')
+
+
+def _record_end(mm: mmap.mmap, start: int, search_from: int) -> int:
+    """
+    Offset just past the first newline at or after search_from that ends a
+    record beginning at start: one with an even number of quotes since start,
+    i.e. not inside a quoted (possibly multi-line) cell. Doubled quotes
+    inside a cell count twice and leave the parity unchanged.
+    """
+    quotes = mm[start:search_from].count(b'"')
+    pos = search_from
+    while True:
+        newline = mm.find(b'\n', pos)
+        if newline == -1:
+            return len(mm)
+        quotes += mm[pos:newline].count(b'"')
+        if quotes % 2 == 0:
+            return newline + 1
+        pos = newline + 1
+
+
+def _read_header(mm: mmap.mmap, encoding: str) -> Tuple[int, List[str]]:
+    """Column names and the offset where the data rows start (leading blank lines skipped, as DictReader does)."""
+    pos = 0
+    while pos < len(mm):
+        end = _record_end(mm, pos, pos)
+        text = mm[pos:end].decode(encoding, errors='cp1252fallback')
+        row = next(csv.reader(io.StringIO(text, newline='')), [])
+        if row:
+            return end, row
+        pos = end
+    return pos, []
+
+
+def _chunk_ranges(mm: mmap.mmap, start: int, chunks: int) -> List[Tuple[int, int]]:
+    """Split mm[start:] into about `chunks` byte ranges that each begin and end on a record boundary."""
+    step = max((len(mm) - start) // chunks, PARALLEL_MIN_CHUNK)
+    ranges = []
+    while start < len(mm):
+        end = len(mm) if start + step >= len(mm) else _record_end(mm, start, start + step)
+        ranges.append((start, end))
+        start = end
+    return ranges
+
+
+def _parse_chunk(task: Tuple[str, int, int, str, List[str]]) -> CsvRecords:
+    """Worker: build the records for one byte range of the CSV (publisher ids counted from 1)."""
+    csv_path, start, end, encoding, fieldnames = task
+    with open(csv_path, 'rb') as f:
+        f.seek(start)
+        text = f.read(end - start).decode(encoding, errors='cp1252fallback')
+    return build_records(csv.DictReader(io.StringIO(text, newline=''), fieldnames=fieldnames))
+
+
+def read_csv_records_parallel(csv_path: Path, jobs: int) -> Tuple[str, List[str], CsvRecords]:
+    """
+    Parse a CSV export in `jobs` worker processes; same result as read_csv_records.
+
+    The file is split into record-aligned byte ranges by counting quotes, so
+    quoted multi-line cells never straddle two chunks. Chunks are parsed in a
+    process pool and merged in file order, renumbering publisher ids by the
+    rows of the chunks before them. UTF-16 files, small files and files with
+    stray quotes in unquoted cells are parsed serially.
+    """
+    with open(csv_path, 'rb') as f:
+        encoding = detect_encoding(f.read(ENCODING_SAMPLE_SIZE))
+        size = os.fstat(f.fileno()).st_size
+        if encoding == 'utf-16' or size < 2 * PARALLEL_MIN_CHUNK:
+            return read_csv_records(csv_path)
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            data_start, fieldnames = _read_header(mm, encoding)
+            if _STRAY_QUOTE_RE.search(mm, data_start):
+                print('  Unquoted cell contains a quote; parsing serially')
+                return read_csv_records(csv_path)
+            # A few chunks per worker so one slow chunk does not hold up the rest
+            ranges = _chunk_ranges(mm, data_start, jobs * 4)
+
+    records = CsvRecords()
+    with ProcessPoolExecutor(max_workers=jobs) as pool:
+        tasks = [(str(csv_path), start, end, encoding, fieldnames) for start, end in ranges]
+        for chunk in pool.map(_parse_chunk, tasks):
+            records.extend(chunk)
+    return encoding, fieldnames, records
+
+
+# ─── Incremental import (--incremental) ─────────────────────────────────────
+
+@dataclass
+class RowDelta:
+    """How the rows of an incremental import compare with the previous import's manifest."""
+    added: int = 0
+    changed: int = 0
+    removed: int = 0
+    unchanged: int = 0
+
+
+def read_csv_records_incremental(csv_path: Path, previous: Optional[RowManifest],
+                                 load_existing: Callable[[], Dict[str, list]]
+                                 ) -> Tuple[str, List[str], Optional[CsvRecords], List[Tuple[str, str]], RowDelta]:
+    """
+    Parse a CSV export, reusing data.js records for rows unchanged since `previous`.
+
+    The file is scanned once for row keys and fingerprints; only rows that
+    are new or differ from the manifest go through build_records. The others
+    take their publisher, spend, risk and title records from
+    `load_existing()` (the current data.js sections, read only if some row is
+    reused). Records are assembled in file order with publisher id = row
+    number, so the result equals a full parse.
+
+    Returns (encoding, column names, records, (key, fingerprint) per row,
+    delta); records is None when the rows are exactly those of `previous`.
+    """
+    rows: List[Tuple[str, str]] = []
+    parsed: Dict[int, CsvRecords] = {}
+    delta = RowDelta()
+    symbols = SymbolTable()
+    seen = set()
+    with open_csv(csv_path) as (encoding, reader):
+        fieldnames = reader.fieldnames or []
+        reusable = previous.reusable() if previous and previous.columns == fieldnames else {}
+        previous_keys = {key for key, _ in previous.rows} if previous else set()
+        for i, row in enumerate(reader):
+            key = publisher_key(row)
+            fingerprint = row_fingerprint(row.values())
+            rows.append((key, fingerprint))
+            if not key:
+                continue  # skipped by build_records; only counts towards the ids
+            if key not in seen and reusable.get(key) == fingerprint:
+                delta.unchanged += 1
+            else:
+                parsed[i] = build_records([row], symbols)
+                if key in previous_keys:
+                    delta.changed += 1
+                else:
+                    delta.added += 1
+            seen.add(key)
+    delta.removed = len(previous_keys - seen - {''})
+    if previous and previous.columns == fieldnames and rows == previous.rows:
+        return encoding, fieldnames, None, rows, delta
+
+    existing = _index_existing(load_existing()) if delta.unchanged else {}
+    records = CsvRecords()
+    for i, (key, _) in enumerate(rows):
+        if i in parsed:
+            records.extend(parsed[i])
+        elif not key:
+            records.row_count += 1
+        else:
+            publisher, spend, risk, titles = existing[key]
+            records.row_count += 1
+            publisher.id = records.row_count
+            records.publishers.append(publisher)
+            records.spend_data.append(spend)
+            records.risk_data.append(risk)
+            records.managed_titles.extend(titles)
+    return encoding, fieldnames, records, rows, delta
+
+
+def _index_existing(sections: Dict[str, list]) -> Dict[str, tuple]:
+    """(publisher, spend, risk, titles) per publisher name, for names with exactly one of each record."""
+    spend = {s.publisher: s for s in sections.get('spendData') or []}
+    risk = {r.publisher: r for r in sections.get('riskData') or []}
+    titles: Dict[str, List[ManagedTitle]] = {}
+    for title in sections.get('managedTitles') or []:
+        titles.setdefault(title.publisher, []).append(title)
+    publishers = sections.get('publishers') or []
+    counts = Counter(p.name for p in publishers)
+    return {p.name: (p, spend[p.name], risk[p.name], titles.get(p.name, []))
+            for p in publishers if counts[p.name] == 1 and p.name in spend and p.name in risk}
+
+
+# ─── Arrow import (pyarrow installed) ──────────────────────────────────────
+
+# Columns build_records reads
+CSV_COLUMNS = [
+    'Publisher', 'Title', 'On Prem vs. SaaS', 'SLS FTE Point of Contact',
+    'License / Renewal / Subscription End Date', 'FY26 Invoice Status', 'FY26 Savings', 'Savings Type',
+    'FY26 Company Annual Spend', 'FY26 MSD Annual Spend', 'FY26 TI&M Annual Spend',
+    'FY26 Company Annual Spend Notes', 'Risks : SSPA', 'Risks : PO', 'Risks : Finance', 'Risks : Legal',
+    'Risks : Inventory', 'Comments (Does not require publishing on Power BI)',
+]
+
+# Python's Unicode \s for RE2, whose \s is ASCII-only
+_ARROW_SPACE = r'[\s\v\x{1c}-\x{1f}\x{85}\p{Z}]'
+
+
+def read_csv_records_arrow(csv_path: Path) -> Optional[Tuple[str, List[str], CsvRecords, Dict[str, 'pa.Table']]]:
+    """
+    Parse a CSV export with pyarrow.csv; same records as read_csv_records.
+
+    Cells are read as string columns and cleaned with compute kernels
+    (whitespace, currency, dates, status) instead of per row in Python. Also
+    returns the publishers/spendData/riskData/managedTitles tables for
+    arrow_tables. Returns None when pyarrow cannot read the file (ragged
+    rows, bytes outside the detected encoding), so the caller can fall back.
+    """
+    with open_csv(csv_path) as (encoding, reader):
+        fieldnames = reader.fieldnames or []
+    try:
+        table = pa_csv.read_csv(
+            str(csv_path),
+            # pyarrow skips a UTF-8 BOM itself
+            read_options=pa_csv.ReadOptions(encoding='utf8' if encoding.startswith('utf-8') else encoding),
+            parse_options=pa_csv.ParseOptions(newlines_in_values=True),
+            convert_options=pa_csv.ConvertOptions(
+                column_types={name: pa.string() for name in CSV_COLUMNS},
+                include_columns=CSV_COLUMNS, include_missing_columns=True, strings_can_be_null=False,
+            ),
+        )
+    except (pa.ArrowException, UnicodeDecodeError) as e:
+        print(f'  pyarrow could not read the file ({e}); using the csv module')
+        return None
+
+    def text(name: str) -> 'pa.Array':
+        return strip_array(table.column(name).combine_chunks())
+
+    def raw(name: str) -> 'pa.Array':
+        return table.column(name).combine_chunks()
+
+    row_count = table.num_rows
+    # Same cleanup as build_records: newlines in publisher names, bullets/whitespace in titles
+    names = strip_array(pc.replace_substring_regex(text('Publisher'), _ARROW_SPACE + r'*\n' + _ARROW_SPACE + '*', ' '))
+    title_raw = text('Title')
+    titles = strip_array(pc.replace_substring_regex(pc.replace_substring(title_raw, '�', '•'), _ARROW_SPACE + '+', ' '))
+    invoice_status = pc.utf8_lower(text('FY26 Invoice Status'))
+    status = pc.if_else(pc.equal(invoice_status, 'pending'), 'Pending',
+                        pc.if_else(pc.is_in(invoice_status, value_set=pa.array(['tbd', ''])), 'In Review', 'Active'))
+    savings_type = text('Savings Type')
+    savings_type = pc.if_else(pc.equal(savings_type, ''), pa.scalar(None, pa.string()), savings_type)
+    keep = pc.not_equal(names, '')
+
+    tables = {
+        'publishers': pa.table({
+            'id': pa.array(range(1, row_count + 1), pa.int64()),
+            'name': names,
+            'title': titles,
+            'type': text('On Prem vs. SaaS'),
+            'contact': text('SLS FTE Point of Contact'),
+            'renewalDate': parse_date_array(raw('License / Renewal / Subscription End Date')),
+            'status': status,
+            'savingsAmount': parse_currency_array(raw('FY26 Savings')),
+            'savingsType': savings_type,
+        }).filter(keep),
+        'spendData': pa.table({
+            'publisher': names,
+            'companySpend': parse_currency_array(raw('FY26 Company Annual Spend')),
+            'msdSpend': parse_currency_array(raw('FY26 MSD Annual Spend')),
+            'tiamSpend': parse_currency_array(raw('FY26 TI&M Annual Spend')),
+            'fiscalYear': pa.repeat('FY26', row_count),
+            'notes': text('FY26 Company Annual Spend Notes'),
+        }).filter(keep),
+        'riskData': pa.table({
+            'publisher': names,
+            'sspa': text('Risks : SSPA'),
+            'po': text('Risks : PO'),
+            'finance': text('Risks : Finance'),
+            'legal': text('Risks : Legal'),
+            'inventory': text('Risks : Inventory'),
+            'details': text('Comments (Does not require publishing on Power BI)'),
+        }).filter(keep),
+    }
+
+    # to_pylist() makes a str per cell; intern the repeated ones so e.g. a publisher
+    # name is one object shared by its publisher, spend, risk and title records
+    intern = SymbolTable().intern
+
+    def section_records(section: str, record_type) -> list:
+        table = tables[section]
+        columns = [[intern(v) for v in column.to_pylist()] if name in INTERNED_FIELDS else column.to_pylist()
+                   for name, column in zip(table.column_names, table.columns)]
+        return [record_type(*values) for values in zip(*columns)]
+
+    records = CsvRecords(row_count, section_records('publishers', Publisher),
+                         section_records('spendData', SpendRecord), section_records('riskData', RiskRecord))
+    # Compound titles are split per publisher in Python (few rows, irregular text)
+    for title, publisher in zip(pc.filter(title_raw, keep).to_pylist(), records.publishers):
+        records.managed_titles.extend(split_titles(title, publisher.name))
+    tables['managedTitles'] = records_table('managedTitles', records.managed_titles)
+    return encoding, fieldnames, records, tables
+
+
+def parse_csv(csv_path: Path, jobs: int = 1, use_arrow: bool = True) -> Tuple[str, List[str], CsvRecords, Optional[dict]]:
+    """Parse a CSV export with the reader the options pick; returns (encoding, column names, records, Arrow tables or None)."""
+    arrow_result = read_csv_records_arrow(csv_path) if pa and jobs <= 1 and use_arrow else None
+    if arrow_result:
+        print('  Reader: pyarrow')
+        return arrow_result
+    if jobs > 1:
+        return (*read_csv_records_parallel(csv_path, jobs), None)
+    return (*read_csv_records(csv_path), None)
+
+
+def csv_sections(records: CsvRecords) -> Dict[str, list]:
+    """The data.js sections derived from a CSV export."""
+    return {
+        'publishers': records.publishers,
+        'spendData': records.spend_data,
+        'riskData': records.risk_data,
+        'managedTitles': records.managed_titles,
+    }
+
+
+def read_csv_dir(directory: Path, data_js_path: Path, jobs: int = 1, use_arrow: bool = True) -> Dict[str, list]:
+    """Parse every CSV in `directory` (cached per file) and merge them oldest first (see batch_import.py)."""
+    csv_files = list_import_files(directory, ['.csv'])
+    if not csv_files:
+        print(f'ERROR: No CSV files in {directory}', file=sys.stderr)
+        sys.exit(1)
+    # Every reader yields the same records, so jobs/arrow are not part of the cache key
+    cache = ParseCache(parse_cache_dir(data_js_path), 'csv', [Path(__file__)])
+
+    def parse(csv_path: Path) -> Tuple[int, Dict[str, list]]:
+        print(f'Reading: {csv_path}')
+        encoding, _, records, _ = parse_csv(csv_path, jobs, use_arrow)
+        print(f'  Encoding: {encoding}')
+        print(f'  Found {records.row_count} rows')
+        # Cached as plain sections of records.py types (CsvRecords may live in __main__)
+        return records.row_count, csv_sections(records)
+
+    snapshots = []
+    for csv_path in csv_files:
+        (row_count, sections), cached = cache.load_or_parse(csv_path, parse)
+        if cached:
+            print(f'Cached: {csv_path} ({row_count} rows)')
+        snapshots.append(sections)
+    print(f'\nMerged {len(csv_files)} CSV files (oldest first)')
+    return build_history(snapshots)
 
-    # Preserve existing external KPIs (they come from a different source)
-    existing_kpis = _get_existing_kpis(data_js_path)
+
+def main():
+    import argparse
+    parser = argparse.ArgumentParser(description='Import SLS MBR data from CSV into data.js')
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument('--file', '-f', help='Path to CSV file')
+    source.add_argument('--dir', '-d', metavar='DIR',
+                        help='Import every CSV in DIR (e.g. one per month), merged oldest first by file name; '
+                             'parsed files are cached by content hash')
+    parser.add_argument('--data-js', default='data.js', help='Path to data.js')
+    parser.add_argument('--dry-run', action='store_true', help='Preview without modifying')
+    parser.add_argument('--layout', choices=LAYOUTS,
+                        help='data.js layout: rows (object per record), dict (string table + index tuples) '
+                             'or columns (parallel arrays per field); default keeps the current layout')
+    parser.add_argument('--jobs', '-j', type=int, default=1,
+                        help='Parse the CSV in N worker processes (same output as the default serial parse)')
+    parser.add_argument('--no-arrow', action='store_true',
+                        help='Parse with the csv module even if pyarrow is installed')
+    parser.add_argument('--incremental', '-i', action='store_true',
+                        help='Only parse rows added or changed since the last --incremental import '
+                             '(row fingerprints in .data.js.rows.json); same output as a full import')
+    args = parser.parse_args()
+    if args.incremental and (args.dir or args.jobs > 1):
+        parser.error('--incremental reads a single --file serially (not with --dir or --jobs)')
+
+    source_path = Path(args.dir or args.file)
+    if not (source_path.is_dir() if args.dir else source_path.exists()):
+        print(f'ERROR: {"Directory" if args.dir else "File"} not found: {source_path}', file=sys.stderr)
+        sys.exit(1)
+
+    data_js_path = Path(args.data_js)
+    if not data_js_path.exists():
+        print(f'ERROR: data.js not found: {data_js_path}', file=sys.stderr)
+        sys.exit(1)
+
+    data_file = DataJsFile(data_js_path)
+    try:
+        existing_kpis = _get_existing_kpis(data_file)
+    except DataJsError as e:
+        print(f'ERROR: {e}', file=sys.stderr)
+        sys.exit(1)
+
+    row_manifest = None
+    if args.dir:
+        # The merged history is not the table of any one file, so there is no Arrow cache to save
+        sections = read_csv_dir(source_path, data_js_path, args.jobs, not args.no_arrow)
+        tables = None
+    elif args.incremental:
+        print(f'Reading: {source_path}')
+        parser_version = parser_key('csv', [Path(__file__)])
+        previous = RowManifest.load(manifest_path(data_js_path))
+        if previous and (previous.parser != parser_version
+                         or previous.sections != data_file.fingerprint(TABLE_SECTIONS)):
+            previous = None  # data.js or the parser changed since that import
+        encoding, fieldnames, records, rows, delta = read_csv_records_incremental(
+            source_path, previous, lambda: _read_csv_sections(data_file))
+        print(f'  Encoding: {encoding}')
+        print(f'  Columns: {", ".join(fieldnames) or "none"}')
+        print(f'  Found {len(rows)} rows')
+        if records is None:
+            print(f'\n✓ Rows unchanged since the last import; {data_js_path} left as is')
+            print(f'  Dataset version: {data_file.read_section("datasetVersion")}')
+            return
+        if previous:
+            print(f'  Since last import: {delta.added} added, {delta.changed} changed, '
+                  f'{delta.removed} removed, {delta.unchanged} unchanged')
+        else:
+            print('  No current row manifest: all rows parsed')
+        row_manifest = RowManifest(parser_version, fieldnames, '', rows)
+        sections = csv_sections(records)
+        tables = None
+    else:
+        print(f'Reading: {source_path}')
+        encoding, fieldnames, records, tables = parse_csv(source_path, args.jobs, not args.no_arrow)
+        print(f'  Encoding: {encoding}')
+        print(f'  Columns: {", ".join(fieldnames) or "none"}')
+        print(f'  Found {records.row_count} rows')
+        sections = csv_sections(records)
+    publishers = sections['publishers']
+    spend_data = sections['spendData']
+    risk_data = sections['riskData']
+    managed_titles = sections['managedTitles']
 
     data = {
-        'publishers': publishers,
-        'spendData': spend_data,
-        'riskData': risk_data,
-        'managedTitles': managed_titles,
+        **sections,
         'datasetVersion': f'FY26_NEFAYPGRAFF_{date.today().isoformat()}',
         'externalKpis': existing_kpis,
     }
@@ -374,43 +691,50 @@ def main():
     print(f'  Managed titles: {len(managed_titles)}')
     print(f'  External KPIs: {len(existing_kpis)} (preserved from existing)')
 
-    new_content = update_data_js(data_js_path, data)
-
+    # externalKpis are carried over untouched, so only the CSV-derived sections are rewritten;
+    # write() copies them from data.js under the writer lock, so a concurrent KPI sync is kept
+    dirty = {'publishers', 'spendData', 'riskData', 'managedTitles', 'datasetVersion'}
     if args.dry_run:
         print('\n--- DRY RUN ---')
-        match = re.search(r'const defaultRawData = \{', new_content)
-        if match:
-            print(new_content[match.start():match.start() + 3000])
+        preview, _ = data_file.preview(data, dirty, limit=3000, layout=args.layout)
+        print(preview)
         print('\nDry run complete. No files modified.')
         return
 
-    data_js_path.write_text(new_content, encoding='utf-8')
+    with data_file.locked():
+        changed = data_file.write(data, dirty, layout=args.layout)
+        if tables:
+            # Under the same lock, so the cache is keyed to the sections just written
+            save_cached_tables(data_file, tables)
+        if row_manifest:
+            row_manifest.sections = data_file.fingerprint(TABLE_SECTIONS)
+            row_manifest.save(manifest_path(data_js_path))
+    if not changed:
+        print(f'\n✓ Data unchanged (datasetHash {data_file.read_section("datasetHash")}); {data_js_path} left as is')
+        print(f'  Dataset version: {data_file.read_section("datasetVersion")}')
+        return
     print(f'\n✓ Updated {data_js_path}')
     print(f'  Dataset version: {data["datasetVersion"]}')
+    print(f'  Dataset hash: {data_file.read_section("datasetHash")}')
 
 
-def _get_existing_kpis(data_js_path: Path) -> List[Dict]:
-    """Try to extract existing externalKpis from data.js."""
-    try:
-        import subprocess, json
-        node_script = f"""
-        const fs = require('fs');
-        const content = fs.readFileSync('{data_js_path.resolve().as_posix()}', 'utf-8');
-        const match = content.match(/const\\s+defaultRawData\\s*=\\s*(\\{{[\\s\\S]*?\\n\\}});/);
-        if (match) {{
-            eval('var result = ' + match[1]);
-            console.log(JSON.stringify(result.externalKpis || []));
-        }}
-        """
-        result = subprocess.run(['node', '-e', node_script], capture_output=True, text=True, timeout=10)
-        if result.returncode == 0 and result.stdout.strip():
-            return json.loads(result.stdout.strip())
-    except Exception:
-        pass
+def _read_csv_sections(data_file: DataJsFile) -> Dict[str, list]:
+    """The CSV-derived sections of data.js as records, from the data.json sidecar when it is current."""
+    data = data_file.read_sidecar()
+    if data is None:
+        return data_file.read_records(TABLE_SECTIONS)
+    return {key: to_records(key, data.get(key) or []) for key in TABLE_SECTIONS}
+
+
+def _get_existing_kpis(data_file: DataJsFile) -> List[ExternalKpi]:
+    """Return the externalKpis already present in data.js (they come from a different source)."""
+    kpis = data_file.read_records(['externalKpis']).get('externalKpis')
+    if kpis:
+        return kpis
     # Fallback
     return [
-        {'name': 'SNOW Tickets MTD', 'value': 315, 'unit': 'tickets', 'source': 'ServiceNow', 'lastUpdated': date.today().isoformat(), 'notes': ''},
-        {'name': 'ICM Tickets MTD', 'value': 135, 'unit': 'tickets', 'source': 'ICM System', 'lastUpdated': date.today().isoformat(), 'notes': ''},
+        ExternalKpi('SNOW Tickets MTD', 315, 'tickets', 'ServiceNow', date.today().isoformat(), ''),
+        ExternalKpi('ICM Tickets MTD', 135, 'tickets', 'ICM System', date.today().isoformat(), ''),
     ]
 
 
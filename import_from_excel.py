@@ -13,16 +13,33 @@ Sheet detection (case-insensitive partial match):
   - "kpi" or "external"   → externalKpis array
 
 Column headers are auto-mapped by fuzzy matching (case-insensitive).
-Unrecognized sheets/columns are skipped with a warning.
+Unrecognized sheets/columns are skipped with a warning. --print-mappings
+shows the resolved header → field mappings and --column-map pins them
+(see column_mapping.py).
 
 Usage:
   python import_from_excel.py --file data.xlsx
   python import_from_excel.py --file data.xlsx --dry-run
   python import_from_excel.py --file data.xlsx --sheet-map "Sheet1=publishers" "Sheet2=spend"
+  python import_from_excel.py --dir monthly/
+  python import_from_excel.py --file data.xlsx --reader openpyxl
+  python import_from_excel.py --file data.xlsx --jobs 5
+  python import_from_excel.py --file data.xlsx --dry-run --print-mappings columns.json
+  python import_from_excel.py --file data.xlsx --column-map columns.json
   python import_from_excel.py --template output.xlsx
 
+--dir imports a folder of monthly workbooks into one history (see batch_import.py).
+Parsed workbooks are cached in .data.js.imports/ by content hash, sheet mapping
+and reader, so the real run after a --dry-run does not parse the file again.
+With --jobs N the mapped sheets are parsed in up to N worker processes, one
+sheet each, so a large workbook takes about as long as its largest sheet.
+
+Workbooks are read by the fastest installed backend (see workbook_readers.py);
+--reader picks one explicitly.
+
 Prerequisites:
-  pip install openpyxl
+  None for .xlsx (built-in reader); pip install python-calamine for the
+  fastest reads, xlrd for old .xls files, openpyxl for --template
 """
 
 from __future__ import annotations
@@ -30,25 +47,29 @@ from __future__ import annotations
 import argparse
 import json
 import os
-import re
 import sys
-from datetime import date, datetime
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date
 from pathlib import Path
-from typing import Any, Dict, List, Optional, Tuple
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set, Tuple, Type
+
+from batch_import import ParseCache, build_history, list_import_files, merge_sections, parse_cache_dir
+from column_mapping import ColumnOverrides, column_index, load_column_overrides, resolved_columns
+from data_js import CONTENT_SECTIONS, LAYOUTS, DataJsError, DataJsFile
+from records import ExternalKpi, ManagedTitle, Publisher, Record, RiskRecord, SpendRecord
+from symbols import INTERNED_FIELDS, SymbolTable
+from value_parsers import cell_parser
+from workbook_readers import BACKEND_NAMES, WorkbookReaderError, select_backend
 
 try:
     import openpyxl
 except ImportError:
     openpyxl = None
 
-try:
-    import xlrd
-except ImportError:
-    xlrd = None
 
-if not openpyxl and not xlrd:
-    print("ERROR: Install openpyxl (for .xlsx) and/or xlrd (for .xls): pip install openpyxl xlrd", file=sys.stderr)
-    sys.exit(1)
+
+# Workbook files --dir picks up
+WORKBOOK_SUFFIXES = (".xlsx", ".xlsm", ".xls")
 
 
 # ─── Column Mappings ─────────────────────────────────────────────────────────
@@ -111,6 +132,14 @@ SHEET_TYPE_MAPPINGS = {
     "kpis": KPI_COLUMNS,
 }
 
+SHEET_TYPE_RECORDS = {
+    "publishers": Publisher,
+    "spend": SpendRecord,
+    "risks": RiskRecord,
+    "titles": ManagedTitle,
+    "kpis": ExternalKpi,
+}
+
 
 # ─── Sheet Detection ─────────────────────────────────────────────────────────
 
@@ -132,325 +161,268 @@ def detect_sheet_type(sheet_name: str) -> Optional[str]:
 
 # ─── Column Mapping ──────────────────────────────────────────────────────────
 
-def map_columns(headers: List[str], column_defs: list) -> Dict[int, str]:
-    """Map Excel column indices to data field names via fuzzy matching."""
-    mapping: Dict[int, str] = {}
-    used_fields = set()
-
-    for col_idx, header in enumerate(headers):
-        if not header:
-            continue
-        h = header.strip().lower()
-        for aliases, field_name in column_defs:
-            if field_name in used_fields:
-                continue
-            # Exact match first
-            if h in [a.lower() for a in aliases]:
-                mapping[col_idx] = field_name
-                used_fields.add(field_name)
-                break
-            # Substring match
-            for alias in aliases:
-                if alias.lower() in h or h in alias.lower():
-                    mapping[col_idx] = field_name
-                    used_fields.add(field_name)
-                    break
-            if col_idx in mapping:
-                break
-
-    return mapping
+def map_columns(headers: List[str], column_defs: list,
+                overrides: Optional[Dict[str, Optional[str]]] = None) -> Dict[int, str]:
+    """Map Excel column indices to data field names via fuzzy matching.
+
+    Uses the alias list's compiled index (see column_mapping.py), which
+    caches the result per header signature. `overrides` pins normalized
+    headers to fields, or to None to leave them unmapped.
+    """
+    return column_index(column_defs).map(headers, overrides)
 
 
 # ─── Data Reading ─────────────────────────────────────────────────────────────
 
-def read_sheet_data(ws, column_defs: list) -> Tuple[List[Dict], Dict[int, str], List[str]]:
-    """Read an openpyxl worksheet into a list of dicts using column mapping."""
-    rows = list(ws.iter_rows(values_only=True))
-    return read_sheet_data_from_rows(rows, column_defs)
+def read_sheet_data(ws, column_defs: list, record_type: Type[Record]
+                    ) -> Tuple[List[Record], Dict[int, str], List[str], List[str]]:
+    """Read an openpyxl worksheet into a list of records using column mapping."""
+    return read_sheet_data_from_rows(ws.iter_rows(values_only=True), column_defs, record_type)
+
+
+def _is_empty_row(row: tuple) -> bool:
+    return not any(cell is not None and str(cell).strip() != "" for cell in row)
 
 
-def read_sheet_data_from_rows(rows: List[tuple], column_defs: list) -> Tuple[List[Dict], Dict[int, str], List[str]]:
-    """Read raw row tuples into a list of dicts using column mapping."""
-    if not rows:
-        return [], {}, []
+def read_sheet_data_from_rows(rows: Iterable[tuple], column_defs: list, record_type: Type[Record],
+                              symbols: Optional[SymbolTable] = None,
+                              overrides: Optional[Dict[str, Optional[str]]] = None
+                              ) -> Tuple[List[Record], Dict[int, str], List[str], List[str]]:
+    """Read raw row tuples into records; returns (records, column mapping, unmapped headers, headers).
 
-    # Find header row (first non-empty row)
-    header_row_idx = 0
-    for i, row in enumerate(rows):
-        if any(cell is not None and str(cell).strip() != "" for cell in row):
-            header_row_idx = i
-            break
+    `rows` is consumed once, in order, so it can stream straight from the
+    workbook. Fields without a mapped column take the record type's default.
+    Repeated text fields (publisher, contact, status, ...) are interned
+    through `symbols`. `overrides` is passed on to map_columns.
+    """
+    rows = iter(rows)
+    # Header row: first non-empty row
+    header_row = next((row for row in rows if not _is_empty_row(row)), None)
+    if header_row is None:
+        return [], {}, [], []
 
-    headers = [str(cell).strip() if cell is not None else "" for cell in rows[header_row_idx]]
-    col_mapping = map_columns(headers, column_defs)
+    headers = [str(cell).strip() if cell is not None else "" for cell in header_row]
+    col_mapping = map_columns(headers, column_defs, overrides)
 
     unmapped = [h for i, h in enumerate(headers) if h and i not in col_mapping]
 
+    # (cell parser, source column or None, default) in record field order
+    field_cols = {field_name: col_idx for col_idx, field_name in col_mapping.items()}
+    intern = (SymbolTable() if symbols is None else symbols).intern
+    plan = [(_interning(cell_parser(field_name), intern) if field_name in INTERNED_FIELDS else cell_parser(field_name),
+             field_cols.get(field_name), default)
+            for field_name, default in zip(record_type.FIELDS, record_type.DEFAULTS)]
+
     records = []
-    for row in rows[header_row_idx + 1:]:
-        if not any(cell is not None and str(cell).strip() != "" for cell in row):
+    for row in rows:
+        if _is_empty_row(row):
             continue  # skip empty rows
 
-        record = {}
-        for col_idx, field_name in col_mapping.items():
-            val = row[col_idx] if col_idx < len(row) else None
-            record[field_name] = convert_value(val, field_name)
+        record = record_type(*[
+            default if col_idx is None
+            else parse(row[col_idx] if col_idx < len(row) else None)
+            for parse, col_idx, default in plan
+        ])
 
         # Skip rows where the primary key field is empty
-        primary = record.get("name") or record.get("publisher") or record.get("title")
+        primary = getattr(record, "name", None) or getattr(record, "publisher", None) or getattr(record, "title", None)
         if primary:
             records.append(record)
 
-    return records, col_mapping, unmapped
-
-
-# ─── Format Readers ───────────────────────────────────────────────────────────
-
-def _is_old_xls_format(file_path: Path) -> bool:
-    """Check if the file is an old .xls format by reading its magic bytes."""
-    with open(file_path, "rb") as f:
-        header = f.read(8)
-    # OLE2 Compound Binary File magic: D0 CF 11 E0 A1 B1 1A E1
-    return header[:4] == b"\xd0\xcf\x11\xe0"
-
-
-def _read_xlsx(file_path: Path) -> Tuple[List[str], Dict[str, List[tuple]]]:
-    """Read an .xlsx file via openpyxl, return sheet names and rows per sheet."""
-    wb = openpyxl.load_workbook(file_path, read_only=True, data_only=True)
-    sheet_names = wb.sheetnames
-    sheet_rows: Dict[str, List[tuple]] = {}
-    for name in sheet_names:
-        ws = wb[name]
-        sheet_rows[name] = list(ws.iter_rows(values_only=True))
-    wb.close()
-    return sheet_names, sheet_rows
-
-
-def _read_xls(file_path: Path) -> Tuple[List[str], Dict[str, List[tuple]]]:
-    """Read an old .xls file via xlrd, return sheet names and rows per sheet."""
-    wb = xlrd.open_workbook(str(file_path), formatting_info=False)
-    sheet_names = wb.sheet_names()
-    sheet_rows: Dict[str, List[tuple]] = {}
-    for name in sheet_names:
-        ws = wb.sheet_by_name(name)
-        rows = []
-        for row_idx in range(ws.nrows):
-            row_vals = []
-            for col_idx in range(ws.ncols):
-                cell = ws.cell(row_idx, col_idx)
-                val = cell.value
-                # Convert xlrd date numbers to Python dates
-                if cell.ctype == xlrd.XL_CELL_DATE and val:
-                    try:
-                        dt_tuple = xlrd.xldate_as_tuple(val, wb.datemode)
-                        val = datetime(*dt_tuple)
-                    except Exception:
-                        pass
-                row_vals.append(val)
-            rows.append(tuple(row_vals))
-        sheet_rows[name] = rows
-    return sheet_names, sheet_rows
+    return records, col_mapping, unmapped, headers
 
 
-def convert_value(val: Any, field_name: str) -> Any:
-    """Convert an Excel cell value to the appropriate Python type."""
-    if val is None:
-        # Return sensible defaults based on field
-        if field_name in ("savingsAmount", "companySpend", "msdSpend", "tiamSpend", "licenseCount", "value"):
-            return 0
-        if field_name == "id":
-            return 0
-        return ""
-
-    # Dates
-    if isinstance(val, datetime):
-        return val.strftime("%Y-%m-%d")
-    if isinstance(val, date):
-        return val.strftime("%Y-%m-%d")
-
-    # Numbers
-    if field_name in ("savingsAmount", "companySpend", "msdSpend", "tiamSpend", "value"):
-        try:
-            return float(val) if val else 0
-        except (ValueError, TypeError):
-            return 0
-    if field_name in ("id", "licenseCount"):
-        try:
-            return int(float(val)) if val else 0
-        except (ValueError, TypeError):
-            return 0
-
-    # Strings
-    return str(val).strip() if val else ""
-
-
-# ─── JavaScript Generation ───────────────────────────────────────────────────
-
-def js_value(val: Any) -> str:
-    """Serialize a Python value to JavaScript literal syntax."""
-    if val is None:
-        return "null"
-    if isinstance(val, bool):
-        return "true" if val else "false"
-    if isinstance(val, (int, float)):
-        if isinstance(val, float) and val == int(val) and abs(val) < 1e15:
-            return str(int(val))
-        return str(val)
-    # String — single-quote with escaping
-    s = str(val).replace("\\", "\\\\").replace("'", "\\'").replace("\n", "\\n")
-    return f"'{s}'"
-
-
-def js_object_oneline(obj: Dict[str, Any], key_order: List[str]) -> str:
-    """Serialize a dict as a one-line JS object literal with unquoted keys."""
-    parts = []
-    for key in key_order:
-        if key in obj:
-            parts.append(f"{key}: {js_value(obj[key])}")
-    # Include any extra keys not in the order
-    for key in obj:
-        if key not in key_order:
-            parts.append(f"{key}: {js_value(obj[key])}")
-    return "{ " + ", ".join(parts) + " }"
-
-
-def generate_js_data(data: Dict[str, Any]) -> str:
-    """Generate the full defaultRawData JavaScript declaration."""
-    lines = ["const defaultRawData = {"]
-
-    # publishers
-    if "publishers" in data:
-        key_order = ["id", "name", "title", "type", "contact", "renewalDate", "status", "savingsAmount", "savingsType"]
-        lines.append("    publishers: [")
-        for pub in data["publishers"]:
-            lines.append(f"        {js_object_oneline(pub, key_order)},")
-        lines.append("    ],")
-
-    # spendData
-    if "spendData" in data:
-        key_order = ["publisher", "companySpend", "msdSpend", "tiamSpend", "fiscalYear", "notes"]
-        lines.append("    spendData: [")
-        for s in data["spendData"]:
-            lines.append(f"        {js_object_oneline(s, key_order)},")
-        lines.append("    ],")
-
-    # riskData
-    if "riskData" in data:
-        key_order = ["publisher", "sspa", "po", "finance", "legal", "inventory", "details"]
-        lines.append("    riskData: [")
-        for r in data["riskData"]:
-            lines.append(f"        {js_object_oneline(r, key_order)},")
-        lines.append("    ],")
-
-    # managedTitles
-    if "managedTitles" in data:
-        key_order = ["title", "publisher", "category", "licenseCount", "notes"]
-        lines.append("    managedTitles: [")
-        for t in data["managedTitles"]:
-            lines.append(f"        {js_object_oneline(t, key_order)},")
-        lines.append("    ],")
-
-    # datasetVersion
-    version = data.get("datasetVersion", f"FY26_EXCEL_IMPORT_{date.today().isoformat()}")
-    lines.append(f"    datasetVersion: {js_value(version)},")
-
-    # externalKpis
-    if "externalKpis" in data:
-        key_order = ["name", "value", "unit", "source", "lastUpdated", "notes"]
-        lines.append("    externalKpis: [")
-        for k in data["externalKpis"]:
-            lines.append(f"        {js_object_oneline(k, key_order)},")
-        lines.append("    ]")
-
-    lines.append("};")
-    return "\n".join(lines)
-
-
-# ─── data.js Update ──────────────────────────────────────────────────────────
-
-def update_data_js(data_js_path: Path, new_data: Dict[str, Any]) -> str:
-    """Replace the defaultRawData object in data.js and return the new content."""
-    content = data_js_path.read_text(encoding="utf-8")
-
-    # Find the defaultRawData declaration and its closing
-    pattern = re.compile(
-        r"(//[^\n]*\n)*\s*const\s+defaultRawData\s*=\s*\{",
-        re.MULTILINE
-    )
-    match = pattern.search(content)
-    if not match:
-        raise RuntimeError("Could not find 'const defaultRawData = {' in data.js")
-
-    start = match.start()
-
-    # Find the matching closing '};' by counting braces
-    brace_count = 0
-    end = -1
-    in_string = False
-    string_char = None
-    i = match.end() - 1  # Start at the opening brace
-
-    for idx in range(i, len(content)):
-        c = content[idx]
-
-        if in_string:
-            if c == "\\" and idx + 1 < len(content):
-                continue  # skip escaped chars (handled by next iteration)
-            if c == string_char and (idx == 0 or content[idx - 1] != "\\"):
-                in_string = False
-            continue
-
-        if c in ("'", '"', '`'):
-            in_string = True
-            string_char = c
-            continue
-
-        if c == "{":
-            brace_count += 1
-        elif c == "}":
-            brace_count -= 1
-            if brace_count == 0:
-                # Look for the semicolon after closing brace
-                rest = content[idx + 1:idx + 5]
-                semi = rest.find(";")
-                end = idx + 1 + semi + 1 if semi >= 0 else idx + 2
-                break
-
-    if end == -1:
-        raise RuntimeError("Could not find the end of defaultRawData object in data.js")
-
-    # Preserve any leading comments
-    leading = content[:start]
-    # Find the comment block right before defaultRawData
-    comment_lines = []
-    pre_lines = leading.rstrip().split("\n")
-    for line in reversed(pre_lines):
-        stripped = line.strip()
-        if stripped.startswith("//"):
-            comment_lines.insert(0, line)
-        elif stripped == "":
-            comment_lines.insert(0, line)
-        else:
-            break
+def _interning(parse: Callable[[Any], Any], intern: Callable[[Any], Any]) -> Callable[[Any], Any]:
+    return lambda val: intern(parse(val))
 
-    comment_block = "\n".join(comment_lines).rstrip()
-    pre_content = "\n".join(pre_lines[:len(pre_lines) - len(comment_lines)]) if comment_lines else leading.rstrip()
 
-    new_declaration = generate_js_data(new_data)
+# ─── Cell Values ──────────────────────────────────────────────────────────────
 
-    # Rebuild: everything before comments + comments + new data + everything after
-    if comment_block.strip():
-        new_content = pre_content + "\n" + comment_block + "\n" + new_declaration + content[end:]
-    else:
-        new_content = content[:start] + new_declaration + content[end:]
+def convert_value(val: Any, field_name: str) -> Any:
+    """Convert an Excel cell value to the appropriate Python type."""
+    return cell_parser(field_name)(val)
+
+
+# ─── Parallel Sheets (--jobs) ────────────────────────────────────────────────
+
+def _parse_sheet(task: Tuple[str, str, str, str, Optional[Dict[str, Optional[str]]]]
+                 ) -> Tuple[List[Record], Dict[int, str], List[str], List[str]]:
+    """Worker: open the workbook read-only with the given reader and parse one sheet."""
+    file_path, reader, sheet_name, sheet_type, overrides = task
+    backend = select_backend(Path(file_path), reader)
+    with backend.open(Path(file_path)) as (_, sheet_rows):
+        return read_sheet_data_from_rows(sheet_rows(sheet_name), SHEET_TYPE_MAPPINGS[sheet_type],
+                                         SHEET_TYPE_RECORDS[sheet_type], overrides=overrides)
+
+
+def read_sheets_parallel(file_path: Path, reader: str, sheets: List[Tuple[str, str]], jobs: int,
+                         symbols: SymbolTable, overrides: Optional[ColumnOverrides] = None
+                         ) -> List[Tuple[List[Record], Dict[int, str], List[str], List[str]]]:
+    """
+    Parse (sheet name, sheet type) pairs in `jobs` worker processes, one sheet each.
+
+    Same result as reading them in order: every worker opens the workbook
+    itself, and the records it returns are re-interned through `symbols` so
+    publisher names are shared across sheets as in a serial read. Wall time
+    is about that of the largest sheet plus each worker's open.
+    """
+    overrides = overrides or {}
+    tasks = [(str(file_path), reader, sheet_name, sheet_type, overrides.get(sheet_type))
+             for sheet_name, sheet_type in sheets]
+    with ProcessPoolExecutor(max_workers=jobs) as pool:
+        parsed = list(pool.map(_parse_sheet, tasks))
+    intern = symbols.intern
+    for records, _, _, _ in parsed:
+        fields = [name for name in records[0].FIELDS if name in INTERNED_FIELDS] if records else []
+        for record in records:
+            for name in fields:
+                setattr(record, name, intern(getattr(record, name)))
+    return parsed
+
+
+# ─── Workbook Import ─────────────────────────────────────────────────────────
+
+def read_workbook(file_path: Path, explicit_map: Dict[str, str], reader: Optional[str] = None,
+                  jobs: int = 1, overrides: Optional[ColumnOverrides] = None,
+                  mappings: Optional[ColumnOverrides] = None) -> Dict[str, List[Record]]:
+    """Parse a workbook into data.js sections (data key → records), printing what each sheet mapped to.
+
+    Sheet types are decided from the names first; only mapped sheets are
+    read, each streamed row by row into read_sheet_data_from_rows. `reader`
+    names a backend from workbook_readers.py; by default the fastest one
+    installed for the file's format is used. With `jobs` > 1 the mapped
+    sheets are parsed in worker processes (see read_sheets_parallel).
+    Column `overrides` are per sheet type (see column_mapping.py); the
+    resolved header → field mapping of each sheet is added to `mappings`.
+    """
+    overrides = overrides or {}
+    print(f"Reading: {file_path}")
+    try:
+        backend = select_backend(file_path, reader)
+    except WorkbookReaderError as e:
+        print(f"ERROR: {e}", file=sys.stderr)
+        sys.exit(1)
+    print(f"  Reader: {backend.name}")
+
+    imported: Dict[str, List[Record]] = {}
+    # One table for all sheets: the publisher names on the spend/risk/title sheets share the publishers' strings
+    symbols = SymbolTable()
+
+    with backend.open(file_path) as (sheet_names, sheet_rows):
+        sheets = []
+        for sheet_name in sheet_names:
+            # Determine sheet type
+            if sheet_name in explicit_map:
+                sheet_type = explicit_map[sheet_name]
+            else:
+                sheet_type = detect_sheet_type(sheet_name)
+
+            if not sheet_type:
+                print(f"  ⚠ Skipping sheet '{sheet_name}' (could not detect type — use --sheet-map)")
+                continue
+            sheets.append((sheet_name, sheet_type))
 
-    return new_content
+        # More workers than sheets or CPUs would only add workbook opens
+        workers = min(jobs, len(sheets), os.cpu_count() or 1)
+        if workers > 1:
+            print(f"  Parsing {len(sheets)} sheets in {workers} processes")
+            parsed = read_sheets_parallel(file_path, backend.name, sheets, workers, symbols, overrides)
+        else:
+            parsed = (read_sheet_data_from_rows(sheet_rows(sheet_name), SHEET_TYPE_MAPPINGS[sheet_type],
+                                                SHEET_TYPE_RECORDS[sheet_type], symbols, overrides.get(sheet_type))
+                      for sheet_name, sheet_type in sheets)
+
+        for (sheet_name, sheet_type), (records, col_mapping, unmapped, headers) in zip(sheets, parsed):
+            # Map sheet type to data.js key
+            data_key_map = {
+                "publishers": "publishers",
+                "spend": "spendData",
+                "risks": "riskData",
+                "titles": "managedTitles",
+                "kpis": "externalKpis",
+            }
+            data_key = data_key_map[sheet_type]
+
+            mapped_cols = {idx: name for idx, name in col_mapping.items()}
+            print(f"  ✓ Sheet '{sheet_name}' → {data_key}: {len(records)} records")
+            print(f"    Mapped columns: {', '.join(mapped_cols.values())}")
+            if unmapped:
+                print(f"    ⚠ Unmapped columns (skipped): {', '.join(unmapped)}")
+
+            imported[data_key] = records
+            if mappings is not None:
+                mappings.setdefault(sheet_type, {}).update(resolved_columns(headers, col_mapping))
+
+    return imported
+
+
+def _parse_cache(data_js_path: Path, explicit_map: Dict[str, str], reader: Optional[str],
+                 overrides: Optional[ColumnOverrides]) -> ParseCache:
+    """Parsed workbooks in .data.js.imports/, keyed by content hash, sheet and column mapping and reader."""
+    return ParseCache(parse_cache_dir(data_js_path), "excel",
+                      [Path(__file__), Path(__file__).with_name("workbook_readers.py"),
+                       Path(__file__).with_name("column_mapping.py")],
+                      repr((sorted(explicit_map.items()), reader or "auto", json.dumps(overrides or {}, sort_keys=True))))
+
+
+def _parse_entry(path: Path, explicit_map: Dict[str, str], reader: Optional[str], jobs: int,
+                 overrides: Optional[ColumnOverrides]) -> Tuple[Dict[str, List[Record]], ColumnOverrides]:
+    """Cache entry of a workbook: its sections and the column mappings they were read with."""
+    mappings: ColumnOverrides = {}
+    return read_workbook(path, explicit_map, reader, jobs, overrides, mappings), mappings
+
+
+def _add_mappings(mappings: Optional[ColumnOverrides], resolved: ColumnOverrides) -> None:
+    if mappings is not None:
+        for sheet_type, columns in resolved.items():
+            mappings.setdefault(sheet_type, {}).update(columns)
+
+
+def _print_cached(path: Path, imported: Dict[str, List[Record]]) -> None:
+    counts = ", ".join(f"{key}: {len(records)}" for key, records in imported.items())
+    print(f"Cached: {path} ({counts or 'no data sheets'})")
+
+
+def read_workbook_cached(file_path: Path, explicit_map: Dict[str, str], data_js_path: Path,
+                         reader: Optional[str] = None, jobs: int = 1, overrides: Optional[ColumnOverrides] = None,
+                         mappings: Optional[ColumnOverrides] = None) -> Dict[str, List[Record]]:
+    """read_workbook through the parse cache: a workbook already parsed (e.g. by a --dry-run) is not read again."""
+    (imported, resolved), cached = _parse_cache(data_js_path, explicit_map, reader, overrides).load_or_parse(
+        file_path, lambda p: _parse_entry(p, explicit_map, reader, jobs, overrides))
+    if cached:
+        _print_cached(file_path, imported)
+    _add_mappings(mappings, resolved)
+    return imported
+
+
+def read_workbook_dir(directory: Path, explicit_map: Dict[str, str], data_js_path: Path,
+                      reader: Optional[str] = None, jobs: int = 1, overrides: Optional[ColumnOverrides] = None,
+                      mappings: Optional[ColumnOverrides] = None) -> Dict[str, List[Record]]:
+    """Parse every workbook in `directory` (cached per file) and merge them oldest first (see batch_import.py)."""
+    files = list_import_files(directory, WORKBOOK_SUFFIXES)
+    if not files:
+        print(f"ERROR: No workbooks ({', '.join(WORKBOOK_SUFFIXES)}) in {directory}", file=sys.stderr)
+        sys.exit(1)
+    cache = _parse_cache(data_js_path, explicit_map, reader, overrides)
+    snapshots = []
+    for path in files:
+        (imported, resolved), cached = cache.load_or_parse(
+            path, lambda p: _parse_entry(p, explicit_map, reader, jobs, overrides))
+        if cached:
+            _print_cached(path, imported)
+        _add_mappings(mappings, resolved)
+        snapshots.append(imported)
+    print(f"\nMerged {len(files)} workbooks (oldest first)")
+    return build_history(snapshots)
 
 
 # ─── Template Generation ─────────────────────────────────────────────────────
 
 def create_template(output_path: str):
     """Generate a template Excel workbook with the expected sheet/column structure."""
+    if not openpyxl:
+        print("ERROR: Writing a template needs openpyxl: pip install openpyxl", file=sys.stderr)
+        sys.exit(1)
     wb = openpyxl.Workbook()
 
     # Publishers sheet
@@ -503,19 +475,44 @@ Examples:
   python import_from_excel.py --file data.xlsx
   python import_from_excel.py --file data.xlsx --dry-run
   python import_from_excel.py --file data.xlsx --merge
+  python import_from_excel.py --file data.xlsx --layout dict
+  python import_from_excel.py --dir monthly/
+  python import_from_excel.py --file data.xlsx --jobs 5
+  python import_from_excel.py --file data.xlsx --dry-run --print-mappings columns.json
+  python import_from_excel.py --file data.xlsx --column-map columns.json
   python import_from_excel.py --template sls_template.xlsx
   python import_from_excel.py --file data.xlsx --sheet-map "Sheet1=publishers" "Financials=spend"
         """,
     )
-    parser.add_argument("--file", "-f", help="Path to Excel workbook (.xlsx)")
+    source = parser.add_mutually_exclusive_group()
+    source.add_argument("--file", "-f", help="Path to Excel workbook (.xlsx)")
+    source.add_argument("--dir", "-d", metavar="DIR",
+                        help="Import every workbook in DIR (e.g. one per month), merged oldest first by file name; "
+                             "parsed workbooks are cached by content hash")
     parser.add_argument("--data-js", default="data.js", help="Path to data.js (default: data.js)")
     parser.add_argument("--dry-run", action="store_true", help="Preview changes without modifying data.js")
+    parser.add_argument("--layout", choices=LAYOUTS,
+                        help="data.js layout: rows (object per record), dict (string table + index tuples) "
+                             "or columns (parallel arrays per field); default keeps the current layout")
     parser.add_argument("--merge", action="store_true",
                         help="Merge with existing data (update matching publishers, add new ones). "
                              "Default: replace all data from Excel.")
     parser.add_argument("--sheet-map", nargs="*", metavar="SHEET=TYPE",
                         help="Explicit sheet-to-type mapping (e.g., 'Sheet1=publishers' 'Financials=spend'). "
                              "Types: publishers, spend, risks, titles, kpis")
+    parser.add_argument("--reader", choices=["auto", *BACKEND_NAMES], default="auto",
+                        help="Workbook reader backend (default: auto — calamine if installed, "
+                             "then the built-in XML reader for .xlsx, xlrd for .xls)")
+    parser.add_argument("--jobs", "-j", type=int, default=1,
+                        help="Parse the mapped sheets in up to N worker processes, one sheet each, "
+                             "never more than there are CPUs (same output as the default serial read)")
+    parser.add_argument("--column-map", metavar="FILE",
+                        help="JSON file pinning headers to fields per sheet type, e.g. "
+                             "{\"publishers\": {\"Vendor\": \"name\", \"Notes\": null}}; "
+                             "other headers are matched by alias as usual")
+    parser.add_argument("--print-mappings", nargs="?", const="-", metavar="FILE",
+                        help="Print the resolved column mappings in --column-map format "
+                             "(or write them to FILE) to review and pin them for later imports")
     parser.add_argument("--template", metavar="OUTPUT.xlsx",
                         help="Generate a template Excel file and exit")
     args = parser.parse_args()
@@ -525,13 +522,18 @@ Examples:
         create_template(args.template)
         return
 
-    if not args.file:
-        parser.error("--file is required (or use --template to generate a template)")
+    if not args.file and not args.dir:
+        parser.error("--file or --dir is required (or use --template to generate a template)")
 
-    file_path = Path(args.file)
-    if not file_path.exists():
-        print(f"ERROR: File not found: {file_path}", file=sys.stderr)
-        sys.exit(1)
+    if args.dir:
+        if not Path(args.dir).is_dir():
+            print(f"ERROR: Directory not found: {args.dir}", file=sys.stderr)
+            sys.exit(1)
+    else:
+        file_path = Path(args.file)
+        if not file_path.exists():
+            print(f"ERROR: File not found: {file_path}", file=sys.stderr)
+            sys.exit(1)
 
     data_js_path = Path(args.data_js)
     if not data_js_path.exists():
@@ -551,58 +553,34 @@ Examples:
                 sys.exit(1)
             explicit_map[sheet_name.strip()] = sheet_type.strip()
 
-    # Read workbook — detect format from file header
-    print(f"Reading: {file_path}")
-    is_xls = _is_old_xls_format(file_path)
-
-    if is_xls:
-        if not xlrd:
-            print("ERROR: This is an old-format .xls file. Install xlrd: pip install xlrd", file=sys.stderr)
-            sys.exit(1)
-        print("  (Detected old .xls format — using xlrd)")
-        sheet_names, sheet_rows_map = _read_xls(file_path)
-    else:
-        if not openpyxl:
-            print("ERROR: This is an .xlsx file. Install openpyxl: pip install openpyxl", file=sys.stderr)
+    # Pinned column mappings
+    overrides: ColumnOverrides = {}
+    if args.column_map:
+        try:
+            overrides = load_column_overrides(
+                Path(args.column_map),
+                {sheet_type: [field_name for _, field_name in column_defs]
+                 for sheet_type, column_defs in SHEET_TYPE_MAPPINGS.items()})
+        except ValueError as e:
+            print(f"ERROR: {e}", file=sys.stderr)
             sys.exit(1)
-        sheet_names, sheet_rows_map = _read_xlsx(file_path)
-
-    imported: Dict[str, Any] = {}
-    total_records = 0
 
-    for sheet_name in sheet_names:
-        # Determine sheet type
-        if sheet_name in explicit_map:
-            sheet_type = explicit_map[sheet_name]
+    reader = None if args.reader == "auto" else args.reader
+    mappings: ColumnOverrides = {}
+    if args.dir:
+        imported = read_workbook_dir(Path(args.dir), explicit_map, data_js_path, reader, args.jobs, overrides, mappings)
+    else:
+        imported = read_workbook_cached(file_path, explicit_map, data_js_path, reader, args.jobs, overrides, mappings)
+    total_records = sum(len(records) for records in imported.values())
+
+    if args.print_mappings:
+        text = json.dumps(mappings, indent=2, ensure_ascii=False)
+        if args.print_mappings == "-":
+            print("\nColumn mappings (--column-map format):")
+            print(text)
         else:
-            sheet_type = detect_sheet_type(sheet_name)
-
-        if not sheet_type:
-            print(f"  ⚠ Skipping sheet '{sheet_name}' (could not detect type — use --sheet-map)")
-            continue
-
-        col_defs = SHEET_TYPE_MAPPINGS[sheet_type]
-        rows = sheet_rows_map[sheet_name]
-        records, col_mapping, unmapped = read_sheet_data_from_rows(rows, col_defs)
-
-        # Map sheet type to data.js key
-        data_key_map = {
-            "publishers": "publishers",
-            "spend": "spendData",
-            "risks": "riskData",
-            "titles": "managedTitles",
-            "kpis": "externalKpis",
-        }
-        data_key = data_key_map[sheet_type]
-
-        mapped_cols = {idx: name for idx, name in col_mapping.items()}
-        print(f"  ✓ Sheet '{sheet_name}' → {data_key}: {len(records)} records")
-        print(f"    Mapped columns: {', '.join(mapped_cols.values())}")
-        if unmapped:
-            print(f"    ⚠ Unmapped columns (skipped): {', '.join(unmapped)}")
-
-        imported[data_key] = records
-        total_records += len(records)
+            Path(args.print_mappings).write_text(text + "\n", encoding="utf-8")
+            print(f"\nColumn mappings written to {args.print_mappings}")
 
     if not imported:
         print("\nNo data sheets detected. Check sheet names or use --sheet-map.")
@@ -611,125 +589,60 @@ Examples:
     # Auto-assign IDs if publishers don't have them
     if "publishers" in imported:
         for i, pub in enumerate(imported["publishers"]):
-            if not pub.get("id"):
-                pub["id"] = i + 1
+            if not pub.id:
+                pub.id = i + 1
 
-    # Handle merge mode
-    if args.merge:
-        # Load existing data
-        existing_content = data_js_path.read_text(encoding="utf-8")
-        # Parse existing defaultRawData by loading it through the generated JS file approach
-        # For simplicity, read the existing data from the generated file if it exists
-        existing = _parse_existing_data(data_js_path)
-        if existing:
-            imported = _merge_data(existing, imported)
-            print(f"\n  Merged with existing data")
-
-    # Set dataset version
-    imported["datasetVersion"] = f"FY26_EXCEL_IMPORT_{date.today().isoformat()}"
-
-    # If some sections weren't in the Excel, keep existing ones
-    if not args.merge:
-        _fill_missing_sections(imported, data_js_path)
-
-    print(f"\nTotal: {total_records} records imported across {len(imported) - 1} sections")
-
-    # Generate output
-    new_content = update_data_js(data_js_path, imported)
-
-    if args.dry_run:
-        print("\n--- DRY RUN (data.js preview) ---")
-        # Show just the defaultRawData portion
-        match = re.search(r"const defaultRawData = \{", new_content)
-        if match:
-            preview = new_content[match.start():match.start() + 2000]
-            print(preview)
-            if len(new_content) - match.start() > 2000:
-                print(f"... ({len(new_content) - match.start() - 2000} more characters)")
-        print("\nDry run complete. No files were modified.")
-        return
-
-    # Write
-    data_js_path.write_text(new_content, encoding="utf-8")
-    print(f"\n✓ Updated {data_js_path} successfully")
-    print(f"  Dataset version: {imported['datasetVersion']}")
-    print(f"  Tip: Open index.html in a browser to see the updated dashboard")
+    # Sections that came from the workbook (plus the version stamp) are the only
+    # ones re-serialized; sections carried over from data.js keep their bytes
+    dirty = set(imported) | {"datasetVersion"}
+    dataset_version = f"FY26_EXCEL_IMPORT_{date.today().isoformat()}"
 
+    print(f"\nTotal: {total_records} records imported across {len(imported)} sections")
 
-def _fill_missing_sections(imported: Dict, data_js_path: Path):
-    """If a section wasn't imported from Excel, try to keep the existing one."""
-    existing = _parse_existing_data(data_js_path)
-    if not existing:
-        return
-    for key in ["publishers", "spendData", "riskData", "managedTitles", "externalKpis"]:
-        if key not in imported and key in existing:
-            imported[key] = existing[key]
+    # Merge mode needs every existing section; otherwise only the sections the
+    # workbook did not provide are read (through the cached section index)
+    data_file = DataJsFile(data_js_path)
+    read_keys = None if args.merge else [key for key in CONTENT_SECTIONS if key not in imported]
+    if args.merge:
+        print(f"\n  Merging with existing data")
 
+    def build(existing: Dict[str, Any]) -> Tuple[Dict[str, Any], Set[str]]:
+        if args.merge and existing:
+            data = merge_sections(existing, imported)
+        else:
+            # If some sections weren't in the Excel, keep existing ones
+            data = {**existing, **imported}
+        data["datasetVersion"] = dataset_version
+        return data, dirty
 
-def _parse_existing_data(data_js_path: Path) -> Optional[Dict]:
-    """Best-effort parse of existing defaultRawData from data.js using Node.js."""
     try:
-        import subprocess
-        # Use Node.js to evaluate the JS and extract the data
-        node_script = f"""
-        const fs = require('fs');
-        const content = fs.readFileSync('{data_js_path.resolve().as_posix()}', 'utf-8');
-        // Extract just the defaultRawData
-        const match = content.match(/const\\s+defaultRawData\\s*=\\s*(\\{{[\\s\\S]*?\\n\\}});/);
-        if (match) {{
-            eval('var result = ' + match[1]);
-            console.log(JSON.stringify(result));
-        }}
-        """
-        result = subprocess.run(
-            ["node", "-e", node_script],
-            capture_output=True, text=True, timeout=10
-        )
-        if result.returncode == 0 and result.stdout.strip():
-            return json.loads(result.stdout.strip())
-    except Exception:
-        pass
-    return None
-
-
-def _merge_data(existing: Dict, imported: Dict) -> Dict:
-    """Merge imported data with existing, updating matches and adding new records."""
-    merged = dict(existing)
+        if args.dry_run:
+            print("\n--- DRY RUN (data.js preview) ---")
+            # Show just the defaultRawData portion
+            data, _ = build(data_file.read_records(read_keys))
+            preview, remaining = data_file.preview(data, dirty, limit=2000, layout=args.layout)
+            print(preview)
+            if remaining:
+                print(f"... ({remaining} more bytes)")
+            print("\nDry run complete. No files were modified.")
+            return
+
+        # Read, merge and write as one compare-and-swap on the file SHA-256: if a
+        # KPI sync writes data.js meanwhile, the merge is redone on top of its changes.
+        # Skipped when the content hash matches the datasetHash already in data.js
+        written = data_file.transact(build, read_keys, layout=args.layout)
+    except DataJsError as e:
+        print(f"ERROR: {e}", file=sys.stderr)
+        sys.exit(1)
 
-    if "publishers" in imported:
-        existing_pubs = {p["name"]: p for p in existing.get("publishers", [])}
-        for pub in imported["publishers"]:
-            existing_pubs[pub["name"]] = pub
-        merged["publishers"] = list(existing_pubs.values())
-        # Re-assign IDs
-        for i, pub in enumerate(merged["publishers"]):
-            pub["id"] = i + 1
-
-    if "spendData" in imported:
-        existing_spend = {s["publisher"]: s for s in existing.get("spendData", [])}
-        for spend in imported["spendData"]:
-            existing_spend[spend["publisher"]] = spend
-        merged["spendData"] = list(existing_spend.values())
-
-    if "riskData" in imported:
-        existing_risks = {r["publisher"]: r for r in existing.get("riskData", [])}
-        for risk in imported["riskData"]:
-            existing_risks[risk["publisher"]] = risk
-        merged["riskData"] = list(existing_risks.values())
-
-    if "managedTitles" in imported:
-        existing_titles = {(t["title"], t.get("publisher", "")): t for t in existing.get("managedTitles", [])}
-        for title in imported["managedTitles"]:
-            existing_titles[(title["title"], title.get("publisher", ""))] = title
-        merged["managedTitles"] = list(existing_titles.values())
-
-    if "externalKpis" in imported:
-        existing_kpis = {k["name"]: k for k in existing.get("externalKpis", [])}
-        for kpi in imported["externalKpis"]:
-            existing_kpis[kpi["name"]] = kpi
-        merged["externalKpis"] = list(existing_kpis.values())
-
-    return merged
+    if not written:
+        print(f"\n✓ Data unchanged (datasetHash {data_file.read_section('datasetHash')}); {data_js_path} left as is")
+        print(f"  Dataset version: {data_file.read_section('datasetVersion')}")
+        return
+    print(f"\n✓ Updated {data_js_path} successfully")
+    print(f"  Dataset version: {dataset_version}")
+    print(f"  Dataset hash: {data_file.read_section('datasetHash')}")
+    print(f"  Tip: Open index.html in a browser to see the updated dashboard")
 
 
 if __name__ == "__main__":
@@ -20,6 +20,10 @@ import argparse, csv, json, logging, os, subprocess, sys, time
 from pathlib import Path
 from datetime import datetime
 
+from arrow_tables import load_cached_tables, write_csv, write_records_csv
+from data_js import DataJsError, DataJsFile, load_data_js
+from records import to_records
+
 LOG_FILE = Path(__file__).parent / "load_data_lakehouse.log"
 
 if sys.platform == "win32" and hasattr(sys.stdout, "reconfigure"):
@@ -38,6 +42,9 @@ log = logging.getLogger(__name__)
 ONELAKE_URL = "https://msit-onelake.dfs.fabric.microsoft.com"
 UPLOAD_FOLDER = "sls_mbr_data"
 DATA_DIR = Path(__file__).parent / "lakehouse_data"
+# datasetHash and externalKpis digest of the exported CSVs and of the last successful
+# table load per workspace (externalKpis is not part of datasetHash, see data_js.py)
+STATE_FILE = DATA_DIR / "state.json"
 
 AZ_CMD = r"C:\Program Files\Microsoft SDKs\Azure\CLI2\wbin\az.cmd"
 if not os.path.exists(AZ_CMD):
@@ -82,8 +89,27 @@ def api(method, url, token, data=None):
 # Step 0: Export data.js to CSV files
 # =============================================================================
 
-def export_data_to_csv():
-    """Read data.js and export to CSV files for lakehouse loading."""
+def read_state():
+    """Return lakehouse_data/state.json
+    ({"exported": hash, "exportedKpis": digest, "loaded": {workspace: {"datasetHash": hash, "externalKpis": digest}}})."""
+    try:
+        return json.loads(STATE_FILE.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return {"exported": None, "loaded": {}}
+
+
+def write_state(state):
+    DATA_DIR.mkdir(exist_ok=True)
+    STATE_FILE.write_text(json.dumps(state, indent=2), encoding="utf-8")
+
+
+def export_data_to_csv(force=False):
+    """Read data.js and export to CSV files for lakehouse loading.
+
+    Skipped when the CSVs on disk were exported from the same datasetHash;
+    when only externalKpis changed since (a KPI sync), just
+    fact_ExternalKPI.csv is written again.
+    """
     log.info("=== Exporting data.js to CSV files ===")
     
     DATA_DIR.mkdir(exist_ok=True)
@@ -94,36 +120,47 @@ def export_data_to_csv():
         log.error("data.js not found")
         return False
     
-    text = data_js_path.read_text(encoding="utf-8")
-    
-    # Extract JSON-like data from JavaScript
-    # Find the defaultRawData object
-    import re
+    try:
+        data_file = DataJsFile(data_js_path)
+        dataset_hash = data_file.read_section("datasetHash")
+        kpi_digest = data_file.digest("externalKpis")
+    except DataJsError as e:
+        log.error(f"Could not parse data.js: {e}")
+        return False
+
+    state = read_state()
+    csvs_present = all((DATA_DIR / csv_file).exists() for csv_file in TABLES.values())
+    if not force and dataset_hash and state.get("exported") == dataset_hash and csvs_present:
+        if state.get("exportedKpis") == kpi_digest:
+            log.info(f"  datasetHash {dataset_hash} unchanged since last export, reusing CSVs")
+            return True
+        log.info(f"  datasetHash {dataset_hash} unchanged since last export, re-exporting external KPIs only")
+        count = export_external_kpis(data_file.read_records(["externalKpis"]).get("externalKpis", []))
+        log.info(f"  fact_ExternalKPI.csv: {count} rows")
+        state["exportedKpis"] = kpi_digest
+        write_state(state)
+        return True
+
+    try:
+        # Arrow tables cached by import_from_csv (pyarrow installed) stand in for the
+        # CSV-derived sections while data.js still holds exactly what they were built from
+        tables = load_cached_tables(data_file)
+        if tables:
+            log.info("  Using the Arrow tables cached by import_from_csv")
+            data = data_file.read_sections(["datasetHash", "externalKpis"])
+        else:
+            # Uses the data.json sidecar when its hash matches data.js
+            data = load_data_js(data_js_path)
+    except DataJsError as e:
+        log.error(f"Could not parse data.js: {e}")
+        return False
     
-    # Parse publishers
-    publishers = extract_js_array(text, "publishers")
-    spend_data = extract_js_array(text, "spendData")
-    risk_data = extract_js_array(text, "riskData")
-    managed_titles = extract_js_array(text, "managedTitles")
-    external_kpis = extract_js_array(text, "externalKpis")
+    external_kpis = to_records("externalKpis", data.get("externalKpis", []))
     
     # Export dim_Publisher
-    with open(DATA_DIR / "dim_Publisher.csv", "w", newline="", encoding="utf-8") as f:
-        writer = csv.writer(f)
-        writer.writerow(["publisher_id", "name", "title", "type", "contact", "renewalDate", "status", "savingsAmount", "savingsType"])
-        for p in publishers:
-            writer.writerow([
-                p.get("id", 0),
-                p.get("name", ""),
-                p.get("title", ""),
-                p.get("type", ""),
-                p.get("contact", ""),
-                p.get("renewalDate", ""),
-                p.get("status", ""),
-                p.get("savingsAmount", 0),
-                p.get("savingsType", ""),
-            ])
-    log.info(f"  dim_Publisher.csv: {len(publishers)} rows")
+    count = export_section(data, tables, "publishers", "dim_Publisher.csv",
+                           ["publisher_id", "name", "title", "type", "contact", "renewalDate", "status", "savingsAmount", "savingsType"])
+    log.info(f"  dim_Publisher.csv: {count} rows")
     
     # Export dim_Date (generate date dimension)
     dates = generate_date_dimension()
@@ -135,173 +172,48 @@ def export_data_to_csv():
     log.info(f"  dim_Date.csv: {len(dates)} rows")
     
     # Export fact_Spend
-    with open(DATA_DIR / "fact_Spend.csv", "w", newline="", encoding="utf-8") as f:
-        writer = csv.writer(f)
-        writer.writerow(["publisher", "companySpend", "msdSpend", "tiamSpend", "fiscalYear", "notes"])
-        for s in spend_data:
-            writer.writerow([
-                s.get("publisher", ""),
-                s.get("companySpend", 0),
-                s.get("msdSpend", 0),
-                s.get("tiamSpend", 0),
-                s.get("fiscalYear", ""),
-                s.get("notes", ""),
-            ])
-    log.info(f"  fact_Spend.csv: {len(spend_data)} rows")
+    count = export_section(data, tables, "spendData", "fact_Spend.csv",
+                           ["publisher", "companySpend", "msdSpend", "tiamSpend", "fiscalYear", "notes"])
+    log.info(f"  fact_Spend.csv: {count} rows")
     
     # Export fact_Risk
-    with open(DATA_DIR / "fact_Risk.csv", "w", newline="", encoding="utf-8") as f:
-        writer = csv.writer(f)
-        writer.writerow(["publisher", "sspa", "po", "finance", "legal", "inventory", "details"])
-        for r in risk_data:
-            writer.writerow([
-                r.get("publisher", ""),
-                r.get("sspa", ""),
-                r.get("po", ""),
-                r.get("finance", ""),
-                r.get("legal", ""),
-                r.get("inventory", ""),
-                r.get("details", ""),
-            ])
-    log.info(f"  fact_Risk.csv: {len(risk_data)} rows")
+    count = export_section(data, tables, "riskData", "fact_Risk.csv",
+                           ["publisher", "sspa", "po", "finance", "legal", "inventory", "details"])
+    log.info(f"  fact_Risk.csv: {count} rows")
     
     # Export dim_ManagedTitle
-    with open(DATA_DIR / "dim_ManagedTitle.csv", "w", newline="", encoding="utf-8") as f:
-        writer = csv.writer(f)
-        writer.writerow(["title", "publisher", "category", "licenseCount", "notes"])
-        for t in managed_titles:
-            writer.writerow([
-                t.get("title", ""),
-                t.get("publisher", ""),
-                t.get("category", ""),
-                t.get("licenseCount", 0),
-                t.get("notes", ""),
-            ])
-    log.info(f"  dim_ManagedTitle.csv: {len(managed_titles)} rows")
+    count = export_section(data, tables, "managedTitles", "dim_ManagedTitle.csv",
+                           ["title", "publisher", "category", "licenseCount", "notes"])
+    log.info(f"  dim_ManagedTitle.csv: {count} rows")
     
     # Export fact_ExternalKPI
-    with open(DATA_DIR / "fact_ExternalKPI.csv", "w", newline="", encoding="utf-8") as f:
-        writer = csv.writer(f)
-        writer.writerow(["name", "value", "unit", "source", "lastUpdated"])
-        for k in external_kpis:
-            writer.writerow([
-                k.get("name", ""),
-                k.get("value", 0),
-                k.get("unit", ""),
-                k.get("source", ""),
-                k.get("lastUpdated", ""),
-            ])
-    log.info(f"  fact_ExternalKPI.csv: {len(external_kpis)} rows")
+    count = export_external_kpis(external_kpis)
+    log.info(f"  fact_ExternalKPI.csv: {count} rows")
     
+    state["exported"] = dataset_hash
+    state["exportedKpis"] = kpi_digest
+    write_state(state)
+    log.info(f"  datasetHash: {dataset_hash}")
     return True
 
 
-def extract_js_array(text, array_name):
-    """Extract a JavaScript array from data.js text."""
-    import re
-    
-    # Find the array declaration
-    pattern = rf"{array_name}:\s*\["
-    match = re.search(pattern, text)
-    if not match:
-        log.warning(f"Could not find {array_name} array")
-        return []
-    
-    start = match.end() - 1  # Include the [
-    
-    # Find matching ]
-    bracket_count = 0
-    end = start
-    for i, c in enumerate(text[start:], start):
-        if c == '[':
-            bracket_count += 1
-        elif c == ']':
-            bracket_count -= 1
-            if bracket_count == 0:
-                end = i + 1
-                break
-    
-    array_text = text[start:end]
-    
-    # Convert JS object syntax to JSON
-    # Replace single quotes with double quotes
-    array_text = re.sub(r"'([^']*)'", r'"\1"', array_text)
-    # Add quotes around unquoted keys
-    array_text = re.sub(r'(\s)(\w+):', r'\1"\2":', array_text)
-    # Handle trailing commas
-    array_text = re.sub(r',(\s*[\]}])', r'\1', array_text)
-    # Handle null values
-    array_text = array_text.replace(": null", ": null")
-    
-    try:
-        return json.loads(array_text)
-    except json.JSONDecodeError as e:
-        log.warning(f"Failed to parse {array_name}: {e}")
-        # Try a more lenient approach - extract individual objects
-        return extract_objects_manually(array_text, array_name)
-
-
-def extract_objects_manually(array_text, array_name):
-    """Manually extract objects from JS array when JSON parsing fails."""
-    import re
-    
-    objects = []
-    # Find all {...} blocks, including nested content
-    i = 0
-    while i < len(array_text):
-        if array_text[i] == '{':
-            # Find matching closing brace
-            brace_count = 0
-            start = i
-            for j, c in enumerate(array_text[i:], i):
-                if c == '{':
-                    brace_count += 1
-                elif c == '}':
-                    brace_count -= 1
-                    if brace_count == 0:
-                        obj_text = array_text[start:j+1]
-                        # Convert to proper JSON
-                        obj_text = re.sub(r"'([^'\\]*(?:\\.[^'\\]*)*)'", r'"\1"', obj_text)
-                        obj_text = re.sub(r'(\s)(\w+):', r'\1"\2":', obj_text)
-                        obj_text = re.sub(r',(\s*})', r'\1', obj_text)
-                        # Escape newlines and tabs in string values
-                        obj_text = obj_text.replace('\n', '\\n').replace('\t', '\\t')
-                        
-                        try:
-                            obj = json.loads(obj_text)
-                            objects.append(obj)
-                        except json.JSONDecodeError:
-                            # Try simpler extraction for this object
-                            obj = extract_obj_simple(array_text[start:j+1], array_name)
-                            if obj:
-                                objects.append(obj)
-                        i = j
-                        break
-        i += 1
-    
-    log.info(f"  Manually extracted {len(objects)} objects from {array_name}")
-    return objects
+def export_section(data, tables, section, csv_file, header):
+    """Write one record section to DATA_DIR/csv_file, from the cached Arrow table if there is one."""
+    if tables:
+        write_csv(tables[section], DATA_DIR / csv_file, header)
+        return tables[section].num_rows
+    records = to_records(section, data.get(section, []))
+    write_records_csv(records, DATA_DIR / csv_file, header)
+    return len(records)
 
 
-def extract_obj_simple(obj_text, array_name):
-    """Extract key-value pairs from a JS object using simple regex."""
-    import re
-    
-    obj = {}
-    # Handle risk data fields specifically 
-    if array_name == "riskData":
-        fields = ["publisher", "sspa", "po", "finance", "legal", "inventory", "details"]
-        for field in fields:
-            # Match field: 'value' or field: ''
-            pattern = rf"{field}:\s*'([^']*(?:\\'[^']*)*)'"
-            match = re.search(pattern, obj_text)
-            if match:
-                obj[field] = match.group(1).replace("\\'", "'")
-            else:
-                obj[field] = ""
-        if obj.get("publisher"):
-            return obj
-    return None
+def export_external_kpis(external_kpis):
+    """Write DATA_DIR/fact_ExternalKPI.csv."""
+    with open(DATA_DIR / "fact_ExternalKPI.csv", "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(["name", "value", "unit", "source", "lastUpdated"])
+        writer.writerows((k.name, k.value, k.unit, k.source, k.lastUpdated) for k in external_kpis)
+    return len(external_kpis)
 
 
 def generate_date_dimension():
@@ -466,6 +378,7 @@ def main():
     parser.add_argument("--upload-only", action="store_true", help="Only upload CSVs, skip table load")
     parser.add_argument("--load-only", action="store_true", help="Only load tables, skip CSV export/upload")
     parser.add_argument("--skip-export", action="store_true", help="Skip data.js export, use existing CSVs")
+    parser.add_argument("--force", action="store_true", help="Re-export CSVs even if datasetHash is unchanged")
     args = parser.parse_args()
 
     log.info("=" * 60)
@@ -504,7 +417,7 @@ def main():
         log.info("")
         log.info("STEP 0: Export data.js to CSV files")
         log.info("-" * 40)
-        if not export_data_to_csv():
+        if not export_data_to_csv(force=args.force):
             log.error("Failed to export data")
             sys.exit(1)
 
@@ -523,6 +436,12 @@ def main():
         loaded, failed = load_tables(fabric_token, ws_id, lakehouse_id)
         if failed > 0:
             log.warning(f"{failed} tables failed to load")
+        elif not args.load_only:
+            # Lets deploy_monthly.py skip the data step until data.js changes
+            state = read_state()
+            state.setdefault("loaded", {})[args.workspace.lower()] = {
+                "datasetHash": state.get("exported"), "externalKpis": state.get("exportedKpis")}
+            write_state(state)
 
     log.info("")
     log.info("=" * 60)
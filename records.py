@@ -0,0 +1,171 @@
+"""
+Record types shared by the SLS MBR pipeline scripts.
+
+Publishers, spend rows, risk rows, managed titles and external KPIs are held as
+slotted dataclasses instead of dicts: each instance stores its fields in fixed
+slots (no per-instance __dict__), attribute access is a slot read, and the
+field order doubles as the property order written to data.js and the CSV
+exports.
+
+Field names match the defaultRawData property names (camelCase), so a record
+round-trips through data.js, data.json and the lakehouse CSVs unchanged.
+Properties a record type does not know (added by hand or by a newer dashboard)
+are kept in `extra` and written back to data.js and data.json after the known
+fields; the lakehouse CSVs have fixed columns and leave them out.
+
+Constructors:
+  Publisher(1, "Adobe", ...)            positional, in FIELDS order
+  Publisher.from_row(row_tuple)         same, from any sequence
+  Publisher.from_dict({"name": ...})    missing keys take DEFAULTS, other keys go to extra
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from operator import attrgetter
+from typing import Any, ClassVar, Dict, Optional, Sequence, Tuple, Type
+
+_NO_EXTRA: Dict[str, Any] = {}
+
+
+class Record:
+    """Base for slotted records: positional/dict constructors and ordered export."""
+    # Unknown properties from from_dict; left unset (one empty slot) for the usual record without any
+    __slots__ = ("_extra",)
+
+    FIELDS: ClassVar[Tuple[str, ...]] = ()
+    DEFAULTS: ClassVar[Tuple[Any, ...]] = ()
+    _getter: ClassVar[Any] = None
+    _field_set: ClassVar[frozenset] = frozenset()
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        cls.FIELDS = tuple(cls.__slots__)
+        cls._getter = attrgetter(*cls.FIELDS)
+        cls._field_set = frozenset(cls.FIELDS)
+
+    @classmethod
+    def from_row(cls, row: Sequence[Any]):
+        return cls(*row)
+
+    @classmethod
+    def from_dict(cls, obj: Dict[str, Any]):
+        get = obj.get
+        record = cls(*[get(name, default) for name, default in zip(cls.FIELDS, cls.DEFAULTS)])
+        if not cls._field_set.issuperset(obj):
+            record._extra = {name: value for name, value in obj.items() if name not in cls._field_set}
+        return record
+
+    @property
+    def extra(self) -> Dict[str, Any]:
+        """Properties from_dict got that are not FIELDS, in their original order (read-only)."""
+        try:
+            return self._extra
+        except AttributeError:
+            return _NO_EXTRA
+
+    def values(self) -> Tuple[Any, ...]:
+        """Field values in FIELDS order."""
+        return self._getter(self)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {**dict(zip(self.FIELDS, self.values())), **self.extra}
+
+    def __reduce__(self):
+        # Pickle as (type, field values): much smaller and faster than the generic
+        # __slots__ state dict when records are sent between worker processes
+        if self.extra:
+            return _with_extra, (self.__class__, self.values(), self.extra)
+        return self.__class__, self.values()
+
+
+def _with_extra(cls: Type[Record], values: Tuple[Any, ...], extra: Dict[str, Any]) -> Record:
+    record = cls(*values)
+    record._extra = extra
+    return record
+
+
+@dataclass
+class Publisher(Record):
+    __slots__ = ("id", "name", "title", "type", "contact", "renewalDate", "status", "savingsAmount", "savingsType")
+    DEFAULTS = (0, "", "", "", "", "", "", 0, None)
+
+    id: int
+    name: str
+    title: str
+    type: str
+    contact: str
+    renewalDate: str
+    status: str
+    savingsAmount: float
+    savingsType: Optional[str]
+
+
+@dataclass
+class SpendRecord(Record):
+    __slots__ = ("publisher", "companySpend", "msdSpend", "tiamSpend", "fiscalYear", "notes")
+    DEFAULTS = ("", 0, 0, 0, "", "")
+
+    publisher: str
+    companySpend: float
+    msdSpend: float
+    tiamSpend: float
+    fiscalYear: str
+    notes: str
+
+
+@dataclass
+class RiskRecord(Record):
+    __slots__ = ("publisher", "sspa", "po", "finance", "legal", "inventory", "details")
+    DEFAULTS = ("", "", "", "", "", "", "")
+
+    publisher: str
+    sspa: str
+    po: str
+    finance: str
+    legal: str
+    inventory: str
+    details: str
+
+
+@dataclass
+class ManagedTitle(Record):
+    __slots__ = ("title", "publisher", "category", "licenseCount", "notes")
+    DEFAULTS = ("", "", "", 0, "")
+
+    title: str
+    publisher: str
+    category: str
+    licenseCount: int
+    notes: str
+
+
+@dataclass
+class ExternalKpi(Record):
+    __slots__ = ("name", "value", "unit", "source", "lastUpdated", "notes")
+    DEFAULTS = ("", 0, "", "", "", "")
+
+    name: str
+    value: float
+    unit: str
+    source: str
+    lastUpdated: str
+    notes: str
+
+
+# defaultRawData array section → record type
+SECTION_RECORD_TYPES: Dict[str, Type[Record]] = {
+    "publishers": Publisher,
+    "spendData": SpendRecord,
+    "riskData": RiskRecord,
+    "managedTitles": ManagedTitle,
+    "externalKpis": ExternalKpi,
+}
+
+
+def to_records(section: str, value: Any) -> Any:
+    """Convert a section's list of dicts to record instances; other values pass through."""
+    record_type = SECTION_RECORD_TYPES.get(section)
+    if record_type is None or not isinstance(value, list):
+        return value
+    return [item if isinstance(item, record_type) else record_type.from_dict(item) for item in value]
@@ -0,0 +1,73 @@
+"""
+Row fingerprints for incremental imports.
+
+import_from_csv.py --incremental hashes every source row (its cells as read)
+and saves the (key, fingerprint) list of the rows it imported to
+.data.js.rows.json next to data.js, together with DataJsFile.fingerprint()
+of the sections it wrote. On the next run a row whose key and fingerprint
+are unchanged reuses the records already in data.js; only added and changed
+rows are parsed, and keys no longer in the source are dropped. A source
+whose rows all match is not imported at all.
+
+The manifest only applies while data.js still holds exactly what that import
+wrote and the parser code is unchanged; otherwise (or when the source columns
+differ) the import parses every row again and writes a fresh manifest.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+MANIFEST_VERSION = 1
+
+
+def manifest_path(data_js_path: Path) -> Path:
+    return Path(data_js_path).with_name(f".{Path(data_js_path).name}.rows.json")
+
+
+def row_fingerprint(values: Iterable[Any]) -> str:
+    """Hash of a source row's cells, as read (a whitespace-only edit just re-parses the row)."""
+    text = "\x1f".join(map(str, values))
+    return hashlib.blake2b(text.encode("utf-8", "surrogatepass"), digest_size=12).hexdigest()
+
+
+@dataclass
+class RowManifest:
+    """The rows behind the sections an incremental import wrote."""
+    parser: str
+    columns: List[str]
+    sections: str
+    rows: List[Tuple[str, str]] = field(default_factory=list)
+
+    def reusable(self) -> Dict[str, str]:
+        """Fingerprint per key, for the keys that identify a single row."""
+        counts: Dict[str, int] = {}
+        for key, _ in self.rows:
+            counts[key] = counts.get(key, 0) + 1
+        return {key: fp for key, fp in self.rows if key and counts[key] == 1}
+
+    @classmethod
+    def load(cls, path: Path) -> Optional["RowManifest"]:
+        try:
+            obj = json.loads(Path(path).read_text(encoding="utf-8"))
+            if obj.get("version") != MANIFEST_VERSION:
+                return None
+            return cls(obj["parser"], obj["columns"], obj["sections"], [tuple(row) for row in obj["rows"]])
+        except (OSError, ValueError, KeyError, TypeError, AttributeError):
+            return None
+
+    def save(self, path: Path) -> None:
+        path = Path(path)
+        tmp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+        obj = {"version": MANIFEST_VERSION, "parser": self.parser, "columns": self.columns,
+               "sections": self.sections, "rows": self.rows}
+        try:
+            tmp_path.write_text(json.dumps(obj, separators=(",", ":")), encoding="utf-8")
+            os.replace(tmp_path, path)
+        except OSError:
+            tmp_path.unlink(missing_ok=True)  # without a manifest the next import is a full one
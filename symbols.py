@@ -0,0 +1,53 @@
+"""
+Symbol table for the low-cardinality strings in imported data.
+
+A CSV row turns into a publisher, a spend row, a risk row and a few managed
+titles, and contacts, statuses, types and fiscal years repeat on every row.
+Passing those strings through one SymbolTable per import makes equal values
+share a single str object, so a large import holds each distinct string once
+instead of once per record.
+
+The table also numbers strings in first-seen order, which is exactly the
+string table of the dictionary-encoded data.js layout: data_js writes that
+layout through a SymbolTable, and since imported values are already the
+canonical objects its lookups hit on identity.
+"""
+
+from __future__ import annotations
+
+from typing import Any, Dict, List
+
+# Record fields worth interning: repeated across rows (or across the sections one row produces)
+INTERNED_FIELDS = frozenset((
+    "name", "publisher", "type", "contact", "status", "savingsType",
+    "fiscalYear", "category", "unit", "source",
+))
+
+
+class SymbolTable:
+    """Interns strings and numbers them in first-seen order."""
+    __slots__ = ("_ids", "strings")
+
+    def __init__(self):
+        self._ids: Dict[str, int] = {}
+        self.strings: List[str] = []
+
+    def __len__(self) -> int:
+        return len(self.strings)
+
+    def __contains__(self, value: Any) -> bool:
+        return value in self._ids
+
+    def index(self, value: str) -> int:
+        """Id of `value`, adding it to the table if new."""
+        i = self._ids.get(value)
+        if i is None:
+            i = self._ids[value] = len(self.strings)
+            self.strings.append(value)
+        return i
+
+    def intern(self, value: Any) -> Any:
+        """The table's copy of a string (adding it if new); non-strings are returned unchanged."""
+        if type(value) is not str:
+            return value
+        return self.strings[self.index(value)]
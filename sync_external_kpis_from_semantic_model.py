@@ -17,7 +17,6 @@ import argparse
 import datetime as dt
 import json
 import os
-import re
 import subprocess
 import sys
 import urllib.error
@@ -25,6 +24,8 @@ import urllib.request
 from pathlib import Path
 from typing import Any, Optional
 
+from data_js import DataJsFile
+
 AZ_CMD = r"C:\Program Files\Microsoft SDKs\Azure\CLI2\wbin\az.cmd"
 if not os.path.exists(AZ_CMD):
     AZ_CMD = "az"
@@ -134,21 +135,6 @@ def list_measure_names(workspace_id: str, dataset_id: str, token: str) -> list[s
         return []
 
 
-def update_external_kpi_value(content: str, kpi_name: str, value: int, last_updated: str) -> str:
-    pattern = re.compile(
-        rf"(\{{\s*name:\s*'{re.escape(kpi_name)}',\s*value:\s*)\d+(\s*,\s*unit:\s*'tickets',\s*source:\s*'[^']+',\s*lastUpdated:\s*')([^']*)(')",
-        re.MULTILINE,
-    )
-
-    def repl(match: re.Match[str]) -> str:
-        return f"{match.group(1)}{value}{match.group(2)}{last_updated}{match.group(4)}"
-
-    new_content, count = pattern.subn(repl, content, count=1)
-    if count != 1:
-        raise RuntimeError(f"Could not find/update KPI '{kpi_name}' in data.js")
-    return new_content
-
-
 def main() -> int:
     parser = argparse.ArgumentParser(description="Sync SNOW/ICM MTD from semantic model into data.js")
     parser.add_argument("--workspace-id", required=True, help="Fabric/Power BI workspace ID")
@@ -183,15 +169,16 @@ def main() -> int:
         if not data_file.exists():
             raise RuntimeError(f"Data file not found: {data_file}")
 
-        content = data_file.read_text(encoding="utf-8")
         today = dt.date.today().isoformat()
-
-        content = update_external_kpi_value(content, "SNOW Tickets MTD", snow_value, today)
+        updates = {"SNOW Tickets MTD": (snow_value, today)}
         if icm_value is not None:
-            content = update_external_kpi_value(content, "ICM Tickets MTD", icm_value, today)
+            updates["ICM Tickets MTD"] = (icm_value, today)
 
-        data_file.write_text(content, encoding="utf-8")
-        print(f"Updated {data_file} successfully.")
+        # All KPIs are patched in one pass over the externalKpis section
+        if DataJsFile(data_file).update_external_kpis(updates):
+            print(f"Updated {data_file} successfully.")
+        else:
+            print(f"KPI values unchanged; {data_file} left as is.")
         return 0
 
     except Exception as exc:
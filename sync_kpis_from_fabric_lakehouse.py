@@ -1,7 +1,6 @@
 import argparse
 import datetime as dt
 import json
-import re
 import subprocess
 import shutil
 from dataclasses import dataclass
@@ -9,6 +8,8 @@ from pathlib import Path
 from typing import Dict, List, Optional, Tuple
 from urllib.parse import unquote, urlparse
 
+from data_js import DataJsFile
+
 
 @dataclass
 class OneLakeTable:
@@ -216,27 +217,11 @@ def coerce_number(value) -> Optional[float]:
     return None
 
 
-def update_external_kpi(data_js_path: Path, snow_value: int, icm_value: int, iso_date: str) -> None:
-    text = data_js_path.read_text(encoding="utf-8")
-
-    snow_pattern = re.compile(
-        r"(\{\s*name:\s*'SNOW Tickets MTD',\s*value:\s*)([-0-9.]+)(\s*,\s*unit:\s*'tickets',\s*source:\s*'ServiceNow',\s*lastUpdated:\s*')([^']*)(')",
-        re.MULTILINE,
-    )
-    icm_pattern = re.compile(
-        r"(\{\s*name:\s*'ICM Tickets MTD',\s*value:\s*)([-0-9.]+)(\s*,\s*unit:\s*'tickets',\s*source:\s*'ICM System',\s*lastUpdated:\s*')([^']*)(')",
-        re.MULTILINE,
-    )
-
-    if not snow_pattern.search(text):
-        raise RuntimeError("Could not find SNOW Tickets MTD entry in data.js")
-    if not icm_pattern.search(text):
-        raise RuntimeError("Could not find ICM Tickets MTD entry in data.js")
-
-    text = snow_pattern.sub(rf"\g<1>{snow_value}\g<3>{iso_date}\5", text, count=1)
-    text = icm_pattern.sub(rf"\g<1>{icm_value}\g<3>{iso_date}\5", text, count=1)
-
-    data_js_path.write_text(text, encoding="utf-8")
+def update_external_kpi(data_js_path: Path, snow_value: int, icm_value: int, iso_date: str) -> bool:
+    return DataJsFile(data_js_path).update_external_kpis({
+        "SNOW Tickets MTD": (snow_value, iso_date),
+        "ICM Tickets MTD": (icm_value, iso_date),
+    })
 
 
 def main():
@@ -273,8 +258,10 @@ def main():
     if not data_js_path.exists():
         raise RuntimeError(f"data.js not found at: {data_js_path}")
 
-    update_external_kpi(data_js_path, snow_value, icm_value, today)
-    print(f"Updated {data_js_path} with SNOW={snow_value}, ICM={icm_value}, lastUpdated={today}")
+    if update_external_kpi(data_js_path, snow_value, icm_value, today):
+        print(f"Updated {data_js_path} with SNOW={snow_value}, ICM={icm_value}, lastUpdated={today}")
+    else:
+        print(f"KPI values unchanged; {data_js_path} left as is.")
 
 
 if __name__ == "__main__":
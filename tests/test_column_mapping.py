@@ -0,0 +1,42 @@
+"""
+--print-mappings output replayed through --column-map gives the same mapping
+(see column_mapping.py).
+"""
+
+import sys
+import unittest
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from column_mapping import ColumnIndex, normalize_header, resolved_columns  # noqa: E402
+from import_from_excel import SPEND_COLUMNS  # noqa: E402
+
+
+def replay(headers, mapping):
+    overrides = {normalize_header(header): field for header, field in resolved_columns(headers, mapping).items()}
+    return ColumnIndex(SPEND_COLUMNS).map(headers, overrides)
+
+
+class ResolvedColumnsTest(unittest.TestCase):
+    def test_repeated_header_keeps_first_mapping(self):
+        headers = ["Publisher", "Notes", "Company Spend", "", "NOTES ", "Notes"]
+        mapping = ColumnIndex(SPEND_COLUMNS).map(headers)
+        self.assertEqual(mapping[1], "notes")
+        self.assertNotIn(4, mapping)
+        self.assertNotIn(5, mapping)
+        self.assertEqual(resolved_columns(headers, mapping),
+                         {"Publisher": "publisher", "Notes": "notes", "Company Spend": "companySpend"})
+        self.assertEqual(replay(headers, mapping), mapping)
+
+    def test_unmapped_headers_round_trip(self):
+        headers = ["Publisher", "Region", "Company Spend"]
+        mapping = ColumnIndex(SPEND_COLUMNS).map(headers, {"company spend": None})
+        self.assertEqual(resolved_columns(headers, mapping),
+                         {"Publisher": "publisher", "Region": None, "Company Spend": None})
+        self.assertEqual(replay(headers, mapping), mapping)
+
+
+if __name__ == "__main__":
+    unittest.main()
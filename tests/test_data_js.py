@@ -0,0 +1,189 @@
+"""
+DataJsFile reads and writes data.js without Node.js (see data_js.py).
+"""
+
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from data_js import (LAYOUTS, DataJsConflict, DataJsError, DataJsFile, build_section_index,  # noqa: E402
+                     js_value, parse_js_value)
+from records import RiskRecord  # noqa: E402
+
+# Source with comments, trailing commas, both quote styles and escapes in details
+COMMENTED = """// Dashboard data
+const defaultRawData = {
+    // Imported sections
+    publishers: [
+        { id: 1, name: 'Adobe', title: 'Creative Cloud', type: 'SaaS', contact: '', renewalDate: '2026-06-30',
+          status: 'Active', savingsAmount: 1.5e3, savingsType: null, },  // trailing comma
+    ],
+    /* risks
+       span lines */
+    riskData: [
+        { publisher: "Figma, Inc.", sspa: 'Open', po: '', finance: '', legal: "Legal \\"hold\\"", inventory: '',
+          details: 'it\\'s the vendor\\'s call \\u2014 see \\x41 /* not a comment */ // nor this' },
+    ],
+    externalKpis: [],
+};
+function unrelated() { return '};'; }
+"""
+
+DETAILS = [
+    "it's the vendor's call",
+    'say "hi"',
+    "back\\slash \\' \\n",
+    "line1\nline2\r\nline3",
+    "tab\there",
+    "Zoë • ✓ \u2028 😀",
+    "// not a comment /* either */",
+    "",
+]
+
+
+class DataJsTestCase(unittest.TestCase):
+    def setUp(self):
+        self.tmp = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, self.tmp)
+        self.data_js = self.tmp / "data.js"
+        shutil.copy(ROOT / "data.js", self.data_js)
+
+    def kpi_values(self):
+        return {kpi.name: kpi.value for kpi in DataJsFile(self.data_js).read_records(["externalKpis"])["externalKpis"]}
+
+
+class ParserTest(unittest.TestCase):
+    def test_string_escapes(self):
+        self.assertEqual(parse_js_value(r"""'it\'s \"q\" \\ \n\t \u00e9\x41\u{1F600}\0'""")[0],
+                         "it's \"q\" \\ \n\t éA😀\0")
+        self.assertEqual(parse_js_value('"it\'s"')[0], "it's")
+        self.assertEqual(parse_js_value("'a\\\nb'")[0], "ab")  # line continuation
+
+    def test_js_value_round_trips_strings(self):
+        for text in DETAILS:
+            literal = js_value(text)
+            self.assertNotIn("\n", literal)
+            self.assertNotIn("\r", literal)
+            self.assertEqual(parse_js_value(literal), (text, len(literal)))
+
+    def test_comments_and_trailing_commas(self):
+        value, end = parse_js_value("{ // one\n a: 1, /* two */ 'b c': [1, 2.5, -3e2,], d: { e: null, }, } // tail")
+        self.assertEqual(value, {"a": 1, "b c": [1, 2.5, -300.0], "d": {"e": None}})
+        self.assertEqual(end, len("{ // one\n a: 1, /* two */ 'b c': [1, 2.5, -3e2,], d: { e: null, }, }"))
+
+    def test_errors_name_the_position(self):
+        for text in ("{ a: 1 b: 2 }", "[1, 2", "'open", "{ a: nope }"):
+            with self.assertRaisesRegex(DataJsError, r"line 1, column \d+"):
+                parse_js_value(text)
+
+    def test_commented_declaration(self):
+        index = build_section_index(COMMENTED.encode("utf-8"))
+        self.assertEqual(index.data_keys(), ["publishers", "riskData", "externalKpis"])
+        path = Path(tempfile.mkdtemp()) / "data.js"
+        self.addCleanup(shutil.rmtree, path.parent)
+        path.write_text(COMMENTED, encoding="utf-8")
+        data = DataJsFile(path).read_sections()
+        self.assertEqual(data["publishers"][0]["savingsAmount"], 1500.0)
+        self.assertIsNone(data["publishers"][0]["savingsType"])
+        self.assertEqual(data["riskData"][0]["legal"], 'Legal "hold"')
+        self.assertEqual(data["riskData"][0]["details"],
+                         "it's the vendor's call \u2014 see A /* not a comment */ // nor this")
+        self.assertEqual(data["externalKpis"], [])
+
+
+class LayoutTest(DataJsTestCase):
+    def setUp(self):
+        super().setUp()
+        data_file = DataJsFile(self.data_js)
+        risks = data_file.read_records(["riskData"])["riskData"]
+        risks.extend(RiskRecord("Edge", "Open", None, "", "", "", details) for details in DETAILS)
+        data_file.write({"riskData": risks}, {"riskData"})
+        self.baseline = DataJsFile(self.data_js).read_sections()
+
+    def test_layout_round_trips(self):
+        for layout in LAYOUTS[1:] + LAYOUTS[:1]:
+            with self.subTest(layout=layout):
+                DataJsFile(self.data_js).write({}, set(), layout=layout)
+                self.data_js.with_suffix(".json").unlink()  # parse data.js itself, not the sidecar
+                data_file = DataJsFile(self.data_js)
+                self.assertEqual(data_file.layout, layout)
+                self.assertEqual(data_file.read_sections(), self.baseline)
+
+    def test_dirty_sections_are_spliced(self):
+        for layout in LAYOUTS:
+            with self.subTest(layout=layout):
+                data_file = DataJsFile(self.data_js)
+                data_file.write({}, set(), layout=layout)
+                before, old = self.data_js.read_bytes(), data_file.index
+                kpis = data_file.read_records(["externalKpis"])["externalKpis"]
+                kpis[0].value += 1
+                self.assertTrue(data_file.write({"externalKpis": kpis}, {"externalKpis"}))
+                after, new = self.data_js.read_bytes(), DataJsFile(self.data_js).index
+                start, end = old.sections["externalKpis"]
+                self.assertEqual(new.sections["externalKpis"][0], start)
+                self.assertEqual(after[:start], before[:start])
+                self.assertEqual(after[new.sections["externalKpis"][1]:], before[end:])
+
+    def test_untouched_sections_and_comments_are_byte_identical(self):
+        text = self.data_js.read_text(encoding="utf-8").replace(
+            "    publishers:", "    // Imported by import_from_csv.py\n    publishers:", 1)
+        self.data_js.write_text(text, encoding="utf-8")
+        data_file = DataJsFile(self.data_js)
+        old = data_file.index
+        before = self.data_js.read_bytes()
+        publishers = data_file.read_records(["publishers"])["publishers"]
+        publishers[0].name = "Renamed Publisher"
+        self.assertTrue(data_file.write({"publishers": publishers}, {"publishers"}))
+        after, new = self.data_js.read_bytes(), DataJsFile(self.data_js).index
+        self.assertIn(b"// Imported by import_from_csv.py", after)
+        self.assertEqual(after[:old.declaration[0]], before[:old.declaration[0]])
+        self.assertEqual(after[new.declaration[1]:], before[old.declaration[1]:])
+        for key in ("spendData", "riskData", "managedTitles", "externalKpis"):
+            (s0, e0), (s1, e1) = old.sections[key], new.sections[key]
+            self.assertEqual(after[s1:e1], before[s0:e0], key)
+        self.assertNotEqual(data_file.read_section("datasetHash"), self.baseline["datasetHash"])
+        self.assertEqual(DataJsFile(self.data_js).read_sections()["publishers"][0]["name"], "Renamed Publisher")
+
+
+class CompareAndSwapTest(DataJsTestCase):
+    def test_interleaved_kpi_writers_keep_both_updates(self):
+        a, b = DataJsFile(self.data_js), DataJsFile(self.data_js)
+        calls = []
+
+        def patch(current):
+            calls.append(len(calls))
+            if len(calls) == 1:
+                # B writes between A's read and A's write
+                b.update_external_kpis({"ICM Tickets MTD": (999, "2026-03-01")})
+            kpis = current["externalKpis"]
+            for kpi in kpis:
+                if kpi.name == "SNOW Tickets MTD":
+                    kpi.value = 451
+            return {"externalKpis": kpis}, {"externalKpis"}
+
+        self.assertTrue(a.transact(patch, ["externalKpis"]))
+        self.assertEqual(len(calls), 2)  # the conflict made A re-read
+        self.assertEqual(self.kpi_values(), {"SNOW Tickets MTD": 451, "ICM Tickets MTD": 999})
+
+    def test_same_size_rewrite_within_one_mtime_is_a_conflict(self):
+        a, b = DataJsFile(self.data_js), DataJsFile(self.data_js)
+        base = a.current_hash()
+        st = os.stat(self.data_js)
+        b.update_external_kpis({"ICM Tickets MTD": (999, "2026-02-24")})
+        os.utime(self.data_js, ns=(st.st_atime_ns, st.st_mtime_ns))
+        self.assertEqual(os.stat(self.data_js).st_size, st.st_size)
+        kpis = a.read_records(["externalKpis"])["externalKpis"]
+        kpis[0].value = 451
+        with self.assertRaises(DataJsConflict):
+            a.write({"externalKpis": kpis}, {"externalKpis"}, expected_hash=base)
+        self.assertEqual(self.kpi_values()["ICM Tickets MTD"], 999)
+
+
+if __name__ == "__main__":
+    unittest.main()
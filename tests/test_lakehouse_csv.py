@@ -0,0 +1,84 @@
+"""
+The lakehouse export writes the same CSVs from the Arrow tables cached by
+import_from_csv as from the records in data.js (see arrow_tables.py).
+"""
+
+import contextlib
+import io
+import shutil
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from arrow_tables import (HAVE_ARROW, TABLE_SECTIONS, load_cached_tables, save_cached_tables,  # noqa: E402
+                          write_csv, write_records_csv)
+from data_js import DataJsFile, load_data_js  # noqa: E402
+from import_from_csv import csv_sections, read_csv_records, read_csv_records_arrow  # noqa: E402
+from records import SECTION_RECORD_TYPES, to_records  # noqa: E402
+
+HEADER = ("Publisher,Title,On Prem vs. SaaS,SLS FTE Point of Contact,License / Renewal / Subscription End Date,"
+          "FY26 Invoice Status,FY26 Savings,Savings Type,FY26 Company Annual Spend,FY26 MSD Annual Spend,"
+          "FY26 TI&M Annual Spend,FY26 Company Annual Spend Notes,Risks : SSPA,Risks : PO,Risks : Finance,"
+          "Risks : Legal,Risks : Inventory,Comments (Does not require publishing on Power BI)")
+
+# Quotes, commas and newlines in text, blank cells (null savingsType), integral
+# and fractional amounts, non-ASCII text, a title split into several managed titles
+ROWS = [
+    'Adobe,Creative Cloud,Hybrid,Kathren,6/30/2026,Completed,$-,Cost Avoidance,"$13,644,684.70",'
+    '" $111,765.18 ",26000,,,,,,," it\'s ""quoted""\nline2"',
+    '"Figma, Inc.",Figma • FigJam,SaaS,Ana,7/31/2026,Pending,"$5,672,880.00",Cost Avoidance,"$1,000.00",0,,'
+    '"renewal, multi-year",Open,,"Legal ""hold""",,Missing,',
+    'Zoë Tools,"Tool A\nTool B",On Prem,,,TBD,,,,$12.5,"$0.10",,,,,,,',
+]
+
+
+class LakehouseCsvTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, self.tmp)
+        self.source = self.tmp / "export.csv"
+        self.source.write_text("\n".join([HEADER] + ROWS) + "\n", encoding="utf-8")
+        self.data_js = self.tmp / "data.js"
+        shutil.copy(ROOT / "data.js", self.data_js)
+
+        _, _, self.records = read_csv_records(self.source)
+        DataJsFile(self.data_js).write({**csv_sections(self.records), "datasetVersion": "FY26_TEST"})
+
+    def export(self, name, tables):
+        out = self.tmp / name
+        out.mkdir()
+        data = load_data_js(self.data_js)
+        for section in TABLE_SECTIONS:
+            header = list(SECTION_RECORD_TYPES[section].FIELDS)
+            if tables:
+                write_csv(tables[section], out / f"{section}.csv", header)
+            else:
+                write_records_csv(to_records(section, data[section]), out / f"{section}.csv", header)
+        return {section: (out / f"{section}.csv").read_bytes() for section in TABLE_SECTIONS}
+
+    @unittest.skipUnless(HAVE_ARROW, "pyarrow is not installed")
+    def test_arrow_and_records_exports_match(self):
+        with contextlib.redirect_stdout(io.StringIO()):
+            _, _, records, tables = read_csv_records_arrow(self.source)
+        self.assertEqual(csv_sections(records), csv_sections(self.records))
+        data_file = DataJsFile(self.data_js)
+        self.assertTrue(save_cached_tables(data_file, tables))
+        tables = load_cached_tables(data_file)
+        self.assertIsNotNone(tables)
+        from_arrow = self.export("arrow", tables)
+        from_records = self.export("records", None)
+        for section in TABLE_SECTIONS:
+            self.assertEqual(from_arrow[section], from_records[section], section)
+
+    def test_records_export_without_sidecar_matches(self):
+        from_sidecar = self.export("sidecar", None)
+        self.data_js.with_suffix(".json").unlink()
+        self.assertEqual(self.export("parsed", None), from_sidecar)
+
+
+if __name__ == "__main__":
+    unittest.main()
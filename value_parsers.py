@@ -0,0 +1,176 @@
+"""
+Cell value parsers shared by the CSV and Excel importers.
+
+Exports repeat the same handful of strings across thousands of rows ("$-",
+"TBD", the quarter-end renewal dates), so each parser checks a fast path for
+values that are already clean and sends the rest through a precompiled
+pattern behind a bounded LRU cache. Results are identical to the per-cell
+str.replace/strptime versions they replace.
+
+benchmarks/bench_value_parsers.py times them against those versions on a
+synthetic 1M-cell column.
+
+When pyarrow is installed, parse_currency_array / parse_date_array apply the
+same rules to a whole string column with compute kernels; values outside the
+common formats are handed to the scalar parsers so results stay identical.
+"""
+
+from __future__ import annotations
+
+import re
+from datetime import date
+from functools import lru_cache
+from typing import Any, Union
+
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+except ImportError:
+    pa = pc = None
+
+# Distinct strings remembered per parser; exports rarely have more distinct dates/amounts
+CACHE_SIZE = 4096
+
+_US_DATE_RE = re.compile(r"(\d{1,2})/(\d{1,2})/(\d{4})")
+_ISO_DATE_RE = re.compile(r"\d{4}-\d{2}-\d{2}")
+
+# Field names that hold amounts / counts in the data.js records
+FLOAT_FIELDS = frozenset(("savingsAmount", "companySpend", "msdSpend", "tiamSpend", "value"))
+INT_FIELDS = frozenset(("id", "licenseCount"))
+
+
+def parse_currency(val: str) -> float:
+    """Parse a currency string like '$13,644,684.70' to float ('', '-' and '$-' are 0)."""
+    if not val:
+        return 0
+    # Amounts end in a digit; placeholders ("$-", "TBD") don't and are served from the cache
+    if val[-1].isdigit():
+        try:
+            return float(val.replace("$", "").replace(",", ""))
+        except ValueError:
+            pass
+    return _parse_currency(val)
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def _parse_currency(val: str) -> float:
+    s = val.strip().replace("$", "").replace(",", "").replace(" ", "")
+    if not s or s == "-":
+        return 0
+    try:
+        return float(s)
+    except ValueError:
+        return 0
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def parse_date(val: str) -> str:
+    """Parse M/D/YYYY or YYYY-MM-DD (trailing text ignored) to YYYY-MM-DD. Return '' if not a valid date."""
+    if not val:
+        return ""
+    s = val.strip()
+    match = _US_DATE_RE.match(s)
+    if match:
+        month, day, year = match.groups()
+        try:
+            return date(int(year), int(month), int(day)).isoformat()
+        except ValueError:
+            return ""
+    match = _ISO_DATE_RE.match(s)
+    return match.group(0) if match else ""
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def _iso_date(val: date) -> str:
+    return val.strftime("%Y-%m-%d")
+
+
+def float_cell(val: Any) -> Union[float, str]:
+    """Excel cell → amount: numbers as float, empty as 0, dates as YYYY-MM-DD, anything unparsable as 0."""
+    cls = type(val)
+    if cls is float or cls is int:
+        return float(val) if val else 0
+    if val is None:
+        return 0
+    if isinstance(val, date):
+        return _iso_date(val)
+    try:
+        return float(val) if val else 0
+    except (ValueError, TypeError):
+        return 0
+
+
+def int_cell(val: Any) -> Union[int, str]:
+    """Excel cell → count/id: truncated to int, empty as 0, dates as YYYY-MM-DD, anything unparsable as 0."""
+    cls = type(val)
+    if cls is int:
+        return val
+    if val is None:
+        return 0
+    if isinstance(val, date):
+        return _iso_date(val)
+    try:
+        return int(float(val)) if val else 0
+    except (ValueError, TypeError):
+        return 0
+
+
+def text_cell(val: Any) -> str:
+    """Excel cell → text: stripped string, empty as '', dates as YYYY-MM-DD."""
+    if type(val) is str:
+        return val.strip()
+    if not val:
+        return ""
+    if isinstance(val, date):
+        return _iso_date(val)
+    return str(val).strip()
+
+
+def cell_parser(field_name: str):
+    """The Excel cell converter for a record field, resolved once per column instead of per cell."""
+    if field_name in FLOAT_FIELDS:
+        return float_cell
+    if field_name in INT_FIELDS:
+        return int_cell
+    return text_cell
+
+
+# ─── Column versions (pyarrow) ───────────────────────────────────────────────
+
+def strip_array(values: "pa.Array") -> "pa.Array":
+    """str.strip() over a string column, nulls as ''."""
+    return pc.utf8_trim_whitespace(pc.fill_null(values, ""))
+
+
+def parse_currency_array(values: "pa.Array") -> "pa.Array":
+    """parse_currency over a string column, as float64."""
+    s = pc.replace_substring_regex(strip_array(values), r"[$, ]", "")
+    plain = pc.match_substring_regex(s, r"^-?\d+(\.\d+)?$")
+    result = pc.cast(pc.if_else(plain, s, "0"), pa.float64())
+    # Exponents, "+5", ".5" and the like: rare, so the scalar parser decides
+    odd = pc.invert(pc.or_(plain, pc.is_in(s, value_set=pa.array(["", "-"]))))
+    if pc.any(odd).as_py():
+        replacements = [float(parse_currency(v)) for v in pc.filter(values, odd).to_pylist()]
+        result = pc.replace_with_mask(result, odd, pa.array(replacements, pa.float64()))
+    return result
+
+
+def parse_date_array(values: "pa.Array") -> "pa.Array":
+    """parse_date over a string column."""
+    s = strip_array(values)
+    us = pc.extract_regex(s, r"^(?P<m>\d{1,2})/(?P<d>\d{1,2})/(?P<y>\d{4})")
+    year = pc.struct_field(us, "y")
+    us_iso = pc.binary_join_element_wise(
+        year,
+        pc.utf8_lpad(pc.struct_field(us, "m"), 2, "0"),
+        pc.utf8_lpad(pc.struct_field(us, "d"), 2, "0"),
+        "-",
+    )
+    # Out-of-range M/D/YYYY dates (2/30/2026) are '' like in parse_date, not an ISO fallback.
+    # strptime rolls 02-30 over to 03-02, so a valid date is one that formats back unchanged.
+    round_trip = pc.strftime(pc.strptime(us_iso, format="%Y-%m-%d", unit="s", error_is_null=True), format="%Y-%m-%d")
+    us_valid = pc.and_(pc.fill_null(pc.equal(round_trip, us_iso), False), pc.not_equal(year, "0000"))
+    iso = pc.struct_field(pc.extract_regex(s, r"^(?P<iso>\d{4}-\d{2}-\d{2})"), "iso")
+    return pc.if_else(pc.is_valid(us),
+                      pc.if_else(us_valid, us_iso, ""),
+                      pc.fill_null(iso, ""))
@@ -0,0 +1,465 @@
+"""
+Workbook reader backends for import_from_excel.
+
+A backend opens a workbook as a context manager yielding (sheet names,
+sheet_rows), where sheet_rows(name) streams one sheet's rows as tuples of
+cell values, as openpyxl's iter_rows(values_only=True) gives them: None for
+an empty cell, int/float for numbers, datetime for date-formatted numbers,
+bool and str. Columns are counted from A and rows from 1 (missing rows come
+through as empty tuples, and a row may stop at its last cell), so header
+positions and the resulting records are the same whichever backend read the
+file.
+
+Backends, in the order automatic selection tries them:
+  calamine  python-calamine (Rust), .xlsx and .xls, when installed
+  xml       zipfile + xml.etree.iterparse over the sheet and shared-string
+            parts; standard library only, .xlsx
+  openpyxl  openpyxl in read-only mode, .xlsx
+  xlrd      xlrd with sheets loaded on demand, .xls
+
+benchmarks/bench_workbook_readers.py times them against each other.
+"""
+
+from __future__ import annotations
+
+import posixpath
+import re
+import zipfile
+from contextlib import contextmanager
+from dataclasses import dataclass
+from datetime import date, datetime, time, timedelta
+from pathlib import Path
+from typing import Any, Callable, ContextManager, Dict, Iterator, List, Optional, Set, Tuple
+from xml.etree.ElementTree import iterparse
+
+try:
+    import python_calamine
+except ImportError:
+    python_calamine = None
+
+try:
+    import openpyxl
+except ImportError:
+    openpyxl = None
+
+try:
+    import xlrd
+except ImportError:
+    xlrd = None
+
+# (sheet names, function streaming a sheet's rows)
+SheetRows = Tuple[List[str], Callable[[str], Iterator[tuple]]]
+
+
+class WorkbookReaderError(RuntimeError):
+    pass
+
+
+# ─── Format Detection ────────────────────────────────────────────────────────
+
+# OLE2 Compound Binary File magic: D0 CF 11 E0 A1 B1 1A E1
+_OLE_MAGIC = b"\xd0\xcf\x11\xe0"
+# Stream name of an encrypted (password / IRM protected) OOXML package inside an OLE2 container
+_ENCRYPTED_PACKAGE = "EncryptedPackage".encode("utf-16-le")
+
+
+def workbook_format(file_path: Path) -> str:
+    """'xls' for an old OLE2 workbook, 'xlsx' otherwise; raises for an encrypted .xlsx."""
+    with open(file_path, "rb") as f:
+        header = f.read(64 * 1024)
+    if header[:4] != _OLE_MAGIC:
+        return "xlsx"
+    if _ENCRYPTED_PACKAGE in header:
+        raise WorkbookReaderError(f"{file_path} is encrypted (password or IRM protected); "
+                                  f"save an unprotected copy to import it")
+    return "xls"
+
+
+# ─── calamine ────────────────────────────────────────────────────────────────
+
+def _calamine_xlsx_value(val: Any) -> Any:
+    # calamine reports every number as float, empty cells as "" and date-only
+    # cells as date; openpyxl gives int for integral numbers, None and datetime
+    if val == "":
+        return None
+    if type(val) is float and val.is_integer():
+        return int(val)
+    if type(val) is date:
+        return datetime(val.year, val.month, val.day)
+    return val
+
+
+@contextmanager
+def open_calamine(file_path: Path) -> Iterator[SheetRows]:
+    """Open a workbook via python-calamine."""
+    wb = python_calamine.CalamineWorkbook.from_path(str(file_path))
+    # .xls values already match xlrd (floats, "" for empty cells)
+    convert = _calamine_xlsx_value if workbook_format(file_path) == "xlsx" else None
+
+    def sheet_rows(name: str) -> Iterator[tuple]:
+        sheet = wb.get_sheet_by_name(name)
+        # Rows come from row 1, but columns from the first used one; pad back to column A
+        _, first_col = sheet.start or (0, 0)
+        pad = (None,) * first_col if convert else ("",) * first_col
+        for row in sheet.iter_rows():
+            yield pad + (tuple(map(convert, row)) if convert else tuple(row))
+
+    try:
+        yield wb.sheet_names, sheet_rows
+    finally:
+        wb.close()
+
+
+# ─── zip + iterparse ─────────────────────────────────────────────────────────
+
+_MAIN_NS = "{http://schemas.openxmlformats.org/spreadsheetml/2006/main}"
+_DOC_REL_NS = "{http://schemas.openxmlformats.org/officeDocument/2006/relationships}"
+_PKG_REL_NS = "{http://schemas.openxmlformats.org/package/2006/relationships}"
+
+_ROW = _MAIN_NS + "row"
+_CELL = _MAIN_NS + "c"
+_VALUE = _MAIN_NS + "v"
+_TEXT = _MAIN_NS + "t"
+_RUN = _MAIN_NS + "r"
+_INLINE = _MAIN_NS + "is"
+_SI = _MAIN_NS + "si"
+_SHEET_DATA = _MAIN_NS + "sheetData"
+
+# Built-in number formats that are dates/times (ECMA-376 18.8.30); 46 is [h]:mm:ss
+_BUILTIN_DATE_FORMATS = {14, 15, 16, 17, 18, 19, 20, 21, 22, 45, 46, 47}
+_BUILTIN_TIMEDELTA_FORMATS = {46}
+# Same rules as openpyxl.styles.numbers: quoted literals and [locale]/[color]
+# blocks are ignored; an unescaped d/m/h/y/s makes a date format
+_FORMAT_LITERALS_RE = re.compile(r'".*?"|\[(?!hh?\]|mm?\]|ss?\])[^\]]*\]')
+_DATE_TOKEN_RE = re.compile(r"(?<![_\\])[dmhysDMHYS]")
+_TIMEDELTA_RE = re.compile(r"\[hh?\](:mm(:ss(\.0*)?)?)?|\[mm?\](:ss(\.0*)?)?|\[ss?\](\.0*)?", re.I)
+_COLUMN_RE = re.compile(r"[A-Z]+")
+
+_WINDOWS_EPOCH = datetime(1899, 12, 30)
+_MAC_EPOCH = datetime(1904, 1, 1)
+
+
+def _is_date_format(fmt: str) -> bool:
+    return _DATE_TOKEN_RE.search(_FORMAT_LITERALS_RE.sub("", fmt.split(";")[0])) is not None
+
+
+def _is_timedelta_format(fmt: str) -> bool:
+    return _TIMEDELTA_RE.search(fmt.split(";")[0]) is not None
+
+
+def _from_excel(value: float, epoch: datetime, as_timedelta: bool) -> Any:
+    """Excel serial → datetime (time for a fraction of a day, timedelta for duration formats), as openpyxl converts it."""
+    if as_timedelta:
+        td = timedelta(days=value)
+        if td.microseconds:
+            td = timedelta(seconds=td.total_seconds() // 1, microseconds=round(td.microseconds, -3))
+        return td
+    day, fraction = divmod(value, 1)
+    diff = timedelta(milliseconds=round(fraction * 86400 * 1000))
+    if 0 <= value < 1 and diff.days == 0:
+        minutes, seconds = divmod(diff.seconds, 60)
+        hours, minutes = divmod(minutes, 60)
+        return time(hours, minutes, seconds, diff.microseconds)
+    if 0 < value < 60 and epoch == _WINDOWS_EPOCH:
+        day += 1  # Excel's phantom 1900-02-29
+    return epoch + timedelta(days=day) + diff
+
+
+def _column_index(ref: str, cache: Dict[str, int] = {}) -> int:
+    """0-based column of a cell reference such as 'AB12'."""
+    letters = _COLUMN_RE.match(ref).group(0)
+    index = cache.get(letters)
+    if index is None:
+        index = 0
+        for ch in letters:
+            index = index * 26 + ord(ch) - 64
+        index = cache[letters] = index - 1
+    return index
+
+
+def _rich_text(node) -> str:
+    # Plain <t> plus the <t> of each run; phonetic <rPh> runs are left out, as openpyxl does
+    parts = []
+    for child in node:
+        if child.tag == _TEXT:
+            parts.append(child.text or "")
+        elif child.tag == _RUN:
+            parts.append(child.findtext(_TEXT) or "")
+    return "".join(parts)
+
+
+def _read_rels(archive: zipfile.ZipFile, part: str) -> Dict[str, Tuple[str, str]]:
+    """Relationship id → (type, target part path) for a package part."""
+    rels_path = posixpath.join(posixpath.dirname(part), "_rels", posixpath.basename(part) + ".rels")
+    try:
+        data = archive.open(rels_path)
+    except KeyError:
+        return {}
+    rels = {}
+    with data:
+        for _, node in iterparse(data):
+            if node.tag == _PKG_REL_NS + "Relationship":
+                target = node.get("Target", "")
+                if node.get("TargetMode") != "External":
+                    target = target.lstrip("/") if target.startswith("/") else \
+                        posixpath.normpath(posixpath.join(posixpath.dirname(part), target))
+                rels[node.get("Id")] = (node.get("Type", "").rsplit("/", 1)[-1], target)
+    return rels
+
+
+class _XmlWorkbook:
+    """Workbook structure read from the package: sheet parts, shared strings and date styles."""
+
+    def __init__(self, archive: zipfile.ZipFile):
+        self.archive = archive
+        root_rels = _read_rels(archive, "")
+        workbook_part = next((target for kind, target in root_rels.values() if kind == "officeDocument"),
+                             "xl/workbook.xml")
+        rels = _read_rels(archive, workbook_part)
+
+        self.sheets: Dict[str, str] = {}
+        self.epoch = _WINDOWS_EPOCH
+        with archive.open(workbook_part) as f:
+            for _, node in iterparse(f):
+                if node.tag == _MAIN_NS + "sheet":
+                    kind, target = rels.get(node.get(_DOC_REL_NS + "id"), ("", ""))
+                    self.sheets[node.get("name")] = target if kind == "worksheet" else ""
+                elif node.tag == _MAIN_NS + "workbookPr" and node.get("date1904") in ("1", "true"):
+                    self.epoch = _MAC_EPOCH
+
+        parts = {kind: target for kind, target in rels.values()}
+        self._strings_part = parts.get("sharedStrings")
+        self._shared_strings: Optional[List[str]] = None
+        self.date_styles, self.timedelta_styles = self._read_styles(parts.get("styles"))
+
+    @property
+    def shared_strings(self) -> List[str]:
+        if self._shared_strings is None:
+            strings = []
+            if self._strings_part and self._strings_part in self.archive.namelist():
+                with self.archive.open(self._strings_part) as f:
+                    for _, node in iterparse(f):
+                        if node.tag == _SI:
+                            strings.append(_rich_text(node).replace("x005F_", ""))
+                            node.clear()
+            self._shared_strings = strings
+        return self._shared_strings
+
+    def _read_styles(self, part: Optional[str]) -> Tuple[Set[int], Set[int]]:
+        """Indexes of the cell formats (the s attribute) that hold dates and durations."""
+        date_styles: Set[int] = set()
+        timedelta_styles: Set[int] = set()
+        if not part or part not in self.archive.namelist():
+            return date_styles, timedelta_styles
+        custom: Dict[int, str] = {}
+        xf_formats: List[int] = []
+        in_cell_xfs = False
+        with self.archive.open(part) as f:
+            for event, node in iterparse(f, events=("start", "end")):
+                if node.tag == _MAIN_NS + "cellXfs":
+                    in_cell_xfs = event == "start"
+                elif event == "end" and node.tag == _MAIN_NS + "numFmt":
+                    custom[int(node.get("numFmtId"))] = node.get("formatCode", "")
+                elif event == "end" and in_cell_xfs and node.tag == _MAIN_NS + "xf":
+                    xf_formats.append(int(node.get("numFmtId", 0)))
+        for idx, fmt_id in enumerate(xf_formats):
+            if fmt_id in custom:
+                if _is_date_format(custom[fmt_id]):
+                    date_styles.add(idx)
+                if _is_timedelta_format(custom[fmt_id]):
+                    timedelta_styles.add(idx)
+            else:
+                if fmt_id in _BUILTIN_DATE_FORMATS:
+                    date_styles.add(idx)
+                if fmt_id in _BUILTIN_TIMEDELTA_FORMATS:
+                    timedelta_styles.add(idx)
+        return date_styles, timedelta_styles
+
+    def _cell_value(self, cell) -> Any:
+        kind = cell.get("t", "n")
+        if kind == "inlineStr":
+            inline = cell.find(_INLINE)
+            return _rich_text(inline) if inline is not None else None
+        value = cell.findtext(_VALUE) or None
+        if value is None:
+            return None
+        if kind == "n":
+            number = float(value) if "." in value or "E" in value or "e" in value else int(value)
+            style = int(cell.get("s", 0))
+            if style in self.date_styles:
+                try:
+                    return _from_excel(number, self.epoch, style in self.timedelta_styles)
+                except (OverflowError, ValueError):
+                    return "#VALUE!"
+            return number
+        if kind == "s":
+            return self.shared_strings[int(value)]
+        if kind == "b":
+            return bool(int(value))
+        if kind == "d":
+            return datetime.fromisoformat(value.rstrip("Z"))
+        return value  # "str" (formula result) and "e" (error code) are text
+
+    def sheet_rows(self, name: str) -> Iterator[tuple]:
+        part = self.sheets[name]
+        if not part:
+            return  # chartsheet / dialogsheet: no cells
+        row_number = 0
+        with self.archive.open(part) as f:
+            sheet_data = None
+            for event, node in iterparse(f, events=("start", "end")):
+                if event == "start":
+                    if node.tag == _SHEET_DATA:
+                        sheet_data = node
+                    continue
+                if node.tag != _ROW:
+                    continue
+                r = node.get("r")
+                number = int(r) if r else row_number + 1
+                for _ in range(row_number + 1, number):
+                    yield ()  # rows the sheet leaves out
+                row_number = number
+                values: List[Any] = []
+                column = -1
+                for cell in node.iter(_CELL):
+                    ref = cell.get("r")
+                    column = _column_index(ref) if ref else column + 1
+                    if column > len(values):
+                        values.extend([None] * (column - len(values)))
+                    values.append(self._cell_value(cell))
+                yield tuple(values)
+                # Drop parsed rows so memory stays flat however long the sheet is
+                if sheet_data is not None:
+                    sheet_data.clear()
+
+
+@contextmanager
+def open_xml(file_path: Path) -> Iterator[SheetRows]:
+    """Open an .xlsx file by parsing its XML parts directly (standard library only)."""
+    with zipfile.ZipFile(file_path) as archive:
+        try:
+            workbook = _XmlWorkbook(archive)
+        except (KeyError, SyntaxError) as e:
+            raise WorkbookReaderError(f"{file_path} is not a readable .xlsx workbook: {e}") from e
+        yield list(workbook.sheets), workbook.sheet_rows
+
+
+# ─── openpyxl / xlrd ─────────────────────────────────────────────────────────
+
+@contextmanager
+def open_openpyxl(file_path: Path) -> Iterator[SheetRows]:
+    """Open an .xlsx file via openpyxl (read-only)."""
+    wb = openpyxl.load_workbook(file_path, read_only=True, data_only=True)
+    try:
+        yield wb.sheetnames, lambda name: wb[name].iter_rows(values_only=True)
+    finally:
+        wb.close()
+
+
+# Rows sampled at the top of an .xls sheet to find its date columns
+XLS_DATE_SAMPLE_ROWS = 200
+
+_XLS_EPOCHS = (datetime(1899, 12, 30), datetime(1904, 1, 1))  # by workbook datemode
+_XLS_MAX_DAYS = (2958466, 2958466 - 1462)  # serials past 9999-12-31
+
+
+def _xls_date_converter(datemode: int) -> Callable[[float], Any]:
+    """Excel serial → datetime as datetime(*xlrd.xldate_as_tuple()) gives it, memoized per serial.
+
+    Serials that do not make a datetime there (times of day, the ambiguous
+    pre-March-1900 dates, out-of-range values) are returned unchanged.
+    """
+    epoch = _XLS_EPOCHS[datemode]
+    max_days = _XLS_MAX_DAYS[datemode]
+    cache: Dict[float, Any] = {}
+
+    def convert(val: float) -> Any:
+        dt = cache.get(val)
+        if dt is None:
+            dt = val
+            if val > 0:
+                days = int(val)
+                seconds = int(round((val - days) * 86400.0))
+                if seconds == 86400:
+                    days, seconds = days + 1, 0
+                if days and days < max_days and not (datemode == 0 and days < 61):
+                    dt = epoch + timedelta(days=days, seconds=seconds)
+            cache[val] = dt
+        return dt
+
+    return convert
+
+
+@contextmanager
+def open_xlrd(file_path: Path) -> Iterator[SheetRows]:
+    """Open an old .xls file via xlrd; sheets are loaded on demand and unloaded once read.
+
+    Rows are read whole (row_values/row_types) and ragged, so trailing empty
+    cells are neither stored nor padded. Date columns are found once from the
+    first XLS_DATE_SAMPLE_ROWS rows; a row whose type count shows a date
+    outside them is scanned in full.
+    """
+    wb = xlrd.open_workbook(str(file_path), formatting_info=False, on_demand=True, ragged_rows=True)
+    date_type = xlrd.XL_CELL_DATE
+
+    def sheet_rows(name: str) -> Iterator[tuple]:
+        ws = wb.sheet_by_name(name)
+        convert = _xls_date_converter(wb.datemode)
+        try:
+            date_cols = sorted({col_idx for row_idx in range(min(ws.nrows, XLS_DATE_SAMPLE_ROWS))
+                                for col_idx, ctype in enumerate(ws.row_types(row_idx)) if ctype == date_type})
+            for row_idx in range(ws.nrows):
+                values = ws.row_values(row_idx)
+                types = ws.row_types(row_idx)
+                dates = types.count(date_type)
+                if dates:
+                    for col_idx in date_cols:
+                        if col_idx < len(types) and types[col_idx] == date_type:
+                            values[col_idx] = convert(values[col_idx])
+                            dates -= 1
+                    if dates:
+                        for col_idx, ctype in enumerate(types):
+                            if ctype == date_type and col_idx not in date_cols:
+                                values[col_idx] = convert(values[col_idx])
+                yield tuple(values)
+        finally:
+            wb.unload_sheet(name)
+
+    try:
+        yield wb.sheet_names(), sheet_rows
+    finally:
+        wb.release_resources()
+
+
+# ─── Backend Selection ───────────────────────────────────────────────────────
+
+@dataclass(frozen=True)
+class ReaderBackend:
+    name: str
+    formats: Tuple[str, ...]
+    open: Callable[[Path], ContextManager[SheetRows]]
+    available: bool
+    install: str = ""
+
+
+# In automatic-selection order
+BACKENDS: List[ReaderBackend] = [
+    ReaderBackend("calamine", ("xlsx", "xls"), open_calamine, python_calamine is not None, "pip install python-calamine"),
+    ReaderBackend("xml", ("xlsx",), open_xml, True),
+    ReaderBackend("openpyxl", ("xlsx",), open_openpyxl, openpyxl is not None, "pip install openpyxl"),
+    ReaderBackend("xlrd", ("xls",), open_xlrd, xlrd is not None, "pip install xlrd"),
+]
+BACKEND_NAMES = [backend.name for backend in BACKENDS]
+
+
+def select_backend(file_path: Path, name: Optional[str] = None) -> ReaderBackend:
+    """The backend for a workbook: `name` if given, else the first available one that reads its format."""
+    fmt = workbook_format(file_path)
+    candidates = [b for b in BACKENDS if fmt in b.formats and (name is None or b.name == name)]
+    if name is not None and not candidates:
+        raise WorkbookReaderError(f"The {name} reader cannot read .{fmt} files")
+    for backend in candidates:
+        if backend.available:
+            return backend
+    hints = " or ".join(b.install for b in candidates)
+    raise WorkbookReaderError(f"No reader for .{fmt} files is installed: {hints}")